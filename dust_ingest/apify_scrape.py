@@ -10,10 +10,11 @@ import asyncio
 import hashlib
 import logging
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterator
 
 from apify_client import ApifyClient
 
+from dust_ingest import progress, tracing
 from dust_ingest.html_sanitize import sanitize_html, truncate_to_word_limit
 from dust_ingest.models import PageSnapshot, PipelineConfig, UrlEntry
 from dust_ingest.normalize import extract_elements_and_assets
@@ -76,21 +77,26 @@ def scrape_urls(
     yields no usable HTML.
     """
     client = ApifyClient(config.apify_token)
+    progress.add_total("scrape", len(urls))
 
     actor_ids = [config.apify_actor_id]
     if config.apify_fallback_actor_id:
         actor_ids.append(config.apify_fallback_actor_id)
 
-    for actor_id in actor_ids:
+    for n, actor_id in enumerate(actor_ids):
+        if n:
+            tracing.count("scrape.fallback")
         logger.info("Starting Apify actor %s for %d URLs", actor_id, len(urls))
         actor_input = _build_actor_input(urls, config)
 
         try:
-            run = client.actor(actor_id).call(
-                run_input=actor_input,
-                timeout_secs=config.apify_timeout_secs * len(urls) + 60,
-            )
+            with tracing.span("scrape.actor"):
+                run = client.actor(actor_id).call(
+                    run_input=actor_input,
+                    timeout_secs=config.apify_timeout_secs * len(urls) + 60,
+                )
         except Exception:
+            tracing.count("scrape.actor_failed")
             logger.exception("Apify actor %s failed", actor_id)
             continue
 
@@ -99,21 +105,53 @@ def scrape_urls(
             logger.warning("No dataset returned by actor %s", actor_id)
             continue
 
-        items: list[dict[str, Any]] = list(
-            client.dataset(dataset_id).iterate_items()
-        )
+        with tracing.span("scrape.dataset"):
+            items: list[dict[str, Any]] = list(
+                client.dataset(dataset_id).iterate_items()
+            )
         logger.info("Actor %s returned %d items", actor_id, len(items))
 
         snapshots = _items_to_snapshots(items, urls, project_id)
         if snapshots:
+            progress.advance(
+                "scrape", len(snapshots), failed=max(0, len(urls) - len(snapshots)),
+            )
             return snapshots
 
         logger.warning("Actor %s produced no usable HTML; trying fallback", actor_id)
 
     logger.error("All Apify actors failed or returned no HTML")
+    progress.advance("scrape", 0, failed=len(urls))
     return []
 
 
+def iter_scrape_batches(
+    urls: list[UrlEntry],
+    config: PipelineConfig,
+    *,
+    project_id: str = "default",
+    batch_size: int = 10,
+) -> Iterator[list[PageSnapshot]]:
+    """Scrape *urls* in fixed-size batches, yielding snapshots per batch.
+
+    Each batch is a separate actor run, so downstream stages can start
+    working on the first pages while later batches are still crawling.
+    """
+    batch_size = max(1, batch_size)
+    # Declare the whole run once so the scrape ETA is not per batch.
+    progress.expect("scrape", len(urls))
+    try:
+        for start in range(0, len(urls), batch_size):
+            batch = urls[start:start + batch_size]
+            logger.info(
+                "Scraping batch %d-%d of %d URLs",
+                start + 1, start + len(batch), len(urls),
+            )
+            yield scrape_urls(batch, config, project_id=project_id)
+    finally:
+        progress.settle("scrape")
+
+
 def _items_to_snapshots(
     items: list[dict[str, Any]],
     urls: list[UrlEntry],
@@ -128,16 +166,21 @@ def _items_to_snapshots(
         url = item.get("url", "")
         raw_html = _extract_html(item)
         if not raw_html:
+            tracing.count("scrape.no_html")
             logger.warning("No HTML for %s — skipping", url)
             continue
 
-        html = sanitize_html(raw_html, base_url=url)
-        html = truncate_to_word_limit(html)
-        elements, assets = extract_elements_and_assets(html, base_url=url)
+        page_id = _page_id(url)
+        with tracing.span("scrape.sanitize", page=page_id):
+            html = sanitize_html(raw_html, base_url=url)
+        with tracing.span("scrape.truncate", page=page_id):
+            html = truncate_to_word_limit(html)
+        with tracing.span("scrape.extract", page=page_id):
+            elements, assets = extract_elements_and_assets(html, base_url=url)
         title = item.get("title") or item.get("metadata", {}).get("title")
 
         snap = PageSnapshot(
-            pageId=_page_id(url),
+            pageId=page_id,
             url=url,
             title=title,
             capturedAt=now,
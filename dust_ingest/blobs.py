@@ -0,0 +1,134 @@
+"""Content-addressed, compressed blob storage for large cache fields.
+
+Blobs live under ``./cache/blobs/<hh>/<sha256><ext>`` and are referenced as
+``"sha256:<hex>"``.  Identical content is stored once no matter how many
+snapshots, runs or projects point at it.  Compression uses zstd when the
+optional ``zstandard`` package is installed and gzip otherwise; either
+format is readable regardless of which one new blobs are written with.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable
+
+from dust_ingest import cache
+
+try:  # optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "sha256:"
+_ZSTD_EXT = ".zst"
+_GZIP_EXT = ".gz"
+# Files younger than this may belong to a put_text() still in progress.
+TMP_GRACE_SECS = 3600.0
+
+
+def _blob_dir() -> Path:
+    return cache.CACHE_DIR / "blobs"
+
+
+def _digest(ref: str) -> str:
+    if not ref.startswith(_PREFIX):
+        raise ValueError(f"Not a blob reference: {ref!r}")
+    return ref[len(_PREFIX):]
+
+
+def _paths(digest: str) -> list[Path]:
+    """Candidate on-disk paths for *digest*, preferred format first."""
+    base = _blob_dir() / digest[:2] / digest
+    exts = [_ZSTD_EXT, _GZIP_EXT] if zstandard is not None else [_GZIP_EXT, _ZSTD_EXT]
+    return [base.with_name(digest + ext) for ext in exts]
+
+
+def _compress(data: bytes) -> tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), _ZSTD_EXT
+    return gzip.compress(data, compresslevel=6, mtime=0), _GZIP_EXT
+
+
+def _decompress(data: bytes, ext: str) -> bytes:
+    if ext == _ZSTD_EXT:
+        if zstandard is None:
+            raise RuntimeError("zstd blob found but the 'zstandard' package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def put_text(text: str) -> str:
+    """Store *text* (if not already present) and return its reference."""
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    ref = _PREFIX + digest
+    for path in _paths(digest):
+        if path.is_file():
+            # Deduplicated — nothing to write.  Touch it so a concurrent gc
+            # treats it as recent until the snapshot referencing it is saved.
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                break  # collected just now; write it again
+            return ref
+
+    payload, ext = _compress(data)
+    target = _blob_dir() / digest[:2] / (digest + ext)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so concurrent writers never expose a partial blob.
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(payload)
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return ref
+
+
+def get_text(ref: str) -> str:
+    """Return the text stored under *ref*."""
+    digest = _digest(ref)
+    for path in _paths(digest):
+        if path.is_file():
+            return _decompress(path.read_bytes(), path.suffix).decode("utf-8")
+    raise FileNotFoundError(f"Missing blob {ref}")
+
+
+def gc(referenced: Iterable[str], *, grace_secs: float = TMP_GRACE_SECS) -> tuple[int, int]:
+    """Delete every blob not in *referenced*; return ``(removed, bytes_freed)``.
+
+    Temp files and unreferenced blobs modified within *grace_secs* are left
+    alone: they may belong to a concurrent writer whose snapshot has not
+    been saved yet.
+    """
+    keep = {_digest(ref) for ref in referenced}
+    removed = freed = 0
+    root = _blob_dir()
+    if not root.is_dir():
+        return 0, 0
+    cutoff = time.time() - grace_secs
+    for path in root.glob("*/*"):
+        digest = path.name.split(".", 1)[0]
+        if digest in keep and not path.name.endswith(".tmp"):
+            continue
+        try:
+            st = path.stat()
+            if st.st_mtime > cutoff:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue  # renamed or removed by a concurrent writer
+        freed += st.st_size
+        removed += 1
+    logger.info("Blob GC: removed %d blobs (%d bytes), kept %d", removed, freed, len(keep))
+    return removed, freed
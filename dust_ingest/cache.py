@@ -0,0 +1,570 @@
+"""Local cache I/O.
+
+Two interchangeable backends, selected with the ``CACHE_BACKEND`` env var:
+
+``dir`` (default) — one JSON file per record, easy to inspect::
+
+    ./cache/pages/<pageId>/snapshot.json   # page minus html + "htmlBlob" ref
+    ./cache/pages/<pageId>/variants.json   # IDs of the page's current variants
+    ./cache/levels/level_01.json … level_10.json
+    ./cache/variants/<variantId>.json
+    ./cache/manifest.json                  # per-page content hashes
+    ./cache/blobs/<hh>/<sha256>.zst|.gz    # shared by both backends
+
+``sqlite`` — a single indexed ``./cache/cache.db`` (see
+:mod:`dust_ingest.sqlite_store`).  ``dust_ingest cache import`` / ``export``
+convert between the two.
+
+Page HTML is kept in the content-addressed blob store
+(:mod:`dust_ingest.blobs`); snapshots only hold the ``htmlBlob`` reference.
+
+Callers use the module-level functions below; they dispatch to the active
+backend.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from dust_ingest import blobs, serialize
+from dust_ingest.models import AssetRecord, ElementRecord, Level, PageSnapshot, PageVariant
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("./cache")
+BACKENDS = ("dir", "sqlite")
+
+
+# ---------------------------------------------------------------------------
+# Page records
+# ---------------------------------------------------------------------------
+
+def page_to_record(page: PageSnapshot) -> dict:
+    """Serialize *page* for the cache, moving ``html`` into the blob store."""
+    return pages_to_records([page])[0]
+
+
+def pages_to_records(pages: list[PageSnapshot]) -> list[dict]:
+    """:func:`page_to_record` for a batch, dumped in one pydantic call."""
+    records = serialize.dump_models(pages, exclude={"html"})
+    for page, record in zip(pages, records):
+        record["htmlBlob"] = blobs.put_text(page.html)
+    return records
+
+
+def page_from_record(record: dict) -> PageSnapshot:
+    """Inverse of :func:`page_to_record` (also accepts inline ``html``)."""
+    ref = record.pop("htmlBlob", None)
+    if ref is not None:
+        record["html"] = blobs.get_text(ref)
+    return PageSnapshot.model_validate(record)
+
+
+class PageHandle:
+    """Lightweight in-memory stand-in for a cached :class:`PageSnapshot`.
+
+    Keeps the page's identity plus its elements and assets as tuples
+    (:class:`~dust_ingest.models.ElementRecord`); the HTML stays in the blob
+    store and is read back only when ``html`` is accessed.  The alteration
+    and upload code reads it like a snapshot; :meth:`snapshot` converts it
+    back to the pydantic model at I/O edges.
+    """
+
+    __slots__ = (
+        "pageId", "url", "title", "capturedAt", "elements", "assets",
+        "styles", "tags", "projectId", "htmlBlob",
+    )
+
+    def __init__(self, page: PageSnapshot, html_blob: str) -> None:
+        self.pageId = page.pageId
+        self.url = page.url
+        self.title = page.title
+        self.capturedAt = page.capturedAt
+        self.elements = tuple(ElementRecord.from_model(e) for e in page.elements)
+        self.assets = tuple(AssetRecord.from_model(a) for a in page.assets)
+        self.styles = tuple(page.styles)
+        self.tags = tuple(page.tags)
+        self.projectId = page.projectId
+        self.htmlBlob = html_blob
+
+    @property
+    def html(self) -> str:
+        return blobs.get_text(self.htmlBlob)
+
+    def snapshot(self, *, with_html: bool = True) -> PageSnapshot:
+        """The full snapshot (``html`` is ``""`` unless *with_html*)."""
+        return PageSnapshot(
+            pageId=self.pageId,
+            url=self.url,
+            title=self.title,
+            capturedAt=self.capturedAt,
+            html=self.html if with_html else "",
+            elements=[e.to_model() for e in self.elements],
+            assets=[a.to_model() for a in self.assets],
+            styles=list(self.styles),
+            tags=list(self.tags),
+            projectId=self.projectId,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class CacheStore:
+    """Interface shared by the cache backends.
+
+    Write methods take batches so backends can group them into a single
+    transaction.  Query methods stream results.
+    """
+
+    def save_pages(self, pages: Iterable[PageSnapshot]) -> None:
+        raise NotImplementedError
+
+    def save_levels(self, levels: Iterable[Level]) -> None:
+        raise NotImplementedError
+
+    def save_variants(self, variants: Iterable[PageVariant]) -> None:
+        raise NotImplementedError
+
+    def delete_variants(self, variant_ids: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def replace_page_variants(self, page_id: str, variants: list[PageVariant]) -> None:
+        raise NotImplementedError
+
+    def load_page(self, page_id: str) -> PageSnapshot | None:
+        raise NotImplementedError
+
+    def load_variant(self, variant_id: str) -> PageVariant | None:
+        raise NotImplementedError
+
+    def load_level(self, difficulty: int, project_id: str | None = None) -> Level | None:
+        raise NotImplementedError
+
+    def load_page_variants(self, page_id: str) -> list[PageVariant]:
+        raise NotImplementedError
+
+    def iter_pages(
+        self, *, project_id: str | None = None, tag: str | None = None,
+    ) -> Iterator[PageSnapshot]:
+        raise NotImplementedError
+
+    def iter_variants(
+        self,
+        *,
+        project_id: str | None = None,
+        page_id: str | None = None,
+        level_id: str | None = None,
+        difficulty: int | None = None,
+    ) -> Iterator[PageVariant]:
+        raise NotImplementedError
+
+    def iter_levels(self, *, project_id: str | None = None) -> Iterator[Level]:
+        raise NotImplementedError
+
+    def blob_refs(self) -> set[str]:
+        """Every blob reference held by cached records."""
+        raise NotImplementedError
+
+    def load_manifest(self) -> dict[str, dict]:
+        raise NotImplementedError
+
+    def update_manifest(self, entries: dict[str, dict]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release backend resources (no-op by default)."""
+
+
+def _matches(record: object, **filters: object) -> bool:
+    """Return True if every non-None filter equals the record attribute."""
+    return all(
+        value is None or getattr(record, name) == value
+        for name, value in filters.items()
+    )
+
+
+class DirStore(CacheStore):
+    """One JSON file per record under *root*."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    # -- writers ------------------------------------------------------------
+
+    def save_pages(self, pages: Iterable[PageSnapshot]) -> None:
+        pages = list(pages)
+        for page, record in zip(pages, pages_to_records(pages)):
+            page_dir = self.root / "pages" / page.pageId
+            page_dir.mkdir(parents=True, exist_ok=True)
+            (page_dir / "snapshot.json").write_bytes(serialize.dumps(record, indent=True))
+
+    def save_levels(self, levels: Iterable[Level]) -> None:
+        levels = list(levels)
+        levels_dir = self.root / "levels"
+        levels_dir.mkdir(parents=True, exist_ok=True)
+        for level, record in zip(levels, serialize.dump_models(levels)):
+            fname = f"level_{level.difficulty:02d}.json"
+            (levels_dir / fname).write_bytes(serialize.dumps(record, indent=True))
+
+    def save_variants(self, variants: Iterable[PageVariant]) -> None:
+        variants = list(variants)
+        variants_dir = self.root / "variants"
+        variants_dir.mkdir(parents=True, exist_ok=True)
+        for variant, record in zip(variants, serialize.dump_models(variants)):
+            (variants_dir / f"{variant.variantId}.json").write_bytes(
+                serialize.dumps(record, indent=True)
+            )
+
+    def delete_variants(self, variant_ids: Iterable[str]) -> None:
+        for vid in variant_ids:
+            (self.root / "variants" / f"{vid}.json").unlink(missing_ok=True)
+
+    def replace_page_variants(self, page_id: str, variants: list[PageVariant]) -> None:
+        # The per-page index (not the manifest) tracks ownership so sharded
+        # ``alter`` workers never write the same file.
+        keep = {v.variantId for v in variants}
+        self.delete_variants(
+            vid for vid in self._variant_index(page_id) if vid not in keep
+        )
+        self.save_variants(variants)
+        page_dir = self.root / "pages" / page_id
+        page_dir.mkdir(parents=True, exist_ok=True)
+        (page_dir / "variants.json").write_text(
+            json.dumps([v.variantId for v in variants]), encoding="utf-8"
+        )
+
+    # -- readers ------------------------------------------------------------
+
+    @staticmethod
+    def _read(path: Path, model: type):  # type: ignore[no-untyped-def]
+        if not path.is_file():
+            return None
+        try:
+            return model.model_validate_json(path.read_text(encoding="utf-8"))
+        except ValueError:
+            logger.warning("Corrupt cache file %s — ignoring", path)
+            return None
+
+    @staticmethod
+    def _read_page(path: Path) -> PageSnapshot | None:
+        if not path.is_file():
+            return None
+        try:
+            return page_from_record(serialize.loads(path.read_bytes()))
+        except (ValueError, FileNotFoundError):
+            logger.warning("Corrupt cache file %s — ignoring", path)
+            return None
+
+    def _variant_index(self, page_id: str) -> list[str]:
+        path = self.root / "pages" / page_id / "variants.json"
+        if not path.is_file():
+            return []
+        try:
+            return list(json.loads(path.read_text(encoding="utf-8")))
+        except ValueError:
+            logger.warning("Corrupt variant index %s — ignoring", path)
+            return []
+
+    def load_page(self, page_id: str) -> PageSnapshot | None:
+        return self._read_page(self.root / "pages" / page_id / "snapshot.json")
+
+    def load_variant(self, variant_id: str) -> PageVariant | None:
+        return self._read(self.root / "variants" / f"{variant_id}.json", PageVariant)
+
+    def load_level(self, difficulty: int, project_id: str | None = None) -> Level | None:
+        level = self._read(
+            self.root / "levels" / f"level_{difficulty:02d}.json", Level
+        )
+        if level is not None and not _matches(level, projectId=project_id):
+            return None
+        return level
+
+    def load_page_variants(self, page_id: str) -> list[PageVariant]:
+        out: list[PageVariant] = []
+        for vid in self._variant_index(page_id):
+            variant = self.load_variant(vid)
+            if variant is not None:
+                out.append(variant)
+        return out
+
+    def iter_pages(
+        self, *, project_id: str | None = None, tag: str | None = None,
+    ) -> Iterator[PageSnapshot]:
+        for path in sorted((self.root / "pages").glob("*/snapshot.json")):
+            page = self._read_page(path)
+            if page is None or not _matches(page, projectId=project_id):
+                continue
+            if tag is not None and tag not in page.tags:
+                continue
+            yield page
+
+    def iter_variants(
+        self,
+        *,
+        project_id: str | None = None,
+        page_id: str | None = None,
+        level_id: str | None = None,
+        difficulty: int | None = None,
+    ) -> Iterator[PageVariant]:
+        for path in sorted((self.root / "variants").glob("*.json")):
+            variant = self._read(path, PageVariant)
+            if variant is not None and _matches(
+                variant, projectId=project_id, pageId=page_id,
+                levelId=level_id, difficulty=difficulty,
+            ):
+                yield variant
+
+    def iter_levels(self, *, project_id: str | None = None) -> Iterator[Level]:
+        for path in sorted((self.root / "levels").glob("level_*.json")):
+            level = self._read(path, Level)
+            if level is not None and _matches(level, projectId=project_id):
+                yield level
+
+    def blob_refs(self) -> set[str]:
+        refs: set[str] = set()
+        for path in (self.root / "pages").glob("*/snapshot.json"):
+            try:
+                ref = json.loads(path.read_text(encoding="utf-8")).get("htmlBlob")
+            except ValueError:
+                continue
+            if ref:
+                refs.add(ref)
+        return refs
+
+    # -- manifest -----------------------------------------------------------
+
+    def load_manifest(self) -> dict[str, dict]:
+        path = self.root / "manifest.json"
+        if not path.is_file():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            logger.warning("Corrupt cache manifest %s — starting fresh", path)
+            return {}
+
+    def update_manifest(self, entries: dict[str, dict]) -> None:
+        manifest = self.load_manifest()
+        manifest.update(entries)
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / "manifest.json").write_text(
+            json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8"
+        )
+
+
+_stores: dict[tuple[str, Path], CacheStore] = {}
+
+
+def open_store(backend: str, root: Path | None = None) -> CacheStore:
+    """Return a (memoized) store for *backend* rooted at *root*."""
+    root = root or CACHE_DIR
+    key = (backend, root)
+    store = _stores.get(key)
+    if store is None:
+        if backend == "sqlite":
+            from dust_ingest.sqlite_store import SqliteStore
+
+            store = SqliteStore(root / "cache.db")
+        elif backend == "dir":
+            store = DirStore(root)
+        else:
+            raise ValueError(f"Unknown cache backend {backend!r} (expected one of {BACKENDS})")
+        _stores[key] = store
+    return store
+
+
+def get_store() -> CacheStore:
+    """Return the store selected by ``CACHE_BACKEND`` (default ``dir``)."""
+    return open_store(os.environ.get("CACHE_BACKEND", "dir"))
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+def save_page(page: PageSnapshot) -> None:
+    """Write a page snapshot to the local cache."""
+    get_store().save_pages([page])
+
+
+def save_pages(pages: Iterable[PageSnapshot]) -> None:
+    """Write many page snapshots in one batch."""
+    get_store().save_pages(pages)
+
+
+def spill_pages(pages: Iterable[PageSnapshot]) -> list[PageHandle]:
+    """Persist *pages* and return handles to keep in memory in their place.
+
+    Once the snapshots are dropped, a page costs its element text plus a
+    few hundred bytes instead of its HTML and pydantic element objects.
+    """
+    pages = list(pages)
+    get_store().save_pages(pages)
+    # put_text only hashes here: save_pages has just stored each blob.
+    return [PageHandle(p, blobs.put_text(p.html)) for p in pages]
+
+
+def save_level(level: Level) -> None:
+    """Write a level to the local cache."""
+    get_store().save_levels([level])
+
+
+def save_levels(levels: Iterable[Level]) -> None:
+    """Write many levels in one batch."""
+    get_store().save_levels(levels)
+
+
+def save_variant(variant: PageVariant) -> None:
+    """Write a variant to the local cache."""
+    get_store().save_variants([variant])
+
+
+def save_variants(variants: Iterable[PageVariant]) -> None:
+    """Write many variants in one batch."""
+    get_store().save_variants(variants)
+
+
+def delete_variant(variant_id: str) -> None:
+    """Remove a cached variant if present."""
+    get_store().delete_variants([variant_id])
+
+
+def delete_variants(variant_ids: Iterable[str]) -> None:
+    """Remove many variants in one batch."""
+    get_store().delete_variants(variant_ids)
+
+
+def replace_page_variants(page_id: str, variants: list[PageVariant]) -> None:
+    """Cache *variants* as the current set for *page_id*, dropping old ones."""
+    get_store().replace_page_variants(page_id, variants)
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+def load_page(page_id: str) -> PageSnapshot | None:
+    """Load a cached page snapshot, or *None* if missing/unreadable."""
+    return get_store().load_page(page_id)
+
+
+def load_variant(variant_id: str) -> PageVariant | None:
+    """Load a cached variant, or *None* if missing/unreadable."""
+    return get_store().load_variant(variant_id)
+
+
+def load_page_variants(page_id: str) -> list[PageVariant]:
+    """Load every cached variant currently recorded for *page_id*."""
+    return get_store().load_page_variants(page_id)
+
+
+def load_level(difficulty: int, project_id: str | None = None) -> Level | None:
+    """Load a cached level by difficulty, or *None* if missing/unreadable."""
+    return get_store().load_level(difficulty, project_id)
+
+
+def iter_pages(*, project_id: str | None = None, tag: str | None = None) -> Iterator[PageSnapshot]:
+    """Stream cached pages, optionally filtered by project and/or tag."""
+    return get_store().iter_pages(project_id=project_id, tag=tag)
+
+
+def iter_variants(
+    *,
+    project_id: str | None = None,
+    page_id: str | None = None,
+    level_id: str | None = None,
+    difficulty: int | None = None,
+) -> Iterator[PageVariant]:
+    """Stream cached variants matching every given filter."""
+    return get_store().iter_variants(
+        project_id=project_id, page_id=page_id,
+        level_id=level_id, difficulty=difficulty,
+    )
+
+
+def iter_levels(*, project_id: str | None = None) -> Iterator[Level]:
+    """Stream cached levels, optionally filtered by project."""
+    return get_store().iter_levels(project_id=project_id)
+
+
+# ---------------------------------------------------------------------------
+# Incremental-build manifest
+# ---------------------------------------------------------------------------
+
+def content_hash(html: str) -> str:
+    """Hash of sanitized page HTML used to detect content changes."""
+    return hashlib.sha256(html.encode()).hexdigest()
+
+
+def load_manifest() -> dict[str, dict]:
+    """Return ``{pageId: {url, contentHash, scrapedAt}}``."""
+    return get_store().load_manifest()
+
+
+def record_pages(pages: list[PageSnapshot]) -> None:
+    """Record content hashes and scrape times for freshly scraped *pages*."""
+    get_store().update_manifest({
+        page.pageId: {
+            "url": page.url,
+            "contentHash": content_hash(page.html),
+            "scrapedAt": page.capturedAt,
+        }
+        for page in pages
+    })
+
+
+def record_variants(pages: list[PageSnapshot], variants: list[PageVariant]) -> None:
+    """Make *variants* the current cached set for each of *pages*.
+
+    Variants of pages not in *pages* are ignored.
+    """
+    by_page: dict[str, list[PageVariant]] = {p.pageId: [] for p in pages}
+    for v in variants:
+        if v.pageId in by_page:
+            by_page[v.pageId].append(v)
+    for page_id, page_variants in by_page.items():
+        replace_page_variants(page_id, page_variants)
+
+
+def gc_blobs() -> tuple[int, int]:
+    """Delete blobs no cached record references; return ``(removed, bytes)``.
+
+    References from *both* backends are kept, since they share one blob
+    directory.
+    """
+    refs = open_store("dir").blob_refs()
+    if (CACHE_DIR / "cache.db").is_file():
+        refs |= open_store("sqlite").blob_refs()
+    return blobs.gc(refs)
+
+
+# ---------------------------------------------------------------------------
+# Backend conversion
+# ---------------------------------------------------------------------------
+
+def copy_store(src: CacheStore, dst: CacheStore) -> dict[str, int]:
+    """Copy every record from *src* into *dst*; return per-kind counts."""
+    pages = list(src.iter_pages())
+    dst.save_pages(pages)
+    variant_count = 0
+    for page in pages:
+        variants = src.load_page_variants(page.pageId)
+        dst.replace_page_variants(page.pageId, variants)
+        variant_count += len(variants)
+    levels = list(src.iter_levels())
+    dst.save_levels(levels)
+    manifest = src.load_manifest()
+    dst.update_manifest(manifest)
+    return {
+        "pages": len(pages),
+        "variants": variant_count,
+        "levels": len(levels),
+        "manifest": len(manifest),
+    }
@@ -3,22 +3,31 @@
 Usage::
 
     python -m dust_ingest build --input urls.json --project calgaryhacks2026 --levels 10
+
+Or stage by stage, each reading from / writing to ``./cache``::
+
+    python -m dust_ingest scrape --input urls.json
+    python -m dust_ingest alter  --input urls.json --shard 0/2
+    python -m dust_ingest levels --input urls.json
+    python -m dust_ingest upload --input urls.json
 """
 
 from __future__ import annotations
 
 import argparse
+import contextlib
 import json
 import logging
 import os
 import sys
 from pathlib import Path
+from typing import Iterator
 
+from dust_ingest import cache, llm_usage, memprof, progress, tracing
 from dust_ingest.models import InputFile, PipelineConfig
 
 logger = logging.getLogger("dust_ingest")
 
-CACHE_DIR = Path("./cache")
 _ENV_FILE = Path(__file__).resolve().parent / ".env"
 
 
@@ -54,54 +63,94 @@ def _require_env(name: str, default: str | None = None) -> str:
     return val
 
 
-def _load_config() -> PipelineConfig:
-    """Build a PipelineConfig from environment variables."""
+def _stage_env(name: str, needed: bool) -> str:
+    """Read a credential that only some stages need."""
+    if needed:
+        return _require_env(name)
+    return os.environ.get(name, "")
+
+
+def _load_config(
+    *,
+    apify: bool = True,
+    llm: bool = True,
+    convex: bool = True,
+) -> PipelineConfig:
+    """Build a PipelineConfig from environment variables.
+
+    Credentials for stages that will not run (``apify`` / ``llm`` /
+    ``convex`` set to False) are optional.
+    """
     return PipelineConfig(
-        apify_token=_require_env("APIFY_TOKEN"),
+        apify_token=_stage_env("APIFY_TOKEN", apify),
         apify_actor_id=_require_env("APIFY_ACTOR_ID", "apify/website-content-crawler"),
         apify_fallback_actor_id=os.environ.get("APIFY_FALLBACK_ACTOR_ID"),
         apify_timeout_secs=int(_require_env("APIFY_TIMEOUT_SECS", "120")),
-        llm_api_key=_require_env("LLM_API_KEY"),
+        llm_api_key=_stage_env("LLM_API_KEY", llm),
         llm_base_url=_require_env("LLM_BASE_URL", "https://api.deepinfra.com/v1/openai"),
         llm_model=_require_env("LLM_MODEL", "meta-llama/Llama-3.3-70B-Instruct-Turbo"),
-        convex_url=_require_env("CONVEX_URL"),
+        llm_price_input=float(_require_env("LLM_PRICE_INPUT", "0")),
+        llm_price_output=float(_require_env("LLM_PRICE_OUTPUT", "0")),
+        llm_price_cached=(
+            float(os.environ["LLM_PRICE_CACHED"])
+            if os.environ.get("LLM_PRICE_CACHED") else None
+        ),
+        convex_url=_stage_env("CONVEX_URL", convex),
         concurrency=int(_require_env("CONCURRENCY", "40")),
         retries=int(_require_env("RETRIES", "2")),
+        upload_batch_records=int(_require_env("UPLOAD_BATCH_RECORDS", "100")),
+        upload_batch_bytes=int(_require_env("UPLOAD_BATCH_BYTES", "4000000")),
+        upload_concurrency=int(_require_env("UPLOAD_CONCURRENCY", "8")),
+        upload_max_retries=int(_require_env("UPLOAD_MAX_RETRIES", "4")),
+        upload_page_html=_require_env("UPLOAD_PAGE_HTML", "true").lower()
+        in ("1", "true", "yes"),
     )
 
 
-# ---------------------------------------------------------------------------
-# Local cache I/O
-# ---------------------------------------------------------------------------
+def _load_input(args: argparse.Namespace) -> tuple[list, str]:
+    """Read + validate the input file; return ``(url_entries, project_id)``."""
+    input_path = Path(args.input)
+    if not input_path.exists():
+        logger.error("Input file not found: %s", input_path)
+        sys.exit(1)
 
-def _save_page_cache(page) -> None:  # type: ignore[no-untyped-def]
-    """Write page snapshot + raw HTML to local cache."""
-    page_dir = CACHE_DIR / "pages" / page.pageId
-    page_dir.mkdir(parents=True, exist_ok=True)
-    (page_dir / "snapshot.json").write_text(
-        page.model_dump_json(indent=2), encoding="utf-8"
-    )
-    (page_dir / "raw.html").write_text(page.html, encoding="utf-8")
+    raw = json.loads(input_path.read_text(encoding="utf-8"))
+    inp = InputFile.model_validate(raw)
+    urls = inp.resolved_urls()
+    project_id = args.project or inp.projectId
+    logger.info("Loaded %d URLs for project '%s'", len(urls), project_id)
+    return urls, project_id
 
 
-def _save_level_cache(level) -> None:  # type: ignore[no-untyped-def]
-    """Write a level JSON to local cache."""
-    levels_dir = CACHE_DIR / "levels"
-    levels_dir.mkdir(parents=True, exist_ok=True)
-    fname = f"level_{level.difficulty:02d}.json"
-    (levels_dir / fname).write_text(
-        level.model_dump_json(indent=2), encoding="utf-8"
-    )
+def _cached_pages(urls: list) -> list:
+    """Load cached snapshots for *urls*, in input order, skipping misses."""
+    from dust_ingest.apify_scrape import _page_id
+
+    pages = []
+    for entry in urls:
+        page = cache.load_page(_page_id(entry.url))
+        if page is None:
+            logger.warning("No cached snapshot for %s — run `scrape` first", entry.url)
+            continue
+        pages.append(page)
+    return pages
 
 
 # ---------------------------------------------------------------------------
 # Build command
 # ---------------------------------------------------------------------------
 
+@contextlib.contextmanager
+def _stage(name: str) -> Iterator[None]:
+    """Time *name* as ``stage.<name>`` and profile its memory when enabled."""
+    with tracing.span(f"stage.{name}"), memprof.phase(name):
+        yield
+
+
 def _cmd_build(args: argparse.Namespace) -> None:
     """Execute the full build pipeline."""
     from dust_ingest.apify_scrape import scrape_urls
-    from dust_ingest.convex_upload import upload_levels, upload_pages, upload_variants
+    from dust_ingest.convex_upload import upload_all
     from dust_ingest.leveling import rebuild_levels_from_variants
     from dust_ingest.llm_alter import generate_variants
 
@@ -110,37 +159,47 @@ def _cmd_build(args: argparse.Namespace) -> None:
     logger.info("Pipeline config loaded (model=%s)", config.llm_model)
 
     # 2. Read + validate input
-    input_path = Path(args.input)
-    if not input_path.exists():
-        logger.error("Input file not found: %s", input_path)
-        sys.exit(1)
+    urls, project_id = _load_input(args)
 
-    raw = json.loads(input_path.read_text(encoding="utf-8"))
-    inp = InputFile.model_validate(raw)
-    urls = inp.resolved_urls()
-    project_id = args.project or inp.projectId
-    logger.info("Loaded %d URLs for project '%s'", len(urls), project_id)
+    if args.stream and args.incremental:
+        logger.error("--stream and --incremental cannot be combined; pick one")
+        sys.exit(1)
+    if args.lean and (args.stream or args.incremental):
+        logger.warning("--lean only applies to the default build mode; ignoring it")
+    if args.stream:
+        _run_streaming(args, config, urls, project_id)
+        return
+    if args.incremental:
+        _run_incremental(args, config, urls, project_id)
+        return
 
     # 3. Apify scrape
     logger.info("=== Phase 1: Scraping with Apify ===")
-    pages = scrape_urls(urls, config, project_id=project_id)
+    if args.lean:
+        # 4. Cache each batch right away; keep only lightweight handles.
+        pages = _scrape_spilled(urls, config, project_id, args.scrape_batch)
+    else:
+        with _stage("scrape"):
+            pages = scrape_urls(urls, config, project_id=project_id)
     logger.info("Scraped %d pages successfully", len(pages))
     if not pages:
         logger.error("No pages scraped — aborting")
         sys.exit(1)
 
     # 4. Cache pages locally
-    for p in pages:
-        _save_page_cache(p)
-    logger.info("Cached %d page snapshots to %s", len(pages), CACHE_DIR / "pages")
+    if not args.lean:
+        with _stage("cache"):
+            cache.save_pages(pages)
+    logger.info("Cached %d page snapshots to %s", len(pages), cache.CACHE_DIR / "pages")
 
     # 5. Generate variants via LLM
     num_levels = args.levels
     logger.info("=== Phase 2: Generating altered variants (LLM) ===")
-    variants, level_variants = generate_variants(
-        pages, config, project_id,
-        num_levels=num_levels, max_workers=config.concurrency,
-    )
+    with _stage("alter"):
+        variants, level_variants = generate_variants(
+            pages, config, project_id,
+            num_levels=num_levels, max_workers=config.concurrency,
+        )
     logger.info(
         "Generated %d valid variants for %d pages (%d level-assigned, %d unassigned)",
         len(variants),
@@ -151,33 +210,571 @@ def _cmd_build(args: argparse.Namespace) -> None:
 
     # 6. Build levels from successful variants
     logger.info("=== Phase 3: Building levels from successful variants ===")
-    levels = rebuild_levels_from_variants(level_variants, project_id, num_levels)
-    for lv in levels:
-        _save_level_cache(lv)
+    with _stage("levels"):
+        levels = rebuild_levels_from_variants(level_variants, project_id, num_levels)
+    with _stage("cache"):
+        cache.save_levels(levels)
     logger.info("Built %d levels from %d level-assigned variants",
                 len(levels), len(level_variants))
 
     # 7. Cache variants locally
-    variants_dir = CACHE_DIR / "variants"
-    variants_dir.mkdir(parents=True, exist_ok=True)
-    for v in variants:
-        (variants_dir / f"{v.variantId}.json").write_text(
-            v.model_dump_json(indent=2), encoding="utf-8"
-        )
+    with _stage("cache"):
+        cache.record_variants(pages, variants)
+        if not args.lean:
+            cache.record_pages(pages)
 
     # 8. Upload to Convex
     logger.info("=== Phase 4: Uploading to Convex ===")
-    pg_ok = upload_pages(pages, config)
-    lv_ok = upload_levels(levels, config)
-    vr_ok = upload_variants(variants, config)
+    with _stage("upload"):
+        report = upload_all(pages, levels, variants, config, force=args.force)
     logger.info(
         "Convex upload: %d/%d pages, %d/%d levels, %d/%d variants",
-        pg_ok, len(pages), lv_ok, len(levels), vr_ok, len(variants),
+        report.pages.done, len(pages), report.levels.done, len(levels),
+        report.variants.done, len(variants),
+    )
+
+    logger.info("✅ Pipeline complete! %d pages, %d levels, %d variants "
+                "(cached to %s, uploaded to Convex)",
+                len(pages), len(levels), len(variants), cache.CACHE_DIR)
+
+
+def _scrape_spilled(urls, config, project_id, batch_size) -> list:  # type: ignore[no-untyped-def]
+    """Scrape in batches, caching each batch and keeping only page handles."""
+    from dust_ingest.apify_scrape import iter_scrape_batches
+
+    handles: list[cache.PageHandle] = []
+    with _stage("scrape"):
+        for batch in iter_scrape_batches(
+            urls, config, project_id=project_id, batch_size=batch_size,
+        ):
+            with _stage("cache"):
+                cache.record_pages(batch)
+                handles.extend(cache.spill_pages(batch))
+    return handles
+
+
+def _run_streaming(args, config, urls, project_id) -> None:  # type: ignore[no-untyped-def]
+    """Run the build with scrape, alteration and upload overlapping."""
+    from dust_ingest.pipeline import run_streaming_build
+
+    logger.info("=== Streaming build: scrape → alter → upload ===")
+    result = run_streaming_build(
+        urls, config, project_id,
+        num_levels=args.levels,
+        max_workers=config.concurrency,
+        scrape_batch_size=args.scrape_batch,
+        queue_size=args.queue_size,
+        on_page=cache.save_page,
+        force_upload=args.force,
     )
+    if not result.pages:
+        logger.error("No pages scraped — aborting")
+        sys.exit(1)
+    cache.save_levels(result.levels)
+    cache.record_variants(result.pages, result.variants)
+    cache.record_pages(result.pages)
 
+    logger.info(
+        "Convex upload: %d/%d pages, %d/%d levels, %d/%d variants",
+        result.pages_uploaded, len(result.pages),
+        result.levels_uploaded, len(result.levels),
+        result.variants_uploaded, len(result.variants),
+    )
     logger.info("✅ Pipeline complete! %d pages, %d levels, %d variants "
                 "(cached to %s, uploaded to Convex)",
-                len(pages), len(levels), len(variants), CACHE_DIR)
+                len(result.pages), len(result.levels), len(result.variants),
+                cache.CACHE_DIR)
+
+
+def _run_incremental(args, config, urls, project_id) -> None:  # type: ignore[no-untyped-def]
+    """Rebuild only new or changed URLs against the local cache."""
+    from dust_ingest.incremental import run_incremental_build
+
+    logger.info("=== Incremental build (ttl=%.1fh) ===", args.ttl_hours)
+    result = run_incremental_build(
+        urls, config, project_id,
+        num_levels=args.levels,
+        max_workers=config.concurrency,
+        ttl_hours=args.ttl_hours,
+        force_upload=args.force,
+    )
+    if not result.pages:
+        logger.error("No pages scraped or cached — aborting")
+        sys.exit(1)
+
+    logger.info(
+        "Incremental: scraped %d, altered %d of %d pages",
+        result.scraped, result.altered, len(result.pages),
+    )
+    logger.info(
+        "Convex upload: %d/%d pages, %d/%d levels, %d/%d variants changed",
+        result.pages_uploaded, result.pages_to_upload,
+        result.levels_uploaded, result.levels_to_upload,
+        result.variants_uploaded, result.variants_to_upload,
+    )
+    logger.info("✅ Pipeline complete! %d pages, %d levels, %d variants "
+                "(cached to %s)",
+                len(result.pages), len(result.levels), len(result.variants),
+                cache.CACHE_DIR)
+
+
+# ---------------------------------------------------------------------------
+# Stage commands (each reads from / writes to the local cache)
+# ---------------------------------------------------------------------------
+
+def _cmd_scrape(args: argparse.Namespace) -> None:
+    """Scrape URLs with Apify and cache the snapshots."""
+    from dust_ingest.apify_scrape import scrape_urls
+
+    config = _load_config(llm=False, convex=False)
+    urls, project_id = _load_input(args)
+
+    with memprof.phase("scrape"):
+        pages = scrape_urls(urls, config, project_id=project_id)
+    if not pages:
+        logger.error("No pages scraped — aborting")
+        sys.exit(1)
+    with memprof.phase("cache"):
+        cache.save_pages(pages)
+        cache.record_pages(pages)
+    logger.info("Cached %d page snapshots to %s", len(pages), cache.CACHE_DIR / "pages")
+
+
+def _parse_shard(spec: str) -> tuple[int, int]:
+    """Parse ``"i/n"`` into ``(i, n)`` with ``0 <= i < n``."""
+    index, _, total = spec.partition("/")
+    try:
+        i, n = int(index), int(total)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard {spec!r} (expected i/n)")
+    if n < 1 or not 0 <= i < n:
+        raise argparse.ArgumentTypeError(f"invalid shard {spec!r} (need 0 <= i < n)")
+    return i, n
+
+
+def _cmd_alter(args: argparse.Namespace) -> None:
+    """Generate variants for cached pages (optionally one shard of them)."""
+    from dust_ingest.llm_alter import generate_variants
+
+    config = _load_config(apify=False, convex=False)
+    urls, project_id = _load_input(args)
+    with memprof.phase("load"):
+        pages = _cached_pages(urls)
+
+    if args.shard:
+        i, n = args.shard
+        # Hash-based sharding keeps a page on the same worker across runs.
+        pages = [p for p in pages if int(p.pageId, 16) % n == i]
+        logger.info("Shard %d/%d: %d pages", i, n, len(pages))
+    if not pages:
+        logger.error("No cached pages to alter — aborting")
+        sys.exit(1)
+
+    with memprof.phase("alter"):
+        variants, _ = generate_variants(
+            pages, config, project_id,
+            num_levels=args.levels, max_workers=config.concurrency,
+        )
+    with memprof.phase("cache"):
+        cache.record_variants(pages, variants)
+    logger.info(
+        "Cached %d variants for %d pages (run `levels` to place them)",
+        len(variants), len(pages),
+    )
+
+
+def _cmd_levels(args: argparse.Namespace) -> None:
+    """Re-derive level placement and level definitions from cached variants."""
+    from dust_ingest.apify_scrape import _page_id
+    from dust_ingest.leveling import rebuild_levels_from_variants
+    from dust_ingest.llm_alter import assign_level
+
+    urls, project_id = _load_input(args)
+    variants = []
+    for entry in urls:
+        variants.extend(cache.load_page_variants(_page_id(entry.url)))
+
+    level_counts: dict[int, int] = {}
+    level_variants = []
+    for v in variants:
+        if assign_level(v, level_counts, project_id, args.levels):
+            level_variants.append(v)
+    cache.save_variants(variants)
+
+    levels = rebuild_levels_from_variants(level_variants, project_id, args.levels)
+    cache.save_levels(levels)
+    logger.info(
+        "Built %d levels from %d level-assigned variants (%d cached variants)",
+        len(levels), len(level_variants), len(variants),
+    )
+
+
+def _cached_upload_set(args: argparse.Namespace) -> tuple[list, list, list]:
+    """Load the cached ``(pages, levels, variants)`` for ``args.input``."""
+    from dust_ingest.apify_scrape import _page_id
+
+    urls, project_id = _load_input(args)
+    pages = _cached_pages(urls)
+
+    variants = []
+    for entry in urls:
+        for v in cache.load_page_variants(_page_id(entry.url)):
+            if not v.levelId:
+                logger.warning(
+                    "Variant %s has no level — run `levels` first", v.variantId,
+                )
+                continue
+            variants.append(v)
+
+    levels = []
+    for difficulty in range(1, args.levels + 1):
+        lv = cache.load_level(difficulty, project_id)
+        if lv is not None:
+            levels.append(lv)
+    return pages, levels, variants
+
+
+def _cmd_upload(args: argparse.Namespace) -> None:
+    """Upload cached pages, levels and variants to Convex."""
+    from dust_ingest.convex_upload import replay_failed, upload_all
+
+    config = _load_config(apify=False, llm=False)
+    if args.replay_failed:
+        report = replay_failed(config)
+        logger.info(
+            "Replayed dead-lettered records: %d/%d pages, %d/%d levels, %d/%d variants",
+            report.pages.ok, report.pages.records,
+            report.levels.ok, report.levels.records,
+            report.variants.ok, report.variants.records,
+        )
+        return
+    if not args.input:
+        logger.error("upload: --input is required unless --replay-failed is given")
+        sys.exit(1)
+    pages, levels, variants = _cached_upload_set(args)
+
+    report = upload_all(pages, levels, variants, config, force=args.force)
+    logger.info(
+        "Convex upload: %d/%d pages, %d/%d levels, %d/%d variants",
+        report.pages.done, len(pages), report.levels.done, len(levels),
+        report.variants.done, len(variants),
+    )
+
+
+def _cmd_cache(args: argparse.Namespace) -> None:
+    """Convert between cache backends, collect blobs or print statistics."""
+    # Opening the SQLite store creates cache.db, so only do it when the
+    # action needs one.
+    db_path = cache.CACHE_DIR / "cache.db"
+    if args.action == "import":
+        db_store = cache.open_store("sqlite")
+        counts = cache.copy_store(cache.open_store("dir"), db_store)
+        logger.info("Imported %s from %s into %s", counts, cache.CACHE_DIR, db_store.path)
+    elif args.action == "export":
+        if not db_path.is_file():
+            logger.error("No SQLite cache at %s to export", db_path)
+            sys.exit(1)
+        db_store = cache.open_store("sqlite")
+        counts = cache.copy_store(db_store, cache.open_store("dir"))
+        logger.info("Exported %s from %s into %s", counts, db_store.path, cache.CACHE_DIR)
+    elif args.action == "gc":
+        removed, freed = cache.gc_blobs()
+        logger.info("Removed %d unreferenced blobs (%.1f KB)", removed, freed / 1024)
+    elif not db_path.is_file():
+        logger.info("No SQLite cache at %s", db_path)
+    else:
+        db_store = cache.open_store("sqlite")
+        logger.info("SQLite cache %s: %s", db_store.path, db_store.stats())
+
+
+# ---------------------------------------------------------------------------
+# Upload benchmarking (local Convex stand-in)
+# ---------------------------------------------------------------------------
+
+def _int_list(spec: str) -> list[int]:
+    """Parse ``"1,10,100"`` into ``[1, 10, 100]``."""
+    try:
+        return [int(part) for part in spec.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {spec!r}")
+
+
+def _budget_options(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--max-tokens-total", type=int, default=None, metavar="N",
+        help="Stop starting LLM calls once prompt + completion tokens reach N",
+    )
+    p.add_argument(
+        "--max-cost", type=float, default=None, metavar="USD",
+        help="Stop starting LLM calls once spend reaches USD (needs LLM_PRICE_*)",
+    )
+
+
+def _progress_options(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--progress", action="store_true",
+        help="Print a live status line (throughput, queues, ETA) to stderr",
+    )
+    p.add_argument(
+        "--progress-port", type=int, default=None, metavar="PORT",
+        help="Serve live status on 127.0.0.1:PORT (/metrics for Prometheus, /status JSON)",
+    )
+
+
+def _profile_options(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--profile-memory", default=None, metavar="PATH",
+        help="Trace allocations (slow) and write per-stage peak/retained memory, "
+             "top allocation sites and stage-to-stage diffs to this JSON file",
+    )
+
+
+def _mock_options(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--latency-ms", type=float, default=20.0, help="Per-request latency")
+    p.add_argument("--jitter-ms", type=float, default=5.0, help="Latency jitter (±)")
+    p.add_argument("--error-rate", type=float, default=0.0,
+                   help="Fraction of requests answered with HTTP 500")
+    p.add_argument("--rate-limit", type=float, default=None,
+                   help="Requests/second before answering HTTP 429")
+
+
+def _cmd_mock_convex(args: argparse.Namespace) -> None:
+    """Serve the mock Convex mutation endpoint until interrupted."""
+    from dust_ingest.mock_convex import MockConvex
+
+    server = MockConvex(
+        args.host, args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, rate_limit=args.rate_limit,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        logger.info("Mock Convex received: %s", server.stats.snapshot())
+
+
+def _cmd_upload_bench(args: argparse.Namespace) -> None:
+    """Benchmark the uploader against the mock Convex server."""
+    from dust_ingest.upload_bench import format_table, run_upload_bench, synthetic_records
+
+    if args.input:
+        pages, levels, variants = _cached_upload_set(args)
+    else:
+        pages, levels, variants = synthetic_records(args.pages, num_levels=args.levels)
+    logger.info(
+        "Benchmarking upload of %d pages, %d levels, %d variants",
+        len(pages), len(levels), len(variants),
+    )
+    rows = run_upload_bench(
+        pages, levels, variants,
+        batch_sizes=args.batch_sizes,
+        concurrencies=args.concurrency,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, rate_limit=args.rate_limit,
+        page_html=not args.no_html,
+    )
+    print(format_table(rows))
+
+
+def _mock_llm_options(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--latency-ms", type=float, default=800.0,
+                   help="Median per-request latency")
+    p.add_argument("--latency-sigma", type=float, default=0.4,
+                   help="Log-normal latency spread (0 = fixed latency)")
+    p.add_argument("--ms-per-element", type=float, default=0.0,
+                   help="Extra latency per returned element (generation time)")
+    p.add_argument("--malformed-rate", type=float, default=0.0,
+                   help="Fraction of responses with unparsable JSON")
+    p.add_argument("--no-fake-marks-rate", type=float, default=0.0,
+                   help="Fraction of responses with an empty fakeMarks list")
+    p.add_argument("--rate-limit", type=float, default=None,
+                   help="Requests/second before answering HTTP 429")
+    p.add_argument("--burst-every", type=float, default=None, metavar="SECS",
+                   help="Answer everything with 429 for --burst-seconds every SECS")
+    p.add_argument("--burst-seconds", type=float, default=5.0)
+
+
+def _mock_llm_kwargs(args: argparse.Namespace) -> dict:
+    return {
+        "latency_ms": args.latency_ms,
+        "latency_sigma": args.latency_sigma,
+        "ms_per_element": args.ms_per_element,
+        "malformed_rate": args.malformed_rate,
+        "no_fake_marks_rate": args.no_fake_marks_rate,
+        "rate_limit": args.rate_limit,
+        "burst_every_s": args.burst_every,
+        "burst_s": args.burst_seconds,
+    }
+
+
+def _cmd_mock_llm(args: argparse.Namespace) -> None:
+    """Serve the mock OpenAI-compatible LLM endpoint until interrupted."""
+    from dust_ingest.mock_llm import MockLLM
+
+    server = MockLLM(args.host, args.port, **_mock_llm_kwargs(args))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        logger.info("Mock LLM served: %s", server.stats.snapshot())
+
+
+def _cmd_llm_bench(args: argparse.Namespace) -> None:
+    """Load-test Phase 2 (generate_variants) against the mock LLM server."""
+    from dust_ingest.llm_bench import format_table, run_load_grid
+
+    rows = run_load_grid(
+        worker_counts=args.workers,
+        page_counts=args.pages,
+        server_options=_mock_llm_kwargs(args),
+        num_levels=args.levels,
+        trace_memory=args.trace_memory,
+    )
+    print(format_table(rows))
+
+
+def _cmd_synth(args: argparse.Namespace) -> None:
+    """Generate a synthetic corpus, or run the scaling benchmark over one."""
+    from dust_ingest import synth
+
+    spec = synth.SynthSpec(
+        pages=args.pages, paragraphs=args.paragraphs, sentences=args.sentences,
+        nesting=args.nesting, image_rate=args.image_rate, list_rate=args.list_rate,
+        duplicate_rate=args.duplicate_rate, repeat_rate=args.repeat_rate,
+        empty_rate=args.empty_rate, seed=args.seed,
+    )
+    if args.scale:
+        stages = tuple(args.stages.split(","))
+        unknown = set(stages) - set(synth.STAGES)
+        if unknown:
+            logger.error("Unknown stage(s) %s (choose from %s)", sorted(unknown), synth.STAGES)
+            sys.exit(1)
+        rows = synth.run_scaling(
+            args.scale, spec, stages=stages, workers=args.workers,
+            num_levels=args.levels, trace_memory=args.trace_memory,
+        )
+        print(synth.format_table(rows))
+        return
+    if not args.out and not args.to_cache:
+        logger.error("Nothing to do: pass --out DIR, --to-cache and/or --scale N,N,...")
+        sys.exit(1)
+
+    if args.out:
+        items = synth.write_corpus(spec, args.out, project_id=args.project)
+        logger.info("Wrote %d crawler items and urls.json to %s", len(items), args.out)
+    if args.to_cache:
+        pages = synth.synth_snapshots(spec, project_id=args.project)
+        cache.save_pages(pages)
+        cache.record_pages(pages)
+        logger.info("Cached %d synthetic pages for project '%s'", len(pages), args.project)
+
+
+def _cmd_bench(args: argparse.Namespace) -> None:
+    """Micro-benchmark the HTML hot paths and compare against a baseline."""
+    from dust_ingest import html_bench
+
+    baseline_path = Path(args.baseline) if args.baseline else cache.CACHE_DIR / html_bench.BASELINE_FILE
+    corpus = html_bench.load_fixtures(args.fixtures)
+    logger.info(
+        "Benchmarking %d fixtures (%.0f KB)",
+        len(corpus), sum(len(h.encode("utf-8")) for h in corpus.values()) / 1024,
+    )
+    results = html_bench.run_bench(corpus, repeat=args.repeat, only=args.only)
+    baseline = None if args.save_baseline else html_bench.load_baseline(baseline_path)
+    if args.save_baseline:
+        print(html_bench.format_table(results))
+        html_bench.save_baseline(baseline_path, results)
+        logger.info("Saved baseline to %s", baseline_path)
+        return
+    if baseline is None:
+        print(html_bench.format_table(results))
+        logger.info("No baseline at %s; run with --save-baseline to create one", baseline_path)
+        return
+    regressions = html_bench.recheck(
+        corpus, results, baseline, args.threshold, repeat=args.repeat,
+    )
+    print(html_bench.format_table(results, baseline))
+    if regressions:
+        for line in regressions:
+            logger.error("Regression: %s", line)
+        sys.exit(1)
+    logger.info("No regressions beyond %.0f%% against %s", args.threshold * 100, baseline_path)
+
+
+def _cmd_serialize_bench(args: argparse.Namespace) -> None:
+    """Compare per-record and batch serialization of cache/upload records."""
+    from dust_ingest import serialize_bench
+
+    rows = serialize_bench.run_bench(args.records, repeat=args.repeat)
+    print(serialize_bench.format_table(rows))
+
+
+def _cmd_profile(args: argparse.Namespace) -> None:
+    """Profile one compute stage over cached pages and variants (offline)."""
+    from dust_ingest import profiling
+
+    if args.input:
+        urls, project_id = _load_input(args)
+        pages = _cached_pages(urls)
+    else:
+        project_id = args.project
+        pages = list(cache.iter_pages(project_id=project_id))
+    if args.limit:
+        pages = pages[:args.limit]
+    if not pages:
+        logger.error("No cached pages to profile — run `scrape` or `synth --to-cache` first")
+        sys.exit(1)
+    page_ids = {p.pageId for p in pages}
+    variants = [
+        v for v in cache.iter_variants(project_id=project_id) if v.pageId in page_ids
+    ]
+    logger.info("Profiling %s over %d cached pages, %d variants",
+                args.stage, len(pages), len(variants))
+
+    out_dir = Path(args.out) if args.out else cache.CACHE_DIR / "profile"
+    path, rows = profiling.profile_stage(
+        args.stage, pages, variants,
+        out_dir=out_dir, profiler=args.profiler, repeat=args.repeat,
+        top=args.top, sort=args.sort, interval=args.interval_ms / 1000,
+        num_levels=args.levels,
+    )
+    print(profiling.format_table(rows))
+    logger.info("Wrote %s", path)
+
+
+def _cmd_validate(args: argparse.Namespace) -> None:
+    """Re-validate every cached variant and report failures."""
+    from dust_ingest import variant_audit
+
+    variants = cache.iter_variants(project_id=args.project)
+    if args.input:
+        from dust_ingest.apify_scrape import _page_id
+
+        urls, _ = _load_input(args)
+        page_ids = {_page_id(entry.url) for entry in urls}
+        variants = (v for v in variants if v.pageId in page_ids)
+
+    report = variant_audit.audit_variants(variants, workers=args.workers)
+    print(variant_audit.format_table(report))
+    data = report.to_dict()
+    if args.repair:
+        variant_audit.save_repairs(report)
+    if args.quarantine:
+        data["quarantined"] = variant_audit.quarantine(report.failures)
+        if data["quarantined"]:
+            logger.info("Run `levels` to rebuild levels without the quarantined variants")
+    out = Path(args.out) if args.out else cache.CACHE_DIR / "validation_report.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    logger.info(
+        "Validated %d variants in %.2fs: %d invalid, %d repaired; report written to %s",
+        report.variants, report.seconds, report.invalid, len(report.repaired), out,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -192,6 +789,8 @@ def main() -> None:
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
+    # httpx logs every request at INFO; uploads make thousands of them.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
 
     parser = argparse.ArgumentParser(
         prog="dust_ingest",
@@ -203,14 +802,277 @@ def main() -> None:
     build_p.add_argument("--input", required=True, help="Path to urls.json")
     build_p.add_argument("--project", default=None, help="Project ID override")
     build_p.add_argument("--levels", type=int, default=10, help="Number of levels")
+    build_p.add_argument(
+        "--stream", action="store_true",
+        help="Overlap scrape, LLM and upload stages via bounded queues",
+    )
+    build_p.add_argument(
+        "--scrape-batch", type=int, default=10,
+        help="URLs per Apify run in --stream and --lean mode",
+    )
+    build_p.add_argument(
+        "--queue-size", type=int, default=64,
+        help="Capacity of the inter-stage queues in --stream mode",
+    )
+    build_p.add_argument(
+        "--lean", action="store_true",
+        help="Keep memory per page small: cache each scrape batch, drop its HTML "
+             "and hold compact element tuples between stages",
+    )
+    build_p.add_argument(
+        "--incremental", action="store_true",
+        help="Only scrape, alter and upload new or changed URLs",
+    )
+    build_p.add_argument(
+        "--ttl-hours", type=float, default=24.0,
+        help="Skip re-scraping cached pages younger than this (--incremental)",
+    )
+    _budget_options(build_p)
+    build_p.add_argument(
+        "--metrics-out", default=None, metavar="PATH",
+        help="Write per-stage/per-page timings and counters to this JSON file",
+    )
+    _progress_options(build_p)
+    _profile_options(build_p)
+    build_p.add_argument(
+        "--force", action="store_true",
+        help="Upload every record, even those the upload ledger marks unchanged",
+    )
+
+    def add_stage_parser(
+        name: str, help_text: str, input_required: bool = True,
+    ) -> argparse.ArgumentParser:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--input", required=input_required, help="Path to urls.json")
+        p.add_argument("--project", default=None, help="Project ID override")
+        p.add_argument("--levels", type=int, default=10, help="Number of levels")
+        p.add_argument(
+            "--metrics-out", default=None, metavar="PATH",
+            help="Write per-stage/per-page timings and counters to this JSON file",
+        )
+        _progress_options(p)
+        _profile_options(p)
+        return p
+
+    add_stage_parser("scrape", "Scrape URLs into the local cache (APIFY_TOKEN)")
+    alter_p = add_stage_parser("alter", "Generate variants for cached pages (LLM_API_KEY)")
+    alter_p.add_argument(
+        "--shard", type=_parse_shard, default=None,
+        help="Only alter shard i of n pages, e.g. 0/4",
+    )
+    _budget_options(alter_p)
+    add_stage_parser("levels", "Rebuild levels from cached variants (no credentials)")
+    upload_p = add_stage_parser(
+        "upload", "Upload cached pages, levels, variants (CONVEX_URL)",
+        input_required=False,
+    )
+    upload_p.add_argument(
+        "--force", action="store_true",
+        help="Upload every record, even those the upload ledger marks unchanged",
+    )
+    upload_p.add_argument(
+        "--replay-failed", action="store_true",
+        help="Only re-send records from the dead-letter queue (cache/dead_letter.jsonl)",
+    )
+
+    cache_p = sub.add_parser("cache", help="Manage the local cache")
+    cache_p.add_argument(
+        "action", choices=["import", "export", "stats", "gc"],
+        help="import: directory → cache.db, export: cache.db → directory, "
+             "stats: row counts in cache.db, gc: delete unreferenced blobs",
+    )
+
+    mock_p = sub.add_parser("mock-convex", help="Serve a local Convex mutation stand-in")
+    mock_p.add_argument("--host", default="127.0.0.1")
+    mock_p.add_argument("--port", type=int, default=3210)
+    _mock_options(mock_p)
+
+    bench_p = add_stage_parser(
+        "upload-bench", "Benchmark uploads against the local Convex stand-in",
+        input_required=False,
+    )
+    bench_p.add_argument("--pages", type=int, default=500,
+                         help="Synthetic pages to upload when --input is not given")
+    bench_p.add_argument("--batch-sizes", type=_int_list, default=[1, 25, 100],
+                         help="Comma-separated UPLOAD_BATCH_RECORDS values to try")
+    bench_p.add_argument("--concurrency", type=_int_list, default=[1, 8, 32],
+                         help="Comma-separated UPLOAD_CONCURRENCY values to try")
+    bench_p.add_argument("--no-html", action="store_true",
+                         help="Benchmark with UPLOAD_PAGE_HTML=false")
+    _mock_options(bench_p)
+
+    mock_llm_p = sub.add_parser("mock-llm", help="Serve a local OpenAI-compatible LLM stand-in")
+    mock_llm_p.add_argument("--host", default="127.0.0.1")
+    mock_llm_p.add_argument("--port", type=int, default=8400)
+    _mock_llm_options(mock_llm_p)
 
+    llm_bench_p = sub.add_parser(
+        "llm-bench", help="Load-test variant generation against the local LLM stand-in",
+    )
+    llm_bench_p.add_argument("--workers", type=_int_list, default=[10, 40, 200],
+                             help="Comma-separated worker counts to try")
+    llm_bench_p.add_argument("--pages", type=_int_list, default=[200],
+                             help="Comma-separated synthetic page counts to try")
+    llm_bench_p.add_argument("--levels", type=int, default=10, help="Number of levels")
+    llm_bench_p.add_argument("--trace-memory", action="store_true",
+                             help="Also report peak Python heap (tracemalloc; slower)")
+    _mock_llm_options(llm_bench_p)
+
+    synth_p = sub.add_parser(
+        "synth", help="Generate a synthetic corpus or run the scaling benchmark",
+    )
+    synth_p.add_argument("--pages", type=int, default=1000, help="Crawler items to generate")
+    synth_p.add_argument("--paragraphs", type=int, default=20, help="Mean paragraphs per page")
+    synth_p.add_argument("--sentences", type=int, default=4, help="Mean sentences per paragraph")
+    synth_p.add_argument("--nesting", type=int, default=6, help="Wrapper <div> depth")
+    synth_p.add_argument("--image-rate", type=float, default=0.15,
+                         help="Chance of an image after each paragraph")
+    synth_p.add_argument("--list-rate", type=float, default=0.1,
+                         help="Chance of a list after each paragraph")
+    synth_p.add_argument("--duplicate-rate", type=float, default=0.05,
+                         help="Fraction of pages repeating earlier HTML under a new URL")
+    synth_p.add_argument("--repeat-rate", type=float, default=0.01,
+                         help="Fraction of items the crawler returns twice")
+    synth_p.add_argument("--empty-rate", type=float, default=0.01,
+                         help="Fraction of items without usable HTML")
+    synth_p.add_argument("--seed", type=int, default=0)
+    synth_p.add_argument("--project", default="synth", help="Project ID for the corpus")
+    synth_p.add_argument("--out", default=None, metavar="DIR",
+                         help="Write items.jsonl and a urls.json input file to DIR")
+    synth_p.add_argument("--to-cache", action="store_true",
+                         help="Convert the items and save the snapshots to the local cache")
+    synth_p.add_argument("--scale", type=_int_list, default=None, metavar="N,N,...",
+                         help="Run the scaling benchmark at these page counts instead")
+    synth_p.add_argument("--stages", default="convert,alter,levels,cache",
+                         help="Stages to measure with --scale")
+    synth_p.add_argument("--workers", type=int, default=40,
+                         help="LLM workers for the alter stage (mock, zero latency)")
+    synth_p.add_argument("--levels", type=int, default=10, help="Number of levels")
+    synth_p.add_argument("--trace-memory", action="store_true",
+                         help="Exact Python heap peaks via tracemalloc (much slower)")
+
+    hb_p = sub.add_parser("bench", help="Micro-benchmark the HTML hot paths")
+    hb_p.add_argument("--fixtures", default=None, metavar="DIR",
+                      help="Also benchmark every *.html file in DIR")
+    hb_p.add_argument("--repeat", type=int, default=5,
+                      help="Minimum timed runs per case")
+    hb_p.add_argument("--only", default=None, metavar="NAME",
+                      help="Only run cases whose function name contains NAME")
+    hb_p.add_argument("--baseline", default=None, metavar="PATH",
+                      help="Baseline file (default: cache/bench_baseline.json)")
+    hb_p.add_argument("--save-baseline", action="store_true",
+                      help="Store this run as the baseline instead of comparing")
+    hb_p.add_argument("--threshold", type=float, default=0.25,
+                      help="Fail when stable time or peak allocation grows by more "
+                           "than this fraction (default 0.25)")
+
+    ser_p = sub.add_parser(
+        "serialize-bench", help="Benchmark batch vs per-record JSON serialization",
+    )
+    ser_p.add_argument("--records", type=int, default=20000,
+                       help="Synthetic pages and variants to encode")
+    ser_p.add_argument("--repeat", type=int, default=3, help="Runs per job (best is kept)")
+
+    prof_p = sub.add_parser(
+        "profile", help="CPU-profile one stage over cached data (no network)",
+    )
+    prof_p.add_argument("stage", choices=["sanitize", "parse", "validate", "levels"],
+                        help="Stage to replay")
+    prof_p.add_argument("--input", default=None,
+                        help="Only pages for the URLs in this urls.json (default: all cached)")
+    prof_p.add_argument("--project", default=None, help="Only pages of this project")
+    prof_p.add_argument("--levels", type=int, default=10, help="Number of levels")
+    prof_p.add_argument("--limit", type=int, default=None, metavar="N",
+                        help="Profile at most N pages")
+    prof_p.add_argument("--repeat", type=int, default=1,
+                        help="Replay the stage this many times (more samples)")
+    prof_p.add_argument("--profiler", choices=["cprofile", "sample"], default="cprofile",
+                        help="cprofile: exact, writes .pstats; sample: low overhead, "
+                             "writes collapsed stacks for flame graphs")
+    prof_p.add_argument("--interval-ms", type=float, default=1.0,
+                        help="Sampling interval for --profiler sample")
+    prof_p.add_argument("--top", type=int, default=25, help="Hot functions to print")
+    prof_p.add_argument("--sort", choices=["tottime", "cumulative"], default="tottime",
+                        help="Order of the cProfile summary")
+    prof_p.add_argument("--out", default=None, metavar="DIR",
+                        help="Output directory (default: cache/profile)")
+
+    val_p = sub.add_parser(
+        "validate", help="Re-validate cached variants and report failures (no network)",
+    )
+    val_p.add_argument("--input", default=None,
+                       help="Only variants of the URLs in this urls.json (default: all cached)")
+    val_p.add_argument("--project", default=None, help="Only variants of this project")
+    val_p.add_argument("--workers", type=int, default=None,
+                       help="Validation processes (default: one per CPU)")
+    val_p.add_argument("--quarantine", action="store_true",
+                       help="Move failing variants to cache/quarantine.jsonl and out "
+                            "of the upload set")
+    val_p.add_argument("--repair", action="store_true",
+                       help="Save fakeMarks whose elementId was corrected back to the cache")
+    val_p.add_argument("--out", default=None, metavar="PATH",
+                       help="Report file (default: cache/validation_report.json)")
+
+    commands = {
+        "build": _cmd_build,
+        "scrape": _cmd_scrape,
+        "alter": _cmd_alter,
+        "levels": _cmd_levels,
+        "upload": _cmd_upload,
+        "cache": _cmd_cache,
+        "mock-convex": _cmd_mock_convex,
+        "upload-bench": _cmd_upload_bench,
+        "bench": _cmd_bench,
+        "synth": _cmd_synth,
+        "mock-llm": _cmd_mock_llm,
+        "llm-bench": _cmd_llm_bench,
+        "profile": _cmd_profile,
+        "serialize-bench": _cmd_serialize_bench,
+        "validate": _cmd_validate,
+    }
     args = parser.parse_args()
-    if args.command == "build":
-        _cmd_build(args)
-    else:
+    handler = commands.get(args.command)
+    if handler is None:
         parser.print_help()
         sys.exit(1)
 
+    llm_usage.reset(
+        max_tokens=getattr(args, "max_tokens_total", None),
+        max_cost=getattr(args, "max_cost", None),
+    )
+    metrics_out = getattr(args, "metrics_out", None)
+    show_progress = getattr(args, "progress", False)
+    progress_port = getattr(args, "progress_port", None)
+    # In-flight, retry and error figures in the live view come from tracing.
+    if metrics_out or show_progress or progress_port is not None:
+        tracing.enable()
+    profile_memory = getattr(args, "profile_memory", None)
+    if profile_memory:
+        memprof.enable()
+    progress.reset()
+    reporter = None
+    if show_progress or progress_port is not None:
+        reporter = progress.Reporter(port=progress_port, terminal=show_progress).start()
+    try:
+        with tracing.span(args.command), memprof.phase(args.command):
+            handler(args)
+    finally:
+        if reporter is not None:
+            reporter.stop()
+        llm_usage.log_summary()
+        if metrics_out:
+            report = tracing.write_report(
+                metrics_out, extra={"llmUsage": llm_usage.summary()},
+            )
+            logger.info(
+                "Wrote run metrics (%d span types, %.1fs) to %s",
+                len(report["spans"]), report["wallSeconds"], metrics_out,
+            )
+        if profile_memory:
+            memprof.write_report(profile_memory)
+            memprof.disable()
+            logger.info("Wrote memory profile to %s", profile_memory)
+
 
 if __name__ == "__main__":
     main()
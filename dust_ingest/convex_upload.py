@@ -1,98 +1,491 @@
 """Upload pipeline data to a Convex deployment via the HTTP API.
 
-Uses only ``urllib.request`` from the standard library â€” no extra
-dependencies required.  Targets the public mutation endpoints that
-already exist in the Convex backend (``pages:upsert``,
-``levels:upsert``, ``pageVariants:insert``).
+Requests go through one shared, pooled ``httpx`` client (keep-alive, and
+HTTP/2 when the optional ``h2`` package is installed) with up to
+``upload_concurrency`` mutations in flight.  Records are grouped into
+size-bounded batches and sent through the bulk mutations
+(``pages:upsertMany``, ``levels:upsertMany``, ``pageVariants:upsertMany``);
+a rejected batch is split in half and retried until the offending record is
+isolated.  With ``upload_batch_records=1`` the single-record mutations
+(``pages:upsert``, ``levels:upsert``, ``pageVariants:upsert``) are used
+instead.
+
+Every mutation is an idempotent upsert, and records whose content hash the
+:mod:`~dust_ingest.upload_ledger` says the deployment already holds are not
+sent at all unless ``force=True``.
+
+Payloads are slimmed before sending (null fields dropped, asset fields that
+repeat their ``<img>`` element removed, compact JSON, page HTML optional via
+``upload_page_html``) and checked against Convex's document size limit.
+
+Transient failures (HTTP 429/5xx, timeouts, dropped connections) are retried
+with exponential backoff; records that still fail are written to the
+:mod:`~dust_ingest.dead_letter` queue and can be re-sent with
+:func:`replay_failed`.
 """
 
 from __future__ import annotations
 
-import json
+import importlib.util
 import logging
-import urllib.request
-import urllib.error
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Iterator
 
+import httpx
+
+from dust_ingest import progress, serialize, tracing
+from dust_ingest.cache import PageHandle
+from dust_ingest.dead_letter import get_dead_letter
 from dust_ingest.models import Level, PageSnapshot, PageVariant, PipelineConfig
+from dust_ingest.upload_ledger import deployment_key, get_ledger, record_hash
 from dust_ingest.variant_validation import validate_page_variant
 
 logger = logging.getLogger(__name__)
 
+# (single-record path, bulk path, bulk argument name) per record kind.
+_MUTATIONS: dict[str, tuple[str, str, str]] = {
+    "page": ("pages:upsert", "pages:upsertMany", "pages"),
+    "level": ("levels:upsert", "levels:upsertMany", "levels"),
+    "variant": ("pageVariants:upsert", "pageVariants:upsertMany", "variants"),
+}
+
+_TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+_BACKOFF_BASE_SECS = 0.5
+_BACKOFF_MAX_SECS = 30.0
+# Convex rejects documents over 1 MiB; stay a little under it because the
+# stored encoding is not byte-for-byte the JSON we send.
+_MAX_DOCUMENT_BYTES = 1_000_000
+
+_client: httpx.Client | None = None
+_client_size = 0
+_client_lock = threading.Lock()
+
+
+def _get_client(concurrency: int | None = None) -> httpx.Client:
+    """Return the shared keep-alive HTTP client, creating it on first use.
+
+    The connection pool is sized to *concurrency* requests in flight (one
+    connection and one kept-alive connection per upload worker); a client
+    sized for fewer is closed and replaced.
+    """
+    global _client, _client_size
+    with _client_lock:
+        if _client is None or (concurrency and concurrency > _client_size):
+            if _client is not None:
+                _client.close()
+            _client_size = max(concurrency or 0, _client_size, 1)
+            _client = httpx.Client(
+                # HTTP/2 needs the optional ``h2`` package.
+                http2=importlib.util.find_spec("h2") is not None,
+                limits=httpx.Limits(
+                    max_connections=_client_size,
+                    max_keepalive_connections=_client_size,
+                ),
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                headers={"Content-Type": "application/json"},
+            )
+        return _client
+
+
+class MutationError(Exception):
+    """A Convex mutation failed; ``transient`` failures are worth retrying."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        status: int | None = None,
+        transient: bool = False,
+        retry_after: str | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.transient = transient
+        self.retry_after = retry_after
+
+
+def _backoff_delay(attempt: int, retry_after: str | None = None) -> float:
+    """Seconds to sleep before retry *attempt* (0-based), with full jitter."""
+    if retry_after:
+        try:
+            return min(float(retry_after), _BACKOFF_MAX_SECS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(_BACKOFF_MAX_SECS, _BACKOFF_BASE_SECS * 2 ** attempt))
+
 
-def _call_mutation(convex_url: str, path: str, args: dict) -> dict | None:
-    """POST a mutation to the Convex HTTP API and return the parsed response."""
+def _post_mutation(convex_url: str, path: str, args: dict) -> dict:
+    """POST a mutation once; raise :class:`MutationError` on failure."""
     url = convex_url.rstrip("/") + "/api/mutation"
-    body = json.dumps({"path": path, "args": args, "format": "json"}).encode()
-    req = urllib.request.Request(
-        url,
-        data=body,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+    body = _encode({"path": path, "args": args, "format": "json"})
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = json.loads(resp.read().decode())
-            return data
-    except urllib.error.HTTPError as exc:
-        err_body = exc.read().decode() if exc.fp else ""
-        logger.error(
-            "Convex mutation %s failed (HTTP %d): %s", path, exc.code, err_body
+        resp = _get_client().post(url, content=body)
+    except httpx.TransportError as exc:  # timeouts, resets, DNS, …
+        raise MutationError(f"{type(exc).__name__}: {exc}", transient=True) from exc
+    if resp.status_code >= 400:
+        raise MutationError(
+            f"HTTP {resp.status_code}: {resp.text[:500]}",
+            status=resp.status_code,
+            transient=resp.status_code in _TRANSIENT_STATUS,
+            retry_after=resp.headers.get("Retry-After"),
         )
-        return None
-    except Exception:
-        logger.exception("Convex mutation %s failed", path)
-        return None
+    try:
+        data = resp.json()
+    except ValueError as exc:
+        raise MutationError(f"Invalid JSON response: {resp.text[:200]}") from exc
+    if isinstance(data, dict) and data.get("status") == "error":
+        raise MutationError(str(data.get("errorMessage", data)))
+    return data
+
+
+def _call_mutation(convex_url: str, path: str, args: dict, retries: int = 0) -> dict:
+    """POST a mutation to the Convex HTTP API and return the parsed response.
+
+    Transient failures are retried up to *retries* times with exponential
+    backoff (honouring ``Retry-After``); the last error is re-raised.
+    """
+    attempt = 0
+    while True:
+        try:
+            return _post_mutation(convex_url, path, args)
+        except MutationError as exc:
+            if not exc.transient or attempt >= retries:
+                logger.error("Convex mutation %s failed: %s", path, exc)
+                raise
+            tracing.count("upload.retry")
+            delay = _backoff_delay(attempt, exc.retry_after)
+            logger.warning(
+                "Convex mutation %s failed (%s) — retry %d/%d in %.1fs",
+                path, exc, attempt + 1, retries, delay,
+            )
+            time.sleep(delay)
+            attempt += 1
 
 
 # ------------------------------------------------------------------
-# Public helpers
+# Statistics
 # ------------------------------------------------------------------
 
-def upload_pages(pages: list[PageSnapshot], config: PipelineConfig) -> int:
-    """Upload page snapshots via ``pages:upsert``.  Returns success count."""
-    ok = 0
-    for p in pages:
-        payload = p.model_dump()
-        # title must be a string for the Convex schema (not None)
-        if payload.get("title") is None:
-            payload["title"] = ""
-        result = _call_mutation(config.convex_url, "pages:upsert", payload)
-        if result is not None:
-            ok += 1
-            logger.debug("Uploaded page %s", p.pageId)
-        else:
-            logger.warning("Failed to upload page %s", p.pageId)
-    return ok
-
-
-def upload_levels(levels: list[Level], config: PipelineConfig) -> int:
-    """Upload level definitions via ``levels:upsert``.  Returns success count."""
-    ok = 0
-    for lv in levels:
-        result = _call_mutation(
-            config.convex_url, "levels:upsert", lv.model_dump()
+def _percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of *values* (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+@dataclass
+class UploadStats:
+    """Latency / throughput counters for one record kind."""
+    kind: str
+    records: int = 0
+    ok: int = 0
+    skipped: int = 0
+    calls: int = 0
+    call_latencies: list[float] = field(default_factory=list)
+    record_latencies: list[float] = field(default_factory=list)
+    # IDs of the records the deployment now holds: accepted or unchanged.
+    held: set[str] = field(default_factory=set)
+    started: float = field(default_factory=time.perf_counter)
+    finished: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_ok(self, record_ids: list[str]) -> None:
+        with self._lock:
+            self.ok += len(record_ids)
+            self.held.update(record_ids)
+
+    def record_call(self, batch_size: int, seconds: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.call_latencies.append(seconds)
+            # Amortized: every record in the batch waited for the whole call.
+            self.record_latencies.extend([seconds] * batch_size)
+
+    @property
+    def done(self) -> int:
+        """Records the deployment now holds: uploaded plus unchanged."""
+        return self.ok + self.skipped
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self) -> str:
+        rate = self.ok / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"{self.kind}s: {self.ok}/{self.records - self.skipped} in {self.calls} calls "
+            f"({self.skipped} unchanged), "
+            f"{self.elapsed:.2f}s, {rate:.1f} rec/s, call p50 "
+            f"{_percentile(self.call_latencies, 50) * 1000:.0f}ms / p95 "
+            f"{_percentile(self.call_latencies, 95) * 1000:.0f}ms, record p95 "
+            f"{_percentile(self.record_latencies, 95) * 1000:.0f}ms"
         )
-        if result is not None:
-            ok += 1
-            logger.debug("Uploaded level %s", lv.levelId)
-        else:
-            logger.warning("Failed to upload level %s", lv.levelId)
-    return ok
 
 
-def upload_variants(
-    variants: list[PageVariant], config: PipelineConfig
-) -> int:
-    """Upload page variants via ``pageVariants:insert``.  Returns success count.
+@dataclass
+class UploadReport:
+    """Result of :func:`upload_all`."""
+    pages: UploadStats
+    levels: UploadStats
+    variants: UploadStats
 
-    Invalid variants are skipped (empty content, no fake marks, or too few
-    text elements), preventing degenerate archived pages in gameplay.
+
+# ------------------------------------------------------------------
+# Batching
+# ------------------------------------------------------------------
+
+def _encode(obj: object) -> bytes:
+    """Compact UTF-8 JSON, as sent on the wire."""
+    return serialize.dumps(obj)
+
+
+def _payload_size(payload: dict) -> int:
+    """Encoded size of *payload* in bytes."""
+    return len(_encode(payload))
+
+
+def _batches(
+    payloads: list[tuple[str, dict]],
+    max_records: int,
+    max_bytes: int,
+) -> Iterator[list[tuple[str, dict]]]:
+    """Group ``(record_id, payload)`` pairs into size-bounded batches.
+
+    A single payload larger than *max_bytes* still gets its own batch so
+    the server can report the real error.
+    """
+    batch: list[tuple[str, dict]] = []
+    batch_bytes = 0
+    for record_id, payload in payloads:
+        size = _payload_size(payload)
+        if batch and (len(batch) >= max_records or batch_bytes + size > max_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append((record_id, payload))
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+def _upload_batch(
+    convex_url: str,
+    kind: str,
+    batch: list[tuple[str, dict]],
+    stats: UploadStats | None = None,
+    retries: int = 0,
+) -> list[str]:
+    """Send *batch* in one mutation, bisecting on rejection.
+
+    Returns the IDs of the records the deployment accepted.  Records that
+    cannot be uploaded are dead-lettered: a batch that exhausts its retries
+    on a transient error as a whole, a rejected batch one record at a time
+    once bisection has isolated the offender.
+    """
+    single_path, bulk_path, arg_name = _MUTATIONS[kind]
+    if len(batch) == 1:
+        path, args = single_path, batch[0][1]
+    else:
+        path, args = bulk_path, {arg_name: [payload for _, payload in batch]}
+
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(f"upload.{kind}"):
+            _call_mutation(convex_url, path, args, retries)
+        error = None
+    except MutationError as exc:
+        error = exc
+    if stats is not None:
+        stats.record_call(len(batch), time.perf_counter() - t0)
+
+    if error is None:
+        logger.debug("Uploaded %d %s(s)", len(batch), kind)
+        return [record_id for record_id, _ in batch]
+    if len(batch) == 1 or error.transient:
+        # Splitting will not help against an unavailable deployment.
+        tracing.count("upload.dead_lettered", len(batch))
+        get_dead_letter().add(
+            deployment_key(convex_url), kind, single_path, batch,
+            str(error), error.status,
+        )
+        return []
+
+    mid = len(batch) // 2
+    tracing.count("upload.bisect")
+    logger.warning(
+        "Batch of %d %ss rejected — retrying as %d + %d",
+        len(batch), kind, mid, len(batch) - mid,
+    )
+    return (
+        _upload_batch(convex_url, kind, batch[:mid], stats, retries)
+        + _upload_batch(convex_url, kind, batch[mid:], stats, retries)
+    )
+
+
+def _submit_records(
+    pool: ThreadPoolExecutor,
+    config: PipelineConfig,
+    kind: str,
+    payloads: list[tuple[str, dict]],
+    stats: UploadStats,
+    depends_on: dict[str, Future] | None = None,
+    dep_key: str | None = None,
+    force: bool = False,
+) -> list[tuple[Future, list[tuple[str, dict]]]]:
+    """Submit every batch of *payloads* to *pool*; return ``(future, batch)`` pairs.
+
+    Records the ledger shows as already uploaded to this deployment are
+    skipped unless *force* is set; accepted records are confirmed in the
+    ledger as each batch completes.
+
+    If *depends_on* is given, each batch first waits for the futures of the
+    records its payloads reference via *dep_key* (e.g. a variant's
+    ``pageId``).  Dependencies are always submitted earlier, so FIFO worker
+    scheduling guarantees they are already running when a batch waits.
+    """
+    ledger = get_ledger()
+    dead_letter = get_dead_letter()
+    deployment = deployment_key(config.convex_url)
+    digests: dict[str, str] = {}
+    pending: list[tuple[str, dict]] = []
+    for record_id, payload in payloads:
+        digest = record_hash(payload)
+        if not force and ledger.is_current(deployment, kind, record_id, digest):
+            stats.skipped += 1
+            stats.held.add(record_id)
+            continue
+        digests[record_id] = digest
+        pending.append((record_id, payload))
+    stats.records += len(payloads)
+    # Claim the whole set from any reservation, then withdraw the skips.
+    progress.add_total("upload", len(payloads))
+    if len(pending) < len(payloads):
+        progress.add_total("upload", len(pending) - len(payloads))
+
+    def run(batch: list[tuple[str, dict]]) -> int:
+        if depends_on and dep_key:
+            deps = {
+                depends_on[p[dep_key]] for _, p in batch if p.get(dep_key) in depends_on
+            }
+            wait(deps)
+        accepted = _upload_batch(
+            config.convex_url, kind, batch, stats, config.upload_max_retries,
+        )
+        ledger.confirm(deployment, kind, [(rid, digests[rid]) for rid in accepted])
+        dead_letter.discard(deployment, kind, accepted)
+        stats.add_ok(accepted)
+        progress.advance("upload", len(accepted), failed=len(batch) - len(accepted))
+        return len(accepted)
+
+    return [
+        (pool.submit(run, batch), batch)
+        for batch in _batches(
+            pending, config.upload_batch_records, config.upload_batch_bytes,
+        )
+    ]
+
+
+# ------------------------------------------------------------------
+# Payload builders
+# ------------------------------------------------------------------
+
+def _page_payload(page: PageSnapshot | PageHandle, include_html: bool) -> dict:
+    """Slim upload payload for *page*.
+
+    Null element/asset fields are dropped (they are optional in the Convex
+    validator), and an asset's ``alt``/``srcset`` are dropped when its
+    ``<img>`` element (``elementId``) already carries the same values.
     """
-    ok = 0
+    if isinstance(page, PageHandle):
+        # Already-validated tuples: dump them directly, no pydantic round trip.
+        element_records = [e.dump() for e in page.elements]
+        asset_records = [a.dump() for a in page.assets]
+    else:
+        element_records = serialize.dump_models(page.elements, exclude_none=True)
+        asset_records = serialize.dump_models(page.assets, exclude_none=True)
+
+    elements = {e.elementId: e for e in page.elements}
+    assets = []
+    for asset, record in zip(page.assets, asset_records):
+        element = elements.get(asset.elementId) if asset.elementId else None
+        if element is not None and element.src == asset.src:
+            if element.alt == asset.alt:
+                record.pop("alt", None)
+            if element.srcset == asset.srcset:
+                record.pop("srcset", None)
+        assets.append(record)
+
+    payload = {
+        "pageId": page.pageId,
+        "url": page.url,
+        # title must be a string for the Convex schema (not None)
+        "title": page.title or "",
+        "capturedAt": page.capturedAt,
+        "elements": element_records,
+        "assets": assets,
+        "styles": list(page.styles),
+        "tags": list(page.tags),
+        "projectId": page.projectId,
+    }
+    if include_html:
+        payload["html"] = page.html
+    return payload
+
+
+def _oversized(kind: str, record_id: str, payload: dict, convex_url: str) -> bool:
+    """Dead-letter *payload* and return True if it exceeds the document limit."""
+    size = _payload_size(payload)
+    if size <= _MAX_DOCUMENT_BYTES:
+        return False
+    tracing.count("upload.dead_lettered")
+    get_dead_letter().add(
+        deployment_key(convex_url), kind, _MUTATIONS[kind][0], [(record_id, payload)],
+        f"payload is {size} bytes; Convex documents are limited to "
+        f"{_MAX_DOCUMENT_BYTES} bytes",
+    )
+    return True
+
+
+def _page_payloads(
+    pages: list[PageSnapshot | PageHandle], config: PipelineConfig,
+) -> list[tuple[str, dict]]:
+    payloads: list[tuple[str, dict]] = []
+    for p in pages:
+        payload = _page_payload(p, config.upload_page_html)
+        if "html" in payload and _payload_size(payload) > _MAX_DOCUMENT_BYTES:
+            logger.warning(
+                "Page %s exceeds the Convex document limit — uploading without html",
+                p.pageId,
+            )
+            del payload["html"]
+        if not _oversized("page", p.pageId, payload, config.convex_url):
+            payloads.append((p.pageId, payload))
+    return payloads
+
+
+def _level_payloads(levels: list[Level]) -> list[tuple[str, dict]]:
+    # levelId is only unique within a project.
+    return [
+        (f"{lv.projectId}/{lv.levelId}", payload)
+        for lv, payload in zip(levels, serialize.dump_models(levels))
+    ]
+
+
+def _variant_payloads(
+    variants: list[PageVariant], config: PipelineConfig,
+) -> list[tuple[str, dict]]:
+    """Validated variant payloads; invalid variants are skipped with a warning."""
+    valid: list[PageVariant] = []
     skipped = 0
     for v in variants:
         is_valid, reason = validate_page_variant(v)
         if not is_valid:
+            tracing.count("variant.invalid")
             skipped += 1
             logger.warning(
                 "Skipping variant %s â€” %s",
@@ -100,16 +493,146 @@ def upload_variants(
                 reason,
             )
             continue
+        valid.append(v)
 
-        result = _call_mutation(
-            config.convex_url, "pageVariants:insert", v.model_dump()
-        )
-        if result is not None:
-            ok += 1
-            logger.debug("Uploaded variant %s", v.variantId)
-        else:
-            logger.warning("Failed to upload variant %s", v.variantId)
+    # model is cache-only; apart from it only FakeMark.elementId is
+    # optional, so exclude_none drops just that.
+    payloads: list[tuple[str, dict]] = []
+    dumped = serialize.dump_models(valid, exclude={"model"}, exclude_none=True)
+    for v, payload in zip(valid, dumped):
+        if not _oversized("variant", v.variantId, payload, config.convex_url):
+            payloads.append((v.variantId, payload))
 
     if skipped:
         logger.info("Skipped %d invalid variants", skipped)
-    return ok
+    return payloads
+
+
+# ------------------------------------------------------------------
+# Public helpers
+# ------------------------------------------------------------------
+
+def _upload_kind(
+    config: PipelineConfig,
+    kind: str,
+    payloads: list[tuple[str, dict]],
+    force: bool,
+) -> int:
+    stats = UploadStats(kind)
+    _get_client(config.upload_concurrency)
+    with ThreadPoolExecutor(max_workers=config.upload_concurrency) as pool:
+        submitted = _submit_records(pool, config, kind, payloads, stats, force=force)
+        wait([future for future, _ in submitted])
+    stats.finished = time.perf_counter()
+    # Streaming uploads one record at a time; keep those summaries quiet.
+    if len(payloads) > 1:
+        logger.info("Upload %s", stats.summary())
+    elif payloads:
+        logger.debug("Upload %s", stats.summary())
+    return stats.done
+
+
+def upload_pages(
+    pages: list[PageSnapshot], config: PipelineConfig, *, force: bool = False,
+) -> int:
+    """Upload page snapshots via ``pages:upsertMany``.
+
+    Returns the number of pages the deployment now holds (uploaded or
+    unchanged).
+    """
+    return _upload_kind(config, "page", _page_payloads(pages, config), force)
+
+
+def upload_levels(
+    levels: list[Level], config: PipelineConfig, *, force: bool = False,
+) -> int:
+    """Upload level definitions via ``levels:upsertMany``.  Returns success count."""
+    return _upload_kind(config, "level", _level_payloads(levels), force)
+
+
+def upload_variants(
+    variants: list[PageVariant], config: PipelineConfig, *, force: bool = False,
+) -> int:
+    """Upload page variants via ``pageVariants:upsertMany``.  Returns success count.
+
+    Invalid variants are skipped (empty content, no fake marks, or too few
+    text elements), preventing degenerate archived pages in gameplay.
+    """
+    return _upload_kind(config, "variant", _variant_payloads(variants, config), force)
+
+
+def upload_all(
+    pages: list[PageSnapshot | PageHandle],
+    levels: list[Level],
+    variants: list[PageVariant],
+    config: PipelineConfig,
+    *,
+    force: bool = False,
+) -> UploadReport:
+    """Upload pages, levels and variants through one concurrent window.
+
+    The only ordering kept is that a variant batch waits for the page
+    batches its variants reference; levels and unrelated variants go out
+    immediately.
+    """
+    return _upload_payloads(
+        config,
+        _page_payloads(pages, config),
+        _level_payloads(levels),
+        _variant_payloads(variants, config),
+        force=force,
+    )
+
+
+def replay_failed(config: PipelineConfig) -> UploadReport:
+    """Re-send every dead-lettered record for ``config.convex_url``.
+
+    Records are sent exactly as they were when they failed, bypassing the
+    upload ledger.  Those that succeed leave the dead-letter queue; those
+    that fail again stay in it with the new error.
+    """
+    by_kind: dict[str, list[tuple[str, dict]]] = {kind: [] for kind in _MUTATIONS}
+    for entry in get_dead_letter().entries(deployment_key(config.convex_url)):
+        if entry["kind"] in by_kind:
+            by_kind[entry["kind"]].append((entry["recordId"], entry["payload"]))
+    logger.info(
+        "Replaying %d pages, %d levels, %d variants from the dead-letter queue",
+        len(by_kind["page"]), len(by_kind["level"]), len(by_kind["variant"]),
+    )
+    return _upload_payloads(
+        config, by_kind["page"], by_kind["level"], by_kind["variant"], force=True,
+    )
+
+
+def _upload_payloads(
+    config: PipelineConfig,
+    page_payloads: list[tuple[str, dict]],
+    level_payloads: list[tuple[str, dict]],
+    variant_payloads: list[tuple[str, dict]],
+    *,
+    force: bool,
+) -> UploadReport:
+    report = UploadReport(UploadStats("page"), UploadStats("level"), UploadStats("variant"))
+    _get_client(config.upload_concurrency)
+    with ThreadPoolExecutor(max_workers=config.upload_concurrency) as pool:
+        submitted = _submit_records(
+            pool, config, "page", page_payloads, report.pages, force=force,
+        )
+        by_page: dict[str, Future] = {
+            page_id: future for future, batch in submitted for page_id, _ in batch
+        }
+        submitted += _submit_records(
+            pool, config, "level", level_payloads, report.levels, force=force,
+        )
+        submitted += _submit_records(
+            pool, config, "variant", variant_payloads, report.variants,
+            depends_on=by_page, dep_key="pageId", force=force,
+        )
+        wait([future for future, _ in submitted])
+
+    end = time.perf_counter()
+    for stats in (report.pages, report.levels, report.variants):
+        stats.finished = end
+        if stats.records:
+            logger.info("Upload %s", stats.summary())
+    return report
@@ -0,0 +1,129 @@
+"""Durable dead-letter queue for Convex mutations that could not be applied.
+
+When a record still fails after retries (or is rejected outright), the
+uploader appends ``{"deployment", "kind", "recordId", "path", "payload",
+"error", "status", "failedAt"}`` to ``cache/dead_letter.jsonl``.  A later
+successful upload of the same record, whether from ``upload
+--replay-failed`` or an ordinary build, removes it again.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+from dust_ingest import cache
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_FILE = "dead_letter.jsonl"
+
+_Key = tuple[str, str, str]
+
+
+class DeadLetterQueue:
+    """Append-only JSONL file of failed records; the latest entry per record wins."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[_Key, dict] = {}
+        if path.is_file():
+            with path.open(encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[_key(entry)] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue  # torn line from an interrupted run
+
+    def add(
+        self,
+        deployment: str,
+        kind: str,
+        path: str,
+        records: Iterable[tuple[str, dict]],
+        error: str,
+        status: int | None = None,
+    ) -> None:
+        """Dead-letter ``(record_id, payload)`` pairs that failed with *error*."""
+        failed_at = datetime.now(timezone.utc).isoformat()
+        entries = [
+            {
+                "deployment": deployment,
+                "kind": kind,
+                "recordId": record_id,
+                "path": path,
+                "payload": payload,
+                "error": error,
+                "status": status,
+                "failedAt": failed_at,
+            }
+            for record_id, payload in records
+        ]
+        if not entries:
+            return
+        with self._lock:
+            for entry in entries:
+                self._entries[_key(entry)] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as fh:
+                for entry in entries:
+                    fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        logger.warning(
+            "Dead-lettered %d %s(s) to %s: %s", len(entries), kind, self.path, error,
+        )
+
+    def entries(self, deployment: str) -> list[dict]:
+        """Return the outstanding entries for *deployment*, oldest first."""
+        with self._lock:
+            return [e for e in self._entries.values() if e["deployment"] == deployment]
+
+    def discard(self, deployment: str, kind: str, record_ids: Iterable[str]) -> None:
+        """Drop entries for records that have since been uploaded."""
+        with self._lock:
+            if not self._entries:
+                return
+            removed = 0
+            for record_id in record_ids:
+                if self._entries.pop((deployment, kind, record_id), None) is not None:
+                    removed += 1
+            if removed:
+                self._rewrite()
+
+    def _rewrite(self) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                for entry in self._entries.values():
+                    fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _key(entry: dict) -> _Key:
+    return entry["deployment"], entry["kind"], entry["recordId"]
+
+
+_queues: dict[Path, DeadLetterQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_dead_letter() -> DeadLetterQueue:
+    """Return the dead-letter queue for the current cache directory."""
+    path = cache.CACHE_DIR / DEAD_LETTER_FILE
+    with _queues_lock:
+        if path not in _queues:
+            _queues[path] = DeadLetterQueue(path)
+        return _queues[path]
@@ -0,0 +1,576 @@
+"""Micro-benchmarks for the HTML hot paths.
+
+Times the per-page HTML functions over a fixed corpus of fixtures:
+
+* ``sanitize_html`` / ``truncate_to_word_limit`` /
+  ``extract_elements_and_assets`` — the scrape-time chain, in pipeline order
+* ``_elements_to_html`` / ``_normalize_text_sections`` /
+  ``count_text_elements`` — variant rendering and validation, on variant
+  HTML built from every element of the page (not just the truncated 300
+  words), so large pages stay large
+* ``_normalize_sections`` — the same normalization and count on the
+  element list, as ``_parse_response`` now does, rendering HTML once
+
+The corpus is generated deterministically from :data:`FIXTURES` and covers
+the page shapes the scraper meets: a short blog post, a news article buried
+in navigation, scripts and ads, a documentation page with code and nested
+lists, deeply nested ``<div>`` soup, a ~600 KB Wikipedia-style article
+with an infobox, wide tables, hundreds of references and navboxes, and a
+page of 4,000 list-item fragments.  Saved real pages can be added with
+``--fixtures DIR`` (``*.html``).
+
+Each case reports the best and median time per page, time per KB of input
+and peak traced allocation (``tracemalloc``).  Results can be saved as a
+baseline; later runs are compared against it and fail when the stable time
+or peak allocation grows by more than the threshold.  Timings only compare
+meaningfully on the same machine, so the default baseline lives in the
+local cache directory.
+
+The stable time is the smallest median over consecutive slices of a case's
+runs, so one lucky or unlucky run cannot move it, and every case gets at
+least :data:`_MIN_RUNS` runs however slow it is.  Shared machines also
+drift in speed by tens of percent over a few seconds, so each run of a case
+is paired with a run of a fixed pure-Python reference workload, and time
+regressions are judged on the case's time relative to the reference.  A
+case that still looks regressed is measured again before it is reported,
+and keeps its faster result.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from dust_ingest.html_sanitize import sanitize_html, truncate_to_word_limit
+from dust_ingest.llm_alter import (
+    _elements_to_html,
+    _elements_to_sections,
+    _normalize_sections,
+    _normalize_text_sections,
+    _render_sections,
+)
+from dust_ingest.normalize import extract_elements_and_assets
+from dust_ingest.variant_validation import count_text_elements, count_text_sections
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://example.org/wiki/Article"
+DEFAULT_THRESHOLD = 0.25
+BASELINE_FILE = "bench_baseline.json"
+_MIN_RUNS = 15
+_MAX_RUNS = 5000
+_SLICES = 5  # stable time: smallest median over this many slices of the runs
+_MIN_SAMPLE_SECS = 0.001  # fast cases time several calls per run
+_RECHECKS = 2
+
+_WORDS = (
+    "the of and to in is was for on that with as by from at are this which "
+    "it be an or has were its first new also one two city river century "
+    "government population university system species company history war "
+    "north south national between during after under within period area "
+    "because however although several early later public former major"
+).split()
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def _sentence(rng: random.Random, lo: int = 8, hi: int = 24) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(lo, hi))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def _para(rng: random.Random, sentences: int, links: int = 0) -> str:
+    parts = [_sentence(rng) for _ in range(sentences)]
+    for _ in range(links):
+        i = rng.randrange(len(parts))
+        parts[i] += f' <a href="/wiki/{rng.choice(_WORDS)}_{rng.randint(1, 999)}">{rng.choice(_WORDS)}</a>'
+    return "<p>" + " ".join(parts) + "</p>"
+
+
+def _chrome(rng: random.Random, nav_links: int) -> tuple[str, str]:
+    """Header/nav and footer markup with scripts and styles."""
+    links = "".join(
+        f'<li><a href="/section/{i}">{rng.choice(_WORDS).title()}</a></li>'
+        for i in range(nav_links)
+    )
+    head = (
+        "<!DOCTYPE html><html><head><title>Fixture</title>"
+        + "".join(
+            f'<script src="/static/js/bundle.{i}.js"></script>' for i in range(6)
+        )
+        + "<style>" + "body{margin:0}.c{color:#333}" * 40 + "</style>"
+        + '<script>window.__STATE__=' + json.dumps({"k": list(range(300))}) + "</script>"
+        + f'</head><body><header><nav><ul>{links}</ul></nav></header>'
+    )
+    foot = (
+        f"<footer><nav><ul>{links}</ul></nav><p>Copyright notice.</p>"
+        "<form action='/subscribe'><input name='email'><button>Go</button></form>"
+        "</footer><noscript><img src='/pixel.gif'></noscript></body></html>"
+    )
+    return head, foot
+
+
+def _img(rng: random.Random, n: int) -> str:
+    return (
+        f'<figure><img src="/media/{n}.jpg" '
+        f'srcset="/media/{n}-320.jpg 320w, /media/{n}-640.jpg 640w, /media/{n}-1280.jpg 1280w" '
+        f'alt="{_sentence(rng, 3, 6)}"><figcaption>{_sentence(rng, 5, 12)}</figcaption></figure>'
+    )
+
+
+def blog_post(seed: int = 1) -> str:
+    rng = random.Random(seed)
+    head, foot = _chrome(rng, 8)
+    body = [f"<article><h1>{_sentence(rng, 4, 8)}</h1>"]
+    for i in range(12):
+        body.append(_para(rng, rng.randint(3, 6), links=1))
+        if i % 4 == 3:
+            body.append(_img(rng, i))
+    body.append("</article>")
+    return head + "".join(body) + foot
+
+
+def news_article(seed: int = 2) -> str:
+    rng = random.Random(seed)
+    head, foot = _chrome(rng, 120)
+    body = ["<main><div class='layout'><div class='col'><article>"]
+    body.append(f"<h1>{_sentence(rng, 6, 12)}</h1><p class='byline'>By Staff</p>")
+    for i in range(40):
+        body.append(_para(rng, rng.randint(2, 4), links=2))
+        if i % 5 == 0:
+            body.append(
+                "<div class='ad'><script>googletag.cmd.push(function(){})</script>"
+                f"<iframe src='/ads/{i}'></iframe></div>"
+            )
+        if i % 8 == 4:
+            body.append(f"<blockquote>{_sentence(rng)}</blockquote>")
+    body.append("</article></div><aside><ul>")
+    body.extend(f"<li><a href='/story/{i}'>{_sentence(rng, 5, 9)}</a></li>" for i in range(60))
+    body.append("</ul></aside></div></main>")
+    return head + "".join(body) + foot
+
+
+def docs_page(seed: int = 3) -> str:
+    rng = random.Random(seed)
+    head, foot = _chrome(rng, 40)
+    body = ["<main><h1>API reference</h1>"]
+    for s in range(30):
+        body.append(f"<h2 id='s{s}'>{_sentence(rng, 2, 5)}</h2>")
+        body.append(_para(rng, 3))
+        body.append("<pre><code>" + "\n".join(
+            f"    result_{k} = call({k}, flag=True)  # {rng.choice(_WORDS)}" for k in range(12)
+        ) + "</code></pre>")
+        body.append("<ul>" + "".join(
+            f"<li>{_sentence(rng, 4, 10)}<ul><li>{_sentence(rng, 3, 8)}</li>"
+            f"<li>{_sentence(rng, 3, 8)}</li></ul></li>"
+            for _ in range(5)
+        ) + "</ul>")
+    body.append("</main>")
+    return head + "".join(body) + foot
+
+
+def div_soup(seed: int = 4, depth: int = 60) -> str:
+    rng = random.Random(seed)
+    head, foot = _chrome(rng, 10)
+    body: list[str] = []
+    for block in range(20):
+        body.append("".join(f"<div class='w{d}'><span>" for d in range(depth)))
+        body.append(_para(rng, 2))
+        body.append("</span></div>" * depth)
+        body.append(f"<h3>{_sentence(rng, 3, 6)}</h3>")
+    return head + "".join(body) + foot
+
+
+def wiki_article(seed: int = 5, sections: int = 120) -> str:
+    rng = random.Random(seed)
+    head, foot = _chrome(rng, 200)
+    body = ["<div id='content'><h1>" + _sentence(rng, 2, 4) + "</h1>"]
+    body.append("<table class='infobox'>" + "".join(
+        f"<tr><th>{rng.choice(_WORDS).title()}</th><td>{_sentence(rng, 2, 6)}</td></tr>"
+        for _ in range(40)
+    ) + "</table>")
+    body.append("<div id='toc'><ul>" + "".join(
+        f"<li><a href='#s{s}'>{_sentence(rng, 2, 4)}</a></li>" for s in range(sections)
+    ) + "</ul></div>")
+    for s in range(sections):
+        body.append(f"<h2 id='s{s}'>{_sentence(rng, 2, 4)}</h2>")
+        for _ in range(rng.randint(3, 7)):
+            body.append(_para(rng, rng.randint(3, 8), links=rng.randint(2, 6)))
+        if s % 6 == 0:
+            body.append(_img(rng, s))
+        if s % 10 == 5:
+            body.append("<table class='wikitable'>" + "".join(
+                "<tr>" + "".join(f"<td>{rng.randint(0, 10**6)}</td>" for _ in range(8)) + "</tr>"
+                for _ in range(30)
+            ) + "</table>")
+    body.append("<h2>References</h2><ol class='references'>" + "".join(
+        f"<li id='cite-{r}'><cite>{_sentence(rng, 6, 14)}</cite> "
+        f"<a href='https://doi.org/10.{r}/x'>doi</a></li>"
+        for r in range(900)
+    ) + "</ol>")
+    body.append("".join(
+        "<div class='navbox'><table>" + "".join(
+            f"<tr><th>{rng.choice(_WORDS)}</th><td><ul>"
+            + "".join(f"<li><a href='/wiki/{rng.choice(_WORDS)}'>{rng.choice(_WORDS)}</a></li>" for _ in range(25))
+            + "</ul></td></tr>"
+            for _ in range(8)
+        ) + "</table></div>"
+        for _ in range(6)
+    ))
+    body.append("</div>")
+    return head + "".join(body) + foot
+
+
+def list_fragments(seed: int = 6, items: int = 4000) -> str:
+    """A page of thousands of short list items that are not sentences.
+
+    Every item is a fragment to merge, so this is the worst case for
+    ``_normalize_text_sections``.
+    """
+    rng = random.Random(seed)
+    head, foot = _chrome(rng, 10)
+    body = [f"<main><h1>{_sentence(rng, 3, 6)}</h1>", _para(rng, 2)]
+    for _ in range(items // 200):
+        body.append(f"<h3>{_sentence(rng, 2, 4)}</h3><ul>")
+        body.extend(
+            f"<li>{' '.join(rng.choice(_WORDS) for _ in range(rng.randint(2, 6)))}</li>"
+            for _ in range(200)
+        )
+        body.append("</ul>")
+    body.append("</main>")
+    return head + "".join(body) + foot
+
+
+FIXTURES: dict[str, Callable[[], str]] = {
+    "blog": blog_post,
+    "news": news_article,
+    "docs": docs_page,
+    "div-soup": div_soup,
+    "wiki-huge": wiki_article,
+    "list-fragments": list_fragments,
+}
+
+
+def load_fixtures(extra_dir: str | Path | None = None) -> dict[str, str]:
+    """Return ``{name: html}`` for the built-in corpus plus ``*.html`` in *extra_dir*."""
+    corpus = {name: build() for name, build in FIXTURES.items()}
+    if extra_dir:
+        for path in sorted(Path(extra_dir).glob("*.html")):
+            corpus[path.stem] = path.read_text(encoding="utf-8", errors="replace")
+    return corpus
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+@dataclass
+class BenchResult:
+    """Timing and allocation figures for one function on one fixture."""
+    case: str
+    fixture: str
+    inputKb: float
+    runs: int
+    bestMs: float
+    medianMs: float
+    stableMs: float
+    refMs: float
+    msPerKb: float
+    peakKb: float
+
+
+def _cases(html: str) -> list[tuple[str, Callable[[], Any], int]]:
+    """``(case name, thunk, input bytes)`` for every benchmarked function.
+
+    Inputs for each step are precomputed so a case times only its own work.
+    """
+    sanitized = sanitize_html(html, base_url=BASE_URL)
+    truncated = truncate_to_word_limit(sanitized)
+    elements, _ = extract_elements_and_assets(sanitized, base_url=BASE_URL)
+    element_dicts = [
+        {
+            "type": e.tag, "elementId": e.elementId, "text": e.text,
+            "src": e.src, "alt": e.alt,
+        }
+        for e in elements
+    ]
+    variant_html = _elements_to_html(element_dicts)
+    size = len(html.encode("utf-8"))
+    return [
+        ("sanitize_html", lambda: sanitize_html(html, base_url=BASE_URL), size),
+        ("truncate_to_word_limit", lambda: truncate_to_word_limit(sanitized),
+         len(sanitized.encode("utf-8"))),
+        ("extract_elements_and_assets",
+         lambda: extract_elements_and_assets(truncated, base_url=BASE_URL),
+         len(truncated.encode("utf-8"))),
+        ("_elements_to_html", lambda: _elements_to_html(element_dicts),
+         len(variant_html.encode("utf-8"))),
+        ("_normalize_text_sections", lambda: _normalize_text_sections(variant_html),
+         len(variant_html.encode("utf-8"))),
+        ("count_text_elements", lambda: count_text_elements(variant_html),
+         len(variant_html.encode("utf-8"))),
+        ("_normalize_sections", lambda: _structured_pass(element_dicts),
+         len(variant_html.encode("utf-8"))),
+    ]
+
+
+def _structured_pass(element_dicts: list[dict]) -> tuple[str, int]:
+    sections = _normalize_sections(_elements_to_sections(element_dicts))
+    return _render_sections(sections), count_text_sections(sections)
+
+
+def _stable_time(times: list[float]) -> float:
+    """Smallest median over :data:`_SLICES` consecutive slices of *times*."""
+    size = max(1, len(times) // _SLICES)
+    return min(
+        statistics.median(times[i:i + size])
+        for i in range(0, len(times) - size + 1, size)
+    )
+
+
+def _reference() -> int:
+    """Fixed workload that tracks the interpreter's current speed."""
+    words = ("alpha", "beta", "gamma", "delta", "epsilon") * 40
+    total = 0
+    for word in words:
+        total += len(word.upper().replace("a", "e").split("e"))
+    return total
+
+
+def _measure(
+    fn: Callable[[], Any], *, repeat: int, min_time: float,
+) -> tuple[list[float], list[float], float]:
+    """Return (per-call seconds for each run, reference seconds paired with
+    each run, peak traced bytes of one call)."""
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    # The first call only warms caches, unless the case is slow enough that
+    # one call dwarfs any warm-up effect.
+    times: list[float] = [first] if first > min_time else []
+    # As in timeit: time enough calls per run that the clock resolution
+    # and loop overhead do not matter.
+    number = max(1, int(_MIN_SAMPLE_SECS / first)) if first > 0 else 1
+    start = time.perf_counter()
+    _reference()
+    ref_number = max(1, int(_MIN_SAMPLE_SECS / max(time.perf_counter() - start, 1e-9)))
+    ref_times: list[float] = []
+    min_runs = max(repeat, _MIN_RUNS)
+    deadline = time.perf_counter() + min_time
+    # As in timeit: keep collector pauses out of the timings.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(times) < min_runs or (time.perf_counter() < deadline and len(times) < _MAX_RUNS):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            times.append((time.perf_counter() - start) / number)
+            start = time.perf_counter()
+            for _ in range(ref_number):
+                _reference()
+            ref_times.append((time.perf_counter() - start) / ref_number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, ref_times, peak - base
+
+
+def run_bench(
+    corpus: dict[str, str],
+    *,
+    repeat: int = 5,
+    min_time: float = 0.5,
+    only: str | None = None,
+    keys: set[str] | None = None,
+) -> list[BenchResult]:
+    """Benchmark every case on every fixture in *corpus*.
+
+    *only* filters by case name, *keys* by ``case@fixture``.
+    """
+    results: list[BenchResult] = []
+    # Truncation and extraction log once per page at INFO.
+    quiet = [logging.getLogger(f"dust_ingest.{name}") for name in ("html_sanitize", "normalize")]
+    previous_levels = [lg.level for lg in quiet]
+    for lg in quiet:
+        lg.setLevel(logging.WARNING)
+    try:
+        for fixture, html in corpus.items():
+            for case, fn, size in _cases(html):
+                if only and only not in case:
+                    continue
+                if keys is not None and f"{case}@{fixture}" not in keys:
+                    continue
+                times, ref_times, peak = _measure(fn, repeat=repeat, min_time=min_time)
+                kb = size / 1024
+                best = min(times) * 1000
+                results.append(BenchResult(
+                    case=case,
+                    fixture=fixture,
+                    inputKb=round(kb, 1),
+                    runs=len(times),
+                    bestMs=round(best, 3),
+                    medianMs=round(statistics.median(times) * 1000, 3),
+                    stableMs=round(_stable_time(times) * 1000, 3),
+                    refMs=round(_stable_time(ref_times) * 1000, 4),
+                    msPerKb=round(best / kb, 4) if kb else 0.0,
+                    peakKb=round(peak / 1024, 1),
+                ))
+                logger.debug("%s on %s: %.2f ms", case, fixture, best)
+    finally:
+        for lg, level in zip(quiet, previous_levels):
+            lg.setLevel(level)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------------
+
+def _key(result: BenchResult | dict) -> str:
+    if isinstance(result, dict):
+        return f"{result['case']}@{result['fixture']}"
+    return f"{result.case}@{result.fixture}"
+
+
+def save_baseline(path: str | Path, results: list[BenchResult]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [asdict(r) for r in results],
+    }
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def load_baseline(path: str | Path) -> dict[str, Any] | None:
+    path = Path(path)
+    if not path.is_file():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("python") != platform.python_version():
+        logger.warning(
+            "Baseline %s was recorded on Python %s (running %s); timings may differ",
+            path, data.get("python"), platform.python_version(),
+        )
+    return data
+
+
+def compare(
+    results: list[BenchResult],
+    baseline: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[str]:
+    """Return a description of each case whose time or peak allocation regressed."""
+    previous = {_key(r): r for r in baseline.get("results", [])}
+    regressions: list[str] = []
+    for r in results:
+        old = previous.get(_key(r))
+        if old is None:
+            continue
+        for field, unit in (("stableMs", "ms"), ("peakKb", "KB")):
+            if field == "stableMs":
+                before, after = _scaled_times(old, r)
+            else:
+                before, after = old[field], getattr(r, field)
+            if before > 0 and after > before * (1 + threshold):
+                regressions.append(
+                    f"{_key(r)}: {field} {before:.2f} -> {after:.2f} {unit} "
+                    f"(+{(after / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def _scaled_times(old: dict[str, Any], result: BenchResult) -> tuple[float, float]:
+    """Baseline and current stable time, the latter at the baseline's speed.
+
+    The current time is rescaled by how much faster or slower the reference
+    workload ran, so a machine-wide slowdown does not read as a regression.
+    Baselines saved before stableMs or refMs existed compare unscaled.
+    """
+    before = old.get("stableMs", old["medianMs"])
+    after = result.stableMs
+    if old.get("refMs") and result.refMs:
+        after *= old["refMs"] / result.refMs
+    return before, after
+
+
+def recheck(
+    corpus: dict[str, str],
+    results: list[BenchResult],
+    baseline: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    *,
+    repeat: int = 5,
+    attempts: int = _RECHECKS,
+) -> list[str]:
+    """:func:`compare`, re-measuring regressed cases up to *attempts* times.
+
+    A re-measured case keeps its faster result, so *results* ends up with
+    the figures the verdict is based on.
+    """
+    regressions = compare(results, baseline, threshold)
+    for _ in range(attempts):
+        if not regressions:
+            break
+        flagged = {line.split(":", 1)[0] for line in regressions}
+        logger.info("Re-measuring %d cases that look regressed", len(flagged))
+        fresh = {_key(r): r for r in run_bench(corpus, repeat=repeat, keys=flagged)}
+        for i, r in enumerate(results):
+            again = fresh.get(_key(r))
+            if again is not None and _scaled_times(asdict(r), again)[1] < r.stableMs:
+                results[i] = again
+        regressions = compare(results, baseline, threshold)
+    return regressions
+
+
+def format_table(results: list[BenchResult], baseline: dict[str, Any] | None = None) -> str:
+    """Render *results* as a fixed-width table, with deltas if *baseline* is given."""
+    previous = {_key(r): r for r in (baseline or {}).get("results", [])}
+    header = (
+        f"{'case':<28} {'fixture':<12} {'KB':>8} {'runs':>5} {'best ms':>9} "
+        f"{'median ms':>10} {'stable ms':>10} {'ms/KB':>8} {'peak KB':>9}"
+    )
+    if previous:
+        header += f" {'Δ time':>8} {'Δ alloc':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        line = (
+            f"{r.case:<28} {r.fixture:<12} {r.inputKb:>8.1f} {r.runs:>5} {r.bestMs:>9.2f} "
+            f"{r.medianMs:>10.2f} {r.stableMs:>10.2f} {r.msPerKb:>8.3f} {r.peakKb:>9.1f}"
+        )
+        old = previous.get(_key(r))
+        if old is not None:
+            line += f" {_delta(*_scaled_times(old, r)):>8} {_delta(old['peakKb'], r.peakKb):>8}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "-"
+    return f"{(after / before - 1) * 100:+.0f}%"
@@ -0,0 +1,224 @@
+"""Incremental builds — only reprocess new or changed URLs.
+
+The input URL list is diffed against ``cache/manifest.json``:
+
+* cached pages scraped within ``ttl_hours`` are not re-scraped at all;
+* re-scraped pages whose sanitized-HTML hash matches the manifest keep
+  their cached variants;
+* only new or content-changed pages go through the LLM.
+
+Levels are then re-derived over the full variant set (URL order), and only
+new or changed pages, variants and levels are uploaded.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from dust_ingest import cache
+from dust_ingest.apify_scrape import _page_id, scrape_urls
+from dust_ingest.convex_upload import upload_all
+from dust_ingest.leveling import rebuild_levels_from_variants
+from dust_ingest.llm_alter import assign_level, generate_variants
+from dust_ingest.models import Level, PageSnapshot, PageVariant, PipelineConfig, UrlEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_HOURS = 24.0
+
+
+@dataclass
+class IncrementalResult:
+    """Outcome of an incremental build."""
+    pages: list[PageSnapshot] = field(default_factory=list)
+    variants: list[PageVariant] = field(default_factory=list)
+    levels: list[Level] = field(default_factory=list)
+    scraped: int = 0
+    altered: int = 0
+    pages_uploaded: int = 0
+    pages_to_upload: int = 0
+    variants_uploaded: int = 0
+    variants_to_upload: int = 0
+    levels_uploaded: int = 0
+    levels_to_upload: int = 0
+
+
+def _is_fresh(entry: dict, now: datetime, ttl: timedelta) -> bool:
+    """Return True if a manifest entry was scraped within *ttl*."""
+    try:
+        scraped_at = datetime.fromisoformat(entry["scrapedAt"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return now - scraped_at <= ttl
+
+
+def run_incremental_build(
+    urls: list[UrlEntry],
+    config: PipelineConfig,
+    project_id: str,
+    *,
+    num_levels: int = 10,
+    max_workers: int = 40,
+    ttl_hours: float = DEFAULT_TTL_HOURS,
+    force_upload: bool = False,
+) -> IncrementalResult:
+    """Rebuild only what changed since the last cached run."""
+    result = IncrementalResult()
+    manifest = cache.load_manifest()
+    now = datetime.now(timezone.utc)
+    ttl = timedelta(hours=ttl_hours)
+
+    # 1. Decide which URLs need a scrape.
+    by_id: dict[str, PageSnapshot] = {}
+    unchanged: set[str] = set()
+    to_scrape: list[UrlEntry] = []
+    for entry in urls:
+        pid = _page_id(entry.url)
+        known = manifest.get(pid)
+        cached = cache.load_page(pid) if known else None
+        if cached is not None and _is_fresh(known, now, ttl):
+            cached.tags = entry.tags
+            cached.projectId = project_id
+            by_id[pid] = cached
+            unchanged.add(pid)
+        else:
+            to_scrape.append(entry)
+    logger.info(
+        "Incremental: %d cached pages still fresh, %d URLs to scrape",
+        len(by_id), len(to_scrape),
+    )
+
+    # 2. Scrape stale/new URLs and compare content hashes.
+    changed: set[str] = set()
+    rescraped: set[str] = set()
+    if to_scrape:
+        scraped = scrape_urls(to_scrape, config, project_id=project_id)
+        result.scraped = len(scraped)
+        for page in scraped:
+            known = manifest.get(page.pageId)
+            if known and known.get("contentHash") == cache.content_hash(page.html):
+                unchanged.add(page.pageId)
+            else:
+                changed.add(page.pageId)
+            by_id[page.pageId] = page
+            rescraped.add(page.pageId)
+        # A failed re-scrape falls back to the cached copy when there is one.
+        for entry in to_scrape:
+            pid = _page_id(entry.url)
+            if pid in by_id:
+                continue
+            cached = cache.load_page(pid)
+            if cached is not None:
+                logger.warning("Re-scrape failed for %s — using cached copy", entry.url)
+                by_id[pid] = cached
+                unchanged.add(pid)
+
+    order = {_page_id(u.url): i for i, u in enumerate(urls)}
+    result.pages = sorted(by_id.values(), key=lambda p: order[p.pageId])
+
+    # 3. Reuse cached variants for unchanged pages; alter everything else.
+    reused: list[PageVariant] = []
+    to_alter: list[PageSnapshot] = []
+    for page in result.pages:
+        cached_variants: list[PageVariant] = []
+        if page.pageId in unchanged:
+            cached_variants = cache.load_page_variants(page.pageId)
+        if cached_variants:
+            reused.extend(cached_variants)
+        else:
+            to_alter.append(page)
+    logger.info(
+        "Incremental: reusing %d cached variants, altering %d pages",
+        len(reused), len(to_alter),
+    )
+
+    new_variants: list[PageVariant] = []
+    if to_alter:
+        new_variants, _ = generate_variants(
+            to_alter, config, project_id,
+            num_levels=num_levels, max_workers=max_workers,
+        )
+    result.altered = len(to_alter)
+
+    # 4. Re-derive level placement over the combined set, in URL order.
+    placement = {v.variantId: (v.levelId, v.difficulty) for v in reused}
+    result.variants = sorted(reused + new_variants, key=lambda v: order[v.pageId])
+    level_counts: dict[int, int] = {}
+    level_variants: list[PageVariant] = []
+    for variant in result.variants:
+        if assign_level(variant, level_counts, project_id, num_levels):
+            level_variants.append(variant)
+    result.levels = rebuild_levels_from_variants(level_variants, project_id, num_levels)
+
+    # 5. Upload only new or changed records.
+    upload_page_list = [
+        p for p in result.pages
+        if p.pageId in changed or _page_record_changed(p)
+    ]
+    upload_variant_list = [
+        v for v in result.variants
+        if v.variantId not in placement
+        or placement[v.variantId] != (v.levelId, v.difficulty)
+    ]
+    upload_level_list = [
+        lv for lv in result.levels
+        if cache.load_level(lv.difficulty, project_id) != lv
+    ]
+    result.pages_to_upload = len(upload_page_list)
+    result.variants_to_upload = len(upload_variant_list)
+    result.levels_to_upload = len(upload_level_list)
+    report = upload_all(
+        upload_page_list, upload_level_list, upload_variant_list, config,
+        force=force_upload,
+    )
+    result.pages_uploaded = report.pages.done
+    result.levels_uploaded = report.levels.done
+    result.variants_uploaded = report.variants.done
+
+    # 6. Refresh the cache + manifest with what the deployment accepted.
+    # Change detection reads the cache, so a record that failed or was
+    # dead-lettered must keep its old cached state to be retried next run.
+    held_pages = report.pages.held
+    held_variants = report.variants.held
+    cache.save_pages([p for p in upload_page_list if p.pageId in held_pages])
+    cache.save_levels([
+        lv for lv in upload_level_list
+        if f"{lv.projectId}/{lv.levelId}" in report.levels.held
+    ])
+    cache.save_variants([v for v in upload_variant_list if v.variantId in held_variants])
+
+    # A page is only current once it and all of its new variants are held;
+    # otherwise it stays out of the manifest and is altered again.
+    pending = {p.pageId for p in upload_page_list if p.pageId not in held_pages}
+    pending.update(
+        v.pageId for v in upload_variant_list
+        if v.pageId not in unchanged and v.variantId not in held_variants
+    )
+    if pending:
+        logger.warning(
+            "Incremental: %d pages not fully uploaded; they will be retried next run",
+            len(pending),
+        )
+    altered_ok = [p for p in to_alter if p.pageId not in pending]
+    if altered_ok:
+        cache.record_variants(
+            altered_ok, [v for v in new_variants if v.pageId not in pending],
+        )
+    cache.record_pages([
+        p for p in result.pages if p.pageId in rescraped and p.pageId not in pending
+    ])
+    return result
+
+
+def _page_record_changed(page: PageSnapshot) -> bool:
+    """Return True if *page* differs from its cached snapshot in tags/title/project."""
+    cached = cache.load_page(page.pageId)
+    if cached is None:
+        return True
+    return (
+        cached.tags != page.tags
+        or cached.title != page.title
+        or cached.projectId != page.projectId
+    )
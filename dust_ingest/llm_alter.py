@@ -7,16 +7,18 @@ with ``<FAKE: ...>`` or ``<MISLEADING: ...>`` tags.
 
 from __future__ import annotations
 
+import hashlib
 import html
 import json
 import logging
 import re
-import uuid
+import time
 
 import httpx
 from bs4 import BeautifulSoup, Tag
 from openai import OpenAI
 
+from dust_ingest import llm_usage, progress, tracing
 from dust_ingest.models import (
     AlteredPage,
     FakeMark,
@@ -25,8 +27,16 @@ from dust_ingest.models import (
     PageSnapshot,
     PageVariant,
     PipelineConfig,
+    Section,
+)
+from dust_ingest.variant_validation import (
+    count_text_sections,
+    element_texts,
+    remember_element_texts,
+    remember_text_elements,
+    text_element_count,
+    validate_page_variant,
 )
-from dust_ingest.variant_validation import validate_page_variant
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +55,8 @@ _TEXT_HTML_TAGS = (
     "h1", "h2", "h3", "h4", "h5", "h6",
     "p", "li", "blockquote", "figcaption", "pre", "code", "td", "th",
 )
+# Tags whose sentence fragments are merged into the preceding section.
+_MERGEABLE_TAGS = ("p", "blockquote", "figcaption", "pre", "code", "td", "th")
 
 # Patterns in page title or content that indicate a failed/error page.
 _BAD_PAGE_TITLE_PATTERNS = [
@@ -180,36 +192,49 @@ def _build_user_prompt(page: PageSnapshot) -> str:
     )
 
 
-def _elements_to_html(elements: list[dict]) -> str:
-    """Render altered element objects into a compact HTML snippet."""
-    lines: list[str] = []
+def _elements_to_sections(elements: list[dict]) -> list[Section]:
+    """Altered element objects as sections, dropping ones with no content."""
+    sections: list[Section] = []
     for idx, el in enumerate(elements):
         element_id = str(el.get("elementId") or f"el-{idx}")
         tag = str(el.get("type") or "p").lower()
-        safe_id = html.escape(element_id, quote=True)
 
         if tag == "img":
             src = str(el.get("src") or "").strip()
             if not src:
                 continue
-            alt = str(el.get("alt") or "")
-            lines.append(
-                f'<img data-element-id="{safe_id}" src="{html.escape(src, quote=True)}" '
-                f'alt="{html.escape(alt, quote=True)}" />'
-            )
+            sections.append(Section(element_id, "img", src=src, alt=str(el.get("alt") or "")))
             continue
 
         text = str(el.get("text") or "").strip()
         if not text:
             continue
-        safe_tag = tag if tag in _TEXT_TAGS else "p"
-        lines.append(
-            f'<{safe_tag} data-element-id="{safe_id}">{html.escape(text)}</{safe_tag}>'
-        )
+        sections.append(Section(element_id, tag if tag in _TEXT_TAGS else "p", text))
+    return sections
 
+
+def _render_sections(sections: list[Section]) -> str:
+    """Render sections into a compact HTML snippet."""
+    lines: list[str] = []
+    for s in sections:
+        safe_id = html.escape(s.elementId, quote=True)
+        if s.tag == "img":
+            lines.append(
+                f'<img data-element-id="{safe_id}" src="{html.escape(s.src, quote=True)}" '
+                f'alt="{html.escape(s.alt, quote=True)}"/>'
+            )
+        else:
+            lines.append(
+                f'<{s.tag} data-element-id="{safe_id}">{html.escape(s.text, quote=False)}</{s.tag}>'
+            )
     return "\n".join(lines)
 
 
+def _elements_to_html(elements: list[dict]) -> str:
+    """Render altered element objects into a compact HTML snippet."""
+    return _render_sections(_elements_to_sections(elements))
+
+
 def _strip_h2_sections(html_content: str) -> str:
     """Remove all <h2> tags and their contents from HTML content."""
     if not html_content.strip():
@@ -231,6 +256,50 @@ def _ends_with_sentence(text: str) -> bool:
     return last_end == len(normalized)
 
 
+class _FragmentMerger:
+    """Merges sentence fragments into the section before them.
+
+    A section is merged into the current one when the current one does not
+    end a sentence, or when it is itself a short fragment.  The current
+    section's words are kept as a running list, and whether it ends a
+    sentence is known from the last fragment merged in, so each text is
+    split and scanned once however many fragments a section absorbs.
+    """
+
+    __slots__ = ("_text", "_words", "_complete")
+
+    def __init__(self) -> None:
+        self._text: str | None = None  # current section's own text
+        self._words: list[str] | None = None  # set once it absorbs a fragment
+        self._complete = False
+
+    def take(self, text: str) -> tuple[bool, str | None]:
+        """Offer the next mergeable section's non-empty *text*.
+
+        Returns ``(merged, finished)``.  *merged* says whether *text* went
+        into the current section, in which case the caller drops its
+        section.  Otherwise it becomes the current section, and *finished*
+        is the final text of the one it replaces (None if unchanged).
+        """
+        text_complete = _ends_with_sentence(text)
+        if self._text is not None:
+            text_words = None if text_complete else text.split()
+            if not self._complete or (text_words is not None and len(text_words) <= 14):
+                if self._words is None:
+                    self._words = self._text.split()
+                self._words.extend(text.split() if text_words is None else text_words)
+                # The merged text ends with this fragment's words.
+                self._complete = text_complete
+                return True, None
+        finished = self.finish()
+        self._text, self._words, self._complete = text, None, text_complete
+        return False, finished
+
+    def finish(self) -> str | None:
+        """Final text of the current section, or None if it absorbed nothing."""
+        return None if self._words is None else " ".join(self._words)
+
+
 def _normalize_text_sections(html_content: str) -> str:
     """Normalize sections: remove h2, remove li tags, merge fragments."""
     if not html_content.strip():
@@ -247,9 +316,10 @@ def _normalize_text_sections(html_content: str) -> str:
         tag.name = "p"
 
     # Merge sentence fragments so we avoid sections smaller than a sentence.
-    mergeable_tags = ("p", "blockquote", "figcaption", "pre", "code", "td", "th")
+    # A tag that absorbs fragments is emptied at once and filled when done.
+    merger = _FragmentMerger()
     previous: Tag | None = None
-    for tag in list(soup.find_all(mergeable_tags)):
+    for tag in list(soup.find_all(_MERGEABLE_TAGS)):
         if not isinstance(tag, Tag):
             continue
         text = tag.get_text(separator=" ", strip=True)
@@ -257,31 +327,49 @@ def _normalize_text_sections(html_content: str) -> str:
             tag.decompose()
             continue
 
-        if previous is None:
-            previous = tag
-            continue
-
-        prev_text = previous.get_text(separator=" ", strip=True)
-        if not prev_text:
-            previous = tag
-            continue
-
-        prev_complete = _ends_with_sentence(prev_text)
-        current_complete = _ends_with_sentence(text)
-        current_short_fragment = (not current_complete) and len(text.split()) <= 14
-        if (not prev_complete) or current_short_fragment:
-            merged = f"{prev_text} {text}".replace("\n", " ")
-            merged = " ".join(merged.split()).strip()
-            previous.clear()
-            previous.append(merged)
+        merged, finished = merger.take(text)
+        if merged:
+            previous.clear()  # type: ignore[union-attr]
             tag.decompose()
             continue
-
+        if finished is not None:
+            previous.append(finished)  # type: ignore[union-attr]
         previous = tag
 
+    finished = merger.finish()
+    if finished is not None:
+        previous.append(finished)  # type: ignore[union-attr]
     return str(soup)
 
 
+def _normalize_sections(sections: list[Section]) -> list[Section]:
+    """:func:`_normalize_text_sections` for content still held as sections."""
+    out: list[Section] = []
+    merger = _FragmentMerger()
+    previous = -1  # index in *out* of the current mergeable section
+    for section in sections:
+        if section.tag == "h2":
+            continue
+        if section.tag == "li":
+            section = section._replace(tag="p")
+        if section.tag not in _MERGEABLE_TAGS:
+            out.append(section)
+            continue
+
+        merged, finished = merger.take(section.text)
+        if merged:
+            continue
+        if finished is not None:
+            out[previous] = out[previous]._replace(text=finished)
+        previous = len(out)
+        out.append(section)
+
+    finished = merger.finish()
+    if finished is not None:
+        out[previous] = out[previous]._replace(text=finished)
+    return out
+
+
 def _parse_response(
     raw: str,
     original_elements: list[PageElement] | None = None,
@@ -343,10 +431,13 @@ def _parse_response(
                     # a legitimate alteration); otherwise restore original.
                     if not el.get("alt") and orig.alt:
                         el["alt"] = orig.alt
-        altered = _elements_to_html(altered)
-    elif not isinstance(altered, str):
+        with tracing.span("alter.normalize"):
+            sections = _normalize_sections(_elements_to_sections(altered))
+        return _altered_from_sections(sections, marks)
+    if not isinstance(altered, str):
         altered = json.dumps(altered, ensure_ascii=False)
-    altered = _normalize_text_sections(altered)
+    with tracing.span("alter.normalize"):
+        altered = _normalize_text_sections(altered)
 
     return AlteredPage(
         alteredContent=altered,
@@ -354,6 +445,21 @@ def _parse_response(
     )
 
 
+def _altered_from_sections(sections: list[Section], marks: list[FakeMark]) -> AlteredPage:
+    """Render *sections* once and keep them, and their text count, alongside."""
+    altered = AlteredPage(alteredContent=_render_sections(sections), fakeMarks=marks)
+    altered._sections = sections
+    remember_text_elements(altered, count_text_sections(sections))
+    return altered
+
+
+def _with_fallback_snippet(text: str) -> str:
+    # Append fallback snippet without inline tags - fakeMarks handles detection
+    if text.endswith((".", "!", "?")):
+        return f"{text} {_FALLBACK_FAKE_SNIPPET}"
+    return f"{text}. {_FALLBACK_FAKE_SNIPPET}"
+
+
 def _ensure_minimum_fake(altered: AlteredPage) -> AlteredPage:
     """Guarantee at least one fake mark by injecting a safe fallback if needed."""
     if altered.fakeMarks:
@@ -361,6 +467,22 @@ def _ensure_minimum_fake(altered: AlteredPage) -> AlteredPage:
     if not altered.alteredContent.strip():
         return altered
 
+    sections = altered._sections
+    if sections is not None:
+        for i, section in enumerate(sections):
+            if section.tag not in _TEXT_HTML_TAGS or not section.text:
+                continue
+            patched = [*sections]
+            patched[i] = section._replace(text=_with_fallback_snippet(section.text))
+            mark = FakeMark(
+                kind="MISLEADING",
+                elementId=section.elementId,
+                snippet=_FALLBACK_FAKE_SNIPPET,
+                explanation=_FALLBACK_FAKE_EXPLANATION,
+            )
+            return _altered_from_sections(patched, [mark])
+        return altered
+
     soup = BeautifulSoup(altered.alteredContent, "html.parser")
     for tag in soup.find_all(_TEXT_HTML_TAGS):
         if not isinstance(tag, Tag):
@@ -369,13 +491,8 @@ def _ensure_minimum_fake(altered: AlteredPage) -> AlteredPage:
         if not text:
             continue
 
-        # Append fallback snippet without inline tags - fakeMarks handles detection
-        if text.endswith((".", "!", "?")):
-            patched_text = f"{text} {_FALLBACK_FAKE_SNIPPET}"
-        else:
-            patched_text = f"{text}. {_FALLBACK_FAKE_SNIPPET}"
         tag.clear()
-        tag.append(patched_text)
+        tag.append(_with_fallback_snippet(text))
 
         mark = FakeMark(
             kind="MISLEADING",
@@ -411,31 +528,50 @@ def alter_page(
     """
     if client is None:
         client = OpenAI(api_key=config.llm_api_key, base_url=config.llm_base_url)
-    system = _build_system_prompt(params, difficulty)
-    user_prompt = _build_user_prompt(page)
+    with tracing.span("alter.prompt", page=page.pageId):
+        system = _build_system_prompt(params, difficulty)
+        user_prompt = _build_user_prompt(page)
 
     last_err: Exception | None = None
     no_fake_candidate: AlteredPage | None = None
+    out_of_budget = False
     for attempt in range(1, config.retries + 2):
+        if llm_usage.budget_exhausted():
+            tracing.count("llm.budget_skipped")
+            last_err = RuntimeError("LLM budget exhausted")
+            out_of_budget = True
+            break
+        if attempt > 1:
+            tracing.count("llm.retry")
+        response = None
+        outcome = "api_error"
+        t0 = time.perf_counter()
+        latency: float | None = None
         try:
             user_content = user_prompt if attempt == 1 else (
                 user_prompt + "\n\nIMPORTANT: Return valid JSON only. "
                 "No markdown fences. No text outside the JSON object. "
                 "You MUST include at least one fakeMarks entry."
             )
-            response = client.chat.completions.create(
-                model=config.llm_model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user_content},
-                ],
-                response_format={"type": "json_object"},
-            )
+            with tracing.span("alter.llm_call", page=page.pageId):
+                response = client.chat.completions.create(
+                    model=config.llm_model,
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": user_content},
+                    ],
+                    response_format={"type": "json_object"},
+                )
+            latency = time.perf_counter() - t0
             text = response.choices[0].message.content
-            parsed = _parse_response(text, original_elements=page.elements)
+            with tracing.span("alter.parse", page=page.pageId):
+                parsed = _parse_response(text, original_elements=page.elements)
             if parsed.fakeMarks:
+                outcome = "ok"
                 return parsed
 
+            outcome = "no_fake_marks"
+            tracing.count("llm.no_fake_marks")
             no_fake_candidate = parsed
             last_err = ValueError("Model returned no fakeMarks")
             logger.warning(
@@ -444,6 +580,8 @@ def alter_page(
                 config.retries + 1,
             )
         except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as exc:
+            outcome = "parse_error"
+            tracing.count("llm.parse_error")
             last_err = exc
             logger.warning(
                 "LLM JSON parse failed (attempt %d/%d): %s",
@@ -452,8 +590,15 @@ def alter_page(
                 exc,
             )
         except Exception as exc:
+            tracing.count("llm.api_error")
             last_err = exc
             logger.exception("LLM API error (attempt %d)", attempt)
+        finally:
+            llm_usage.record(
+                config, page.pageId, difficulty, attempt, outcome,
+                getattr(response, "usage", None),
+                latency if latency is not None else time.perf_counter() - t0,
+            )
 
     if no_fake_candidate is not None:
         ensured = _ensure_minimum_fake(no_fake_candidate)
@@ -464,6 +609,9 @@ def alter_page(
             )
             return ensured
 
+    if out_of_budget:
+        llm_usage.record_budget_skip()
+    tracing.count("llm.failed")
     logger.error("All LLM attempts failed for page %s: %s", page.pageId, last_err)
     # Return empty alteration rather than crashing
     return AlteredPage(alteredContent="", fakeMarks=[])
@@ -484,6 +632,72 @@ def _unassigned_difficulty(num_levels: int) -> int:
     return max(1, min(_EXTRA_DIFFICULTY, num_levels))
 
 
+def _plan_difficulty(level_counts: dict[int, int], num_levels: int) -> int:
+    """Claim the next provisional level slot and return its difficulty.
+
+    Falls back to the unassigned difficulty once every level is full.
+    """
+    for difficulty in range(1, num_levels + 1):
+        current = level_counts.get(difficulty, 0)
+        if current < _level_capacity(difficulty):
+            level_counts[difficulty] = current + 1
+            return difficulty
+    return _unassigned_difficulty(num_levels)
+
+
+def assign_level(
+    variant: PageVariant,
+    level_counts: dict[int, int],
+    project_id: str,
+    num_levels: int,
+) -> bool:
+    """Place *variant* into the first level with free capacity.
+
+    Mutates ``variant.difficulty`` / ``variant.levelId`` in place and
+    returns *True* if it landed in a level.  Variants that do not fit are
+    tagged with the project's unassigned level and *False* is returned.
+    """
+    for difficulty in range(1, num_levels + 1):
+        current = level_counts.get(difficulty, 0)
+        if current < _level_capacity(difficulty):
+            variant.difficulty = difficulty
+            variant.levelId = f"{project_id}_level_{difficulty:02d}"
+            level_counts[difficulty] = current + 1
+            return True
+    variant.difficulty = _unassigned_difficulty(num_levels)
+    variant.levelId = f"{project_id}_{_UNASSIGNED_LEVEL_SUFFIX}"
+    return False
+
+
+def make_llm_client(config: PipelineConfig, max_workers: int) -> OpenAI:
+    """Build a shared OpenAI client sized for *max_workers* threads."""
+    # Single shared client with explicit connection pool limits to avoid
+    # socket contention on Windows (WinError 10038).  Keep a few extra
+    # connections beyond max_workers for httpx's keep-alive headroom.
+    pool_size = max_workers + 5
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=max_workers,
+        ),
+        timeout=httpx.Timeout(90.0, connect=30.0),
+    )
+    return OpenAI(
+        api_key=config.llm_api_key,
+        base_url=config.llm_base_url,
+        http_client=http_client,
+    )
+
+
+def _variant_id(page_id: str, project_id: str) -> str:
+    """Deterministic variant ID: a build makes one variant per page and project.
+
+    Re-running a build over the same pages therefore updates the existing
+    Convex rows instead of adding a new set.
+    """
+    return hashlib.sha256(f"{project_id}/{page_id}".encode()).hexdigest()[:16]
+
+
 def _generate_one_variant(
     page: PageSnapshot,
     params: MutationParams,
@@ -493,21 +707,34 @@ def _generate_one_variant(
     client: OpenAI,
 ) -> PageVariant | None:
     """Generate a single valid variant (called from thread pool)."""
+    if llm_usage.budget_exhausted():
+        tracing.count("llm.budget_skipped")
+        llm_usage.record_budget_skip()
+        return None
     try:
-        altered = alter_page(page, params, difficulty, config, client=client)
-        candidate = PageVariant(
-            variantId=uuid.uuid4().hex[:16],
-            pageId=page.pageId,
-            # Assigned after all successful variants are known.
-            levelId="",
-            difficulty=difficulty,
-            alteredContent=altered.alteredContent,
-            fakeMarks=altered.fakeMarks,
-            projectId=project_id,
-        )
+        with tracing.span("alter.variant", page=page.pageId):
+            altered = alter_page(page, params, difficulty, config, client=client)
+            candidate = PageVariant(
+                variantId=_variant_id(page.pageId, project_id),
+                pageId=page.pageId,
+                # Assigned after all successful variants are known.
+                levelId="",
+                difficulty=difficulty,
+                alteredContent=altered.alteredContent,
+                fakeMarks=altered.fakeMarks,
+                projectId=project_id,
+                model=config.llm_model,
+            )
+            remember_text_elements(candidate, text_element_count(altered))
+            if altered._sections is not None:
+                remember_element_texts(
+                    candidate, element_texts(candidate.alteredContent, altered._sections),
+                )
 
-        is_valid, reason = validate_page_variant(candidate)
+            with tracing.span("alter.validate", page=page.pageId):
+                is_valid, reason = validate_page_variant(candidate)
         if not is_valid:
+            tracing.count("variant.invalid")
             logger.warning(
                 "Skipping page %s difficulty %d â€” %s",
                 page.pageId,
@@ -517,6 +744,7 @@ def _generate_one_variant(
             return None
         return candidate
     except Exception:
+        tracing.count("alter.exception")
         logger.exception(
             "Failed to generate variant for page %s difficulty %d",
             page.pageId,
@@ -569,35 +797,17 @@ def generate_variants(
     Work = tuple[int, PageSnapshot, MutationParams, int, str]
     work: list[Work] = []
     level_counts: dict[int, int] = {}
-    extra_difficulty = _unassigned_difficulty(num_levels)
     for idx, page in enumerate(valid_pages):
-        assigned = False
-        for difficulty in range(1, num_levels + 1):
-            cap = _level_capacity(difficulty)
-            current = level_counts.get(difficulty, 0)
-            if current < cap:
-                work.append(
-                    (
-                        idx,
-                        page,
-                        _mutation_params(difficulty, num_levels),
-                        difficulty,
-                        project_id,
-                    )
-                )
-                level_counts[difficulty] = current + 1
-                assigned = True
-                break
-        if not assigned:
-            work.append(
-                (
-                    idx,
-                    page,
-                    _mutation_params(extra_difficulty, num_levels),
-                    extra_difficulty,
-                    project_id,
-                )
+        difficulty = _plan_difficulty(level_counts, num_levels)
+        work.append(
+            (
+                idx,
+                page,
+                _mutation_params(difficulty, num_levels),
+                difficulty,
+                project_id,
             )
+        )
 
     logger.info(
         "Generating up to %d variants across %d levels with %d threads",
@@ -606,22 +816,8 @@ def generate_variants(
         max_workers,
     )
 
-    # Single shared client with explicit connection pool limits to avoid
-    # socket contention on Windows (WinError 10038).  Keep a few extra
-    # connections beyond max_workers for httpx's keep-alive headroom.
-    pool_size = max_workers + 5
-    http_client = httpx.Client(
-        limits=httpx.Limits(
-            max_connections=pool_size,
-            max_keepalive_connections=max_workers,
-        ),
-        timeout=httpx.Timeout(90.0, connect=30.0),
-    )
-    client = OpenAI(
-        api_key=config.llm_api_key,
-        base_url=config.llm_base_url,
-        http_client=http_client,
-    )
+    client = make_llm_client(config, max_workers)
+    progress.add_total("alter", len(work))
 
     completed: list[tuple[int, PageVariant]] = []
     with ThreadPoolExecutor(max_workers=max_workers) as pool:
@@ -640,6 +836,7 @@ def generate_variants(
         for future in as_completed(futures):
             idx, pid, diff = futures[future]
             variant = future.result()
+            progress.advance("alter", 0 if variant is None else 1, failed=variant is None)
             if variant is not None:
                 completed.append((idx, variant))
                 logger.info(
@@ -657,23 +854,11 @@ def generate_variants(
     level_assigned: list[PageVariant] = []
     leftovers = 0
     level_counts = {}
-    unassigned_level_id = f"{project_id}_{_UNASSIGNED_LEVEL_SUFFIX}"
     for variant in all_variants:
-        assigned = False
-        for difficulty in range(1, num_levels + 1):
-            cap = _level_capacity(difficulty)
-            current = level_counts.get(difficulty, 0)
-            if current < cap:
-                variant.difficulty = difficulty
-                variant.levelId = f"{project_id}_level_{difficulty:02d}"
-                level_counts[difficulty] = current + 1
-                level_assigned.append(variant)
-                assigned = True
-                break
-        if not assigned:
+        if assign_level(variant, level_counts, project_id, num_levels):
+            level_assigned.append(variant)
+        else:
             leftovers += 1
-            variant.difficulty = extra_difficulty
-            variant.levelId = unassigned_level_id
 
     logger.info(
         "Generated %d valid variants (%d assigned to levels, %d leftovers)",
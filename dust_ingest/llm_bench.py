@@ -0,0 +1,182 @@
+"""Phase 2 load harness against the local LLM stand-in.
+
+Runs the real :func:`~dust_ingest.llm_alter.generate_variants` (prompt
+building, OpenAI client, retries, parsing, normalisation, validation,
+level assignment) against a fresh :class:`~dust_ingest.mock_llm.MockLLM`
+for every combination of worker count and page count.  It reports:
+
+* throughput — pages and valid variants per second;
+* tail latency — p50 / p95 / p99 of the whole per-page variant
+  (``alter.variant``) and of single LLM calls (``alter.llm_call``);
+* retry amplification — HTTP requests the server saw per page, which
+  includes the OpenAI client's own 429 retries, and application-level
+  attempts per page;
+* memory — peak RSS of the process and, with ``trace_memory``, the peak
+  Python heap during the run (``tracemalloc`` slows CPU-bound work).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+from dust_ingest import llm_usage, tracing
+from dust_ingest.llm_alter import generate_variants
+from dust_ingest.mock_llm import MockLLM
+from dust_ingest.models import PageSnapshot, PipelineConfig
+from dust_ingest.upload_bench import synthetic_records
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoadRow:
+    """One workers × pages measurement."""
+    workers: int
+    pages: int
+    variants: int
+    seconds: float
+    variant_p50_ms: float
+    variant_p95_ms: float
+    variant_p99_ms: float
+    call_p99_ms: float
+    http_requests: int
+    attempts: int
+    peak_rss_mb: float | None
+    heap_peak_mb: float | None
+    server: dict = field(default_factory=dict)
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def amplification(self) -> float:
+        """HTTP requests per page (1.0 = no retries of any kind)."""
+        return self.http_requests / self.pages if self.pages else 0.0
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux (bytes on macOS, where this overstates 1024×).
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_load(
+    pages: list[PageSnapshot],
+    *,
+    workers: int,
+    server_options: dict,
+    num_levels: int = 10,
+    retries: int = 2,
+    trace_memory: bool = False,
+) -> LoadRow:
+    """Run Phase 2 on *pages* with *workers* threads against a fresh mock."""
+    with MockLLM(seed=0, **server_options) as server:
+        config = PipelineConfig(
+            apify_token="", llm_api_key="mock", convex_url="",
+            llm_base_url=server.url, llm_model="mock", retries=retries,
+        )
+        llm_usage.reset()
+        tracing.enable()
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            variants, _ = generate_variants(
+                pages, config, "bench", num_levels=num_levels, max_workers=workers,
+            )
+        finally:
+            seconds = time.perf_counter() - started
+            heap_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+            spans = tracing.report().get("spans", {})
+            tracing.disable()
+
+    variant_span = spans.get("alter.variant", {})
+    return LoadRow(
+        workers=workers,
+        pages=len(pages),
+        variants=len(variants),
+        seconds=seconds,
+        variant_p50_ms=variant_span.get("p50Ms", 0.0),
+        variant_p95_ms=variant_span.get("p95Ms", 0.0),
+        variant_p99_ms=variant_span.get("p99Ms", 0.0),
+        call_p99_ms=spans.get("alter.llm_call", {}).get("p99Ms", 0.0),
+        http_requests=server.stats.requests,
+        attempts=llm_usage.summary()["totals"]["attempts"],
+        peak_rss_mb=_peak_rss_mb(),
+        heap_peak_mb=heap_peak / 1e6 if heap_peak is not None else None,
+        server=server.stats.snapshot(),
+    )
+
+
+def run_load_grid(
+    *,
+    worker_counts: list[int],
+    page_counts: list[int],
+    server_options: dict,
+    num_levels: int = 10,
+    trace_memory: bool = False,
+) -> list[LoadRow]:
+    """Run :func:`run_load` for every ``(pages, workers)`` pair."""
+    rows: list[LoadRow] = []
+    corpus, _, _ = synthetic_records(max(page_counts), html_bytes=0, num_levels=num_levels)
+    # Per-page INFO, per-attempt WARNING and the OpenAI client's retry lines
+    # would drown the table; the injected failures are counted instead.
+    quiet = [logging.getLogger(name) for name in ("dust_ingest.llm_alter", "openai")]
+    previous_levels = [lg.level for lg in quiet]
+    for lg in quiet:
+        lg.setLevel(logging.ERROR)
+    try:
+        for num_pages in page_counts:
+            for workers in worker_counts:
+                row = run_load(
+                    corpus[:num_pages], workers=workers,
+                    server_options=server_options, num_levels=num_levels,
+                    trace_memory=trace_memory,
+                )
+                rows.append(row)
+                logger.info(
+                    "pages=%d workers=%d: %.1f pages/s, p99 %.0f ms, %.2fx requests",
+                    num_pages, workers, row.pages_per_sec, row.variant_p99_ms,
+                    row.amplification,
+                )
+    finally:
+        for lg, level in zip(quiet, previous_levels):
+            lg.setLevel(level)
+    return rows
+
+
+def format_table(rows: list[LoadRow]) -> str:
+    """Render *rows* as a fixed-width text table."""
+    header = (
+        f"{'pages':>6} {'workers':>7} {'ok':>6} {'secs':>7} {'pages/s':>8} "
+        f"{'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'call p99':>8} "
+        f"{'req/page':>8} {'try/page':>8} {'429':>5} {'bad':>5} {'RSS MB':>7} {'heap MB':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        bad = r.server.get("malformed", 0) + r.server.get("noFakeMarks", 0)
+        lines.append(
+            f"{r.pages:>6} {r.workers:>7} {r.variants:>6} {r.seconds:>7.2f} "
+            f"{r.pages_per_sec:>8.1f} {r.variant_p50_ms:>7.0f} {r.variant_p95_ms:>7.0f} "
+            f"{r.variant_p99_ms:>7.0f} {r.call_p99_ms:>8.0f} {r.amplification:>8.2f} "
+            f"{r.attempts / r.pages if r.pages else 0:>8.2f} "
+            f"{r.server.get('rateLimited', 0):>5} {bad:>5} "
+            f"{_mb(r.peak_rss_mb):>7} {_mb(r.heap_peak_mb):>7}"
+        )
+    return "\n".join(lines)
+
+
+def _mb(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
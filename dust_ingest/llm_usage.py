@@ -0,0 +1,259 @@
+"""LLM token, latency and cost accounting with optional run budgets.
+
+:func:`~dust_ingest.llm_alter.alter_page` records every attempt, including
+ones whose output is thrown away (no fake marks, unparsable JSON, API
+errors), with its prompt / completion / cached token counts from
+``response.usage`` and the request latency.  :func:`summary` aggregates
+them by model, difficulty, outcome and page.
+
+Cost uses the per-million-token prices in :class:`PipelineConfig`
+(``llm_price_input`` / ``llm_price_output`` / ``llm_price_cached``); with
+the default prices of 0 only tokens are tracked.
+
+Budgets (``--max-tokens-total``, ``--max-cost``) are checked before each
+LLM call: once one is reached no new calls start.  Calls already in flight
+still finish, so a run can overshoot by up to ``concurrency`` calls.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+from dust_ingest.models import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Attempt:
+    """One LLM request."""
+    pageId: str
+    difficulty: int
+    model: str
+    attempt: int
+    outcome: str  # ok | no_fake_marks | parse_error | api_error
+    promptTokens: int
+    completionTokens: int
+    cachedTokens: int
+    latencyMs: float
+    cost: float
+
+
+def _usage_counts(usage: Any) -> tuple[int, int, int]:
+    """``(prompt, completion, cached)`` tokens from an OpenAI ``usage`` object."""
+    if usage is None:
+        return 0, 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or 0
+    return (
+        getattr(usage, "prompt_tokens", None) or 0,
+        getattr(usage, "completion_tokens", None) or 0,
+        cached,
+    )
+
+
+class UsageTracker:
+    """Thread-safe accumulator of :class:`Attempt` records."""
+
+    def __init__(
+        self,
+        *,
+        max_tokens: int | None = None,
+        max_cost: float | None = None,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.attempts: list[Attempt] = []
+        self.total_tokens = 0
+        self.total_cost = 0.0
+        self.skipped = 0
+        self._warned = False
+        self._warned_price = False
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        config: PipelineConfig,
+        page_id: str,
+        difficulty: int,
+        attempt: int,
+        outcome: str,
+        usage: Any,
+        latency: float,
+    ) -> Attempt:
+        prompt, completion, cached = _usage_counts(usage)
+        cached_price = (
+            config.llm_price_cached
+            if config.llm_price_cached is not None
+            else config.llm_price_input
+        )
+        cost = (
+            (prompt - cached) * config.llm_price_input
+            + cached * cached_price
+            + completion * config.llm_price_output
+        ) / 1_000_000
+        record = Attempt(
+            pageId=page_id,
+            difficulty=difficulty,
+            model=config.llm_model,
+            attempt=attempt,
+            outcome=outcome,
+            promptTokens=prompt,
+            completionTokens=completion,
+            cachedTokens=cached,
+            latencyMs=round(latency * 1000, 1),
+            cost=cost,
+        )
+        with self._lock:
+            self.attempts.append(record)
+            self.total_tokens += prompt + completion
+            self.total_cost += cost
+            if self.max_cost is not None and not cost and prompt and not self._warned_price:
+                self._warned_price = True
+                logger.warning(
+                    "--max-cost is set but LLM_PRICE_INPUT/LLM_PRICE_OUTPUT are 0 — "
+                    "the cost budget will never be reached"
+                )
+        return record
+
+    def exhausted(self) -> bool:
+        """Return True once a token or cost budget has been reached."""
+        with self._lock:
+            return (
+                (self.max_tokens is not None and self.total_tokens >= self.max_tokens)
+                or (self.max_cost is not None and self.total_cost >= self.max_cost)
+            )
+
+    def skip(self) -> None:
+        """Count one variant abandoned because the budget was reached."""
+        with self._lock:
+            self.skipped += 1
+            if not self._warned:
+                self._warned = True
+                logger.warning(
+                    "LLM budget reached (%d tokens, $%.4f) — no new LLM calls "
+                    "will be started",
+                    self.total_tokens, self.total_cost,
+                )
+
+    def summary(self) -> dict[str, Any]:
+        """Totals plus breakdowns by model, difficulty, outcome and page."""
+        with self._lock:
+            attempts = list(self.attempts)
+            skipped = self.skipped
+
+        def bucket() -> dict[str, float]:
+            return {
+                "attempts": 0, "promptTokens": 0, "completionTokens": 0,
+                "cachedTokens": 0, "cost": 0.0, "latencyMs": 0.0,
+            }
+
+        def add(target: dict[str, float], a: Attempt) -> None:
+            target["attempts"] += 1
+            target["promptTokens"] += a.promptTokens
+            target["completionTokens"] += a.completionTokens
+            target["cachedTokens"] += a.cachedTokens
+            target["cost"] += a.cost
+            target["latencyMs"] += a.latencyMs
+
+        totals = bucket()
+        wasted = bucket()
+        groups: dict[str, dict[Any, dict[str, float]]] = {
+            "byModel": defaultdict(bucket),
+            "byDifficulty": defaultdict(bucket),
+            "byOutcome": defaultdict(bucket),
+            "byPage": defaultdict(bucket),
+        }
+        for a in attempts:
+            add(totals, a)
+            if a.outcome != "ok":
+                add(wasted, a)
+            add(groups["byModel"][a.model], a)
+            add(groups["byDifficulty"][str(a.difficulty)], a)
+            add(groups["byOutcome"][a.outcome], a)
+            add(groups["byPage"][a.pageId], a)
+
+        for target in [totals, wasted, *(b for g in groups.values() for b in g.values())]:
+            target["cost"] = round(target["cost"], 6)
+            target["latencyMs"] = round(target["latencyMs"], 1)
+
+        latencies = sorted(a.latencyMs for a in attempts)
+
+        def pct(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, max(0, round(p / 100 * len(latencies)) - 1))]
+
+        return {
+            "totals": totals,
+            "discarded": wasted,
+            "latencyMs": {"p50": pct(50), "p95": pct(95), "p99": pct(99)},
+            "budget": {
+                "maxTokens": self.max_tokens,
+                "maxCost": self.max_cost,
+                "skippedVariants": skipped,
+            },
+            **{name: dict(group) for name, group in groups.items()},
+        }
+
+
+_tracker = UsageTracker()
+
+
+def reset(*, max_tokens: int | None = None, max_cost: float | None = None) -> UsageTracker:
+    """Start a fresh tracker for a run, with optional budgets."""
+    global _tracker
+    _tracker = UsageTracker(max_tokens=max_tokens, max_cost=max_cost)
+    return _tracker
+
+
+def get_tracker() -> UsageTracker:
+    return _tracker
+
+
+def record(
+    config: PipelineConfig,
+    page_id: str,
+    difficulty: int,
+    attempt: int,
+    outcome: str,
+    usage: Any,
+    latency: float,
+) -> Attempt:
+    """Record one LLM attempt on the current tracker."""
+    return _tracker.record(config, page_id, difficulty, attempt, outcome, usage, latency)
+
+
+def budget_exhausted() -> bool:
+    """Return True if the current run's LLM budget has been reached."""
+    return _tracker.exhausted()
+
+
+def record_budget_skip() -> None:
+    """Count a variant not generated because the LLM budget was reached."""
+    _tracker.skip()
+
+
+def summary() -> dict[str, Any]:
+    return _tracker.summary()
+
+
+def log_summary() -> None:
+    """Log one line of totals for the current run."""
+    data = _tracker.summary()
+    totals, discarded = data["totals"], data["discarded"]
+    if not totals["attempts"]:
+        return
+    logger.info(
+        "LLM usage: %d calls, %d prompt (%d cached) + %d completion tokens, "
+        "$%.4f; %d discarded calls used %d tokens ($%.4f)",
+        totals["attempts"], totals["promptTokens"], totals["cachedTokens"],
+        totals["completionTokens"], totals["cost"],
+        discarded["attempts"],
+        discarded["promptTokens"] + discarded["completionTokens"],
+        discarded["cost"],
+    )
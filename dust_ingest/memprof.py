@@ -0,0 +1,272 @@
+"""Per-phase memory profiling with tracemalloc (``--profile-memory``).
+
+Code marks phases with ``with memprof.phase("alter"):``; the CLI wraps the
+whole command in one more.  Like :func:`tracing.span`, this is a no-op
+until :func:`enable` is called.  When enabled, each phase records:
+
+* ``peakMb`` — the highest traced Python memory while it ran;
+* ``retainedMb`` / ``deltaMb`` — traced memory at its end, and the change
+  over the phase;
+* ``topSites`` — the source lines holding the most retained memory;
+* ``ownedBy`` — the same memory attributed to the innermost
+  ``dust_ingest`` frame that allocated it.  A string built inside
+  BeautifulSoup is charged to the pipeline line that called it, which
+  shows *which pipeline structure* (page HTML, element lists, variants, …)
+  dominates;
+* ``diff`` / ``ownedByDiff`` — what changed between the start and end of
+  the phase, largest first.  Growth that survives a phase which should
+  have released it points at a leak or over-retention.
+
+Phases can nest; a parent's peak includes its children.  Tracing slows
+allocation-heavy work such as HTML parsing several times over, so use it
+to find where memory goes, not to time a run.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import linecache
+import logging
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 15
+
+_PACKAGE = Path(__file__).resolve().parent
+_SELF = str(Path(__file__).resolve())
+_OUTSIDE = ("<outside dust_ingest>", 0)
+
+def _site(filename: str, lineno: int) -> str:
+    path = Path(filename)
+    try:
+        name = path.resolve().relative_to(_PACKAGE.parent).as_posix()
+    except ValueError:
+        name = "/".join(path.parts[-2:])
+    return f"{name}:{lineno}"
+
+
+def _mb(n: float) -> float:
+    return round(n / 1e6, 3)
+
+
+def _scan(
+    snapshot: tracemalloc.Snapshot,
+) -> tuple[tracemalloc.Snapshot, dict[tuple[str, int], list[int]]]:
+    """Drop the profiler's own allocations and group the rest by owner.
+
+    Returns the filtered snapshot and ``{(file, line): [bytes, blocks]}``
+    keyed by the innermost package frame.  One pass over the raw trace
+    tuples: ``Snapshot.filter_traces`` with ``all_frames`` and the public
+    ``Traceback`` objects are both far too slow for 100k+ traces.
+    """
+    owners: dict[tuple[str, int], list[int]] = defaultdict(lambda: [0, 0])
+    in_package: dict[str, bool] = {}
+    package = str(_PACKAGE)
+    kept = []
+    for trace in snapshot.traces._traces:
+        # (domain, size, frames most recent first, total frames)
+        key = _OUTSIDE
+        for filename, lineno in trace[2]:
+            inside = in_package.get(filename)
+            if inside is None:
+                inside = in_package[filename] = filename.startswith(package)
+            if inside:
+                key = (filename, lineno)
+                break
+        if key[0] == _SELF:
+            continue
+        kept.append(trace)
+        owner = owners[key]
+        owner[0] += trace[1]
+        owner[1] += 1
+    return tracemalloc.Snapshot(kept, snapshot.traceback_limit), owners
+
+
+def _total(owners: dict[tuple[str, int], list[int]]) -> int:
+    return sum(size for size, _ in owners.values())
+
+
+def _owner_rows(owners: dict[tuple[str, int], list[int]]) -> list[dict[str, Any]]:
+    ranked = sorted(owners.items(), key=lambda kv: kv[1][0], reverse=True)[:TOP_N]
+    return [
+        {
+            "site": _site(f, n) if n else f,
+            "line": linecache.getline(f, n).strip() if n else "",
+            "sizeMb": _mb(size),
+            "blocks": count,
+        }
+        for (f, n), (size, count) in ranked
+    ]
+
+
+def _owner_diff(
+    before: dict[tuple[str, int], list[int]],
+    after: dict[tuple[str, int], list[int]],
+) -> list[dict[str, Any]]:
+    keys = set(before) | set(after)
+    changes = [
+        (k, after.get(k, [0, 0])[0] - before.get(k, [0, 0])[0],
+         after.get(k, [0, 0])[1] - before.get(k, [0, 0])[1])
+        for k in keys
+    ]
+    changes = [c for c in changes if c[1]]
+    changes.sort(key=lambda c: abs(c[1]), reverse=True)
+    return [
+        {
+            "site": _site(f, n) if n else f,
+            "line": linecache.getline(f, n).strip() if n else "",
+            "sizeDiffMb": _mb(size),
+            "blocksDiff": count,
+        }
+        for (f, n), size, count in changes[:TOP_N]
+    ]
+
+
+class _Frame:
+    __slots__ = ("name", "started", "peak", "snapshot", "owners")
+
+    def __init__(
+        self, name: str, snapshot: tracemalloc.Snapshot,
+        owners: dict[tuple[str, int], list[int]],
+    ) -> None:
+        self.name = name
+        self.snapshot = snapshot
+        self.owners = owners
+        self.peak = 0
+        self.started = time.perf_counter()
+
+
+class _Profiler:
+    def __init__(self, nframes: int) -> None:
+        self.nframes = nframes
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.stack: list[_Frame] = []
+        self.phases: list[dict[str, Any]] = []
+        # Traced bytes held by the profiler itself (open phases' start
+        # snapshots, finished records), subtracted from every peak.
+        self.overhead = 0
+
+    def _snapshot(self) -> tuple[tracemalloc.Snapshot, dict[tuple[str, int], list[int]]]:
+        return _scan(tracemalloc.take_snapshot())
+
+    def _fold_peak(self) -> None:
+        """Credit the peak so far to every open phase."""
+        peak = tracemalloc.get_traced_memory()[1] - self.overhead
+        for frame in self.stack:
+            frame.peak = max(frame.peak, peak)
+
+    def _rebase(self, owners: dict[tuple[str, int], list[int]]) -> None:
+        """Re-measure the profiler's overhead and restart peak tracking."""
+        self.overhead = max(0, tracemalloc.get_traced_memory()[0] - _total(owners))
+        tracemalloc.reset_peak()
+
+    def enter(self, name: str) -> None:
+        self._fold_peak()
+        snapshot, owners = self._snapshot()
+        self.stack.append(_Frame(name, snapshot, owners))
+        self._rebase(owners)
+
+    def exit(self) -> dict[str, Any]:
+        self._fold_peak()
+        frame = self.stack.pop()
+        seconds = time.perf_counter() - frame.started
+        snapshot, owners = self._snapshot()
+        retained, before = _total(owners), _total(frame.owners)
+        diff = [s for s in snapshot.compare_to(frame.snapshot, "lineno") if s.size_diff]
+        diff.sort(key=lambda s: abs(s.size_diff), reverse=True)
+        record = {
+            "phase": "/".join([f.name for f in self.stack] + [frame.name]),
+            "seconds": round(seconds, 3),
+            "peakMb": _mb(max(frame.peak, retained)),
+            "retainedMb": _mb(retained),
+            "deltaMb": _mb(retained - before),
+            "topSites": [
+                {
+                    "site": _site(s.traceback[0].filename, s.traceback[0].lineno),
+                    "sizeMb": _mb(s.size),
+                    "blocks": s.count,
+                }
+                for s in snapshot.statistics("lineno")[:TOP_N]
+            ],
+            "ownedBy": _owner_rows(owners),
+            "diff": [
+                {
+                    "site": _site(s.traceback[0].filename, s.traceback[0].lineno),
+                    "sizeDiffMb": _mb(s.size_diff),
+                    "blocksDiff": s.count_diff,
+                }
+                for s in diff[:TOP_N]
+            ],
+            "ownedByDiff": _owner_diff(frame.owners, owners),
+        }
+        self.phases.append(record)
+        del frame, snapshot, diff
+        self._rebase(owners)
+        return record
+
+
+_profiler: _Profiler | None = None
+
+
+def enable(nframes: int = 30) -> None:
+    """Start tracemalloc, keeping *nframes* of traceback per allocation."""
+    global _profiler
+    tracemalloc.start(nframes)
+    _profiler = _Profiler(nframes)
+
+
+def disable() -> None:
+    global _profiler
+    _profiler = None
+    tracemalloc.stop()
+
+
+def enabled() -> bool:
+    return _profiler is not None
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Profile the enclosed block as phase *name* (no-op when disabled)."""
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    profiler.enter(name)
+    try:
+        yield
+    finally:
+        record = profiler.exit()
+        owner = record["ownedBy"][0] if record["ownedBy"] else {"site": "-", "sizeMb": 0}
+        logger.info(
+            "Memory %s: peak %.1f MB, retained %.1f MB (%+.1f MB); largest owner %s (%.1f MB)",
+            record["phase"], record["peakMb"], record["retainedMb"], record["deltaMb"],
+            owner["site"], owner["sizeMb"],
+        )
+
+
+def report() -> dict[str, Any]:
+    profiler = _profiler
+    if profiler is None:
+        return {}
+    return {
+        "startedAt": profiler.started_at,
+        "nframes": profiler.nframes,
+        "phases": list(profiler.phases),
+    }
+
+
+def write_report(path: str | Path) -> dict[str, Any]:
+    """Write :func:`report` to *path* as JSON."""
+    data = report()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    return data
@@ -0,0 +1,413 @@
+"""Local stand-in for the Convex ``/api/mutation`` HTTP endpoint.
+
+Serves the ingestion mutations (``pages:*``, ``levels:*``, ``pageVariants:*``)
+from memory so the real uploader can be benchmarked and exercised without a
+deployment.  Arguments are checked against Python ports of the validators in
+``packages/backend/convex/{pages,levels,pageVariants}.ts``; extra or missing
+fields and wrong types are rejected the way Convex rejects them.
+
+Failure injection:
+
+* ``latency_ms`` / ``jitter_ms`` — per-request service time;
+* ``error_rate`` — fraction of requests answered with HTTP 500;
+* ``rate_limit`` — requests/second (token bucket) before answering 429.
+
+Usage::
+
+    with MockConvex(latency_ms=20) as server:
+        config.convex_url = server.url
+        upload_all(pages, levels, variants, config)
+        print(server.stats.snapshot())
+
+or ``python -m dust_ingest mock-convex --port 3210``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Convex rejects documents larger than 1 MiB.
+MAX_DOCUMENT_BYTES = 1 << 20
+
+
+# ---------------------------------------------------------------------------
+# Validators (mirrors of convex/values ``v.*``)
+# ---------------------------------------------------------------------------
+
+class ArgumentValidationError(ValueError):
+    """Arguments do not match the mutation's validator."""
+
+
+Validator = Callable[[Any, str], None]
+
+
+class _Optional:
+    """Marks an object field as ``v.optional(...)``."""
+
+    def __init__(self, inner: Validator) -> None:
+        self.inner = inner
+
+
+def _fail(where: str, expected: str, value: Any) -> None:
+    raise ArgumentValidationError(
+        f"Value does not match validator at {where}: expected {expected}, "
+        f"got {type(value).__name__} {json.dumps(value)[:80]}"
+    )
+
+
+def _string(value: Any, where: str) -> None:
+    if not isinstance(value, str):
+        _fail(where, "string", value)
+
+
+def _number(value: Any, where: str) -> None:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        _fail(where, "number", value)
+
+
+def _null(value: Any, where: str) -> None:
+    if value is not None:
+        _fail(where, "null", value)
+
+
+def _literal(expected: str) -> Validator:
+    def check(value: Any, where: str) -> None:
+        if value != expected:
+            _fail(where, json.dumps(expected), value)
+    return check
+
+
+def _union(*options: Validator) -> Validator:
+    def check(value: Any, where: str) -> None:
+        for option in options:
+            try:
+                option(value, where)
+                return
+            except ArgumentValidationError:
+                continue
+        _fail(where, "one of the union members", value)
+    return check
+
+
+def _array(item: Validator) -> Validator:
+    def check(value: Any, where: str) -> None:
+        if not isinstance(value, list):
+            _fail(where, "array", value)
+        for i, element in enumerate(value):
+            item(element, f"{where}[{i}]")
+    return check
+
+
+def _object(fields: dict[str, Validator | _Optional]) -> Validator:
+    def check(value: Any, where: str) -> None:
+        if not isinstance(value, dict):
+            _fail(where, "object", value)
+        extra = set(value) - set(fields)
+        if extra:
+            raise ArgumentValidationError(
+                f"Object at {where} contains extra field(s) {sorted(extra)}"
+            )
+        for name, validator in fields.items():
+            if isinstance(validator, _Optional):
+                if name in value:
+                    validator.inner(value[name], f"{where}.{name}")
+            elif name not in value:
+                raise ArgumentValidationError(
+                    f"Object at {where} is missing the required field `{name}`"
+                )
+            else:
+                validator(value[name], f"{where}.{name}")
+    return check
+
+
+def _nullable_string() -> _Optional:
+    return _Optional(_union(_string, _null))
+
+
+PAGE = _object({
+    "pageId": _string,
+    "url": _string,
+    "title": _string,
+    "capturedAt": _string,
+    "html": _Optional(_string),
+    "elements": _array(_object({
+        "elementId": _string,
+        "tag": _string,
+        "text": _nullable_string(),
+        "src": _nullable_string(),
+        "srcset": _nullable_string(),
+        "alt": _nullable_string(),
+        "href": _nullable_string(),
+        "bbox": _Optional(_union(
+            _object({"x": _number, "y": _number, "width": _number, "height": _number}),
+            _null,
+        )),
+    })),
+    "assets": _array(_object({
+        "src": _string,
+        "alt": _nullable_string(),
+        "srcset": _nullable_string(),
+        "elementId": _nullable_string(),
+    })),
+    "styles": _array(_string),
+    "projectId": _string,
+    "tags": _array(_string),
+})
+
+LEVEL = _object({
+    "levelId": _string,
+    "projectId": _string,
+    "difficulty": _number,
+    "pageIds": _array(_string),
+    "mutationParams": _object({
+        "fakeRate": _number,
+        "subtlety": _number,
+        "maxFakeSpans": _number,
+    }),
+})
+
+VARIANT = _object({
+    "variantId": _string,
+    "pageId": _string,
+    "levelId": _string,
+    "difficulty": _number,
+    "alteredContent": _string,
+    "fakeMarks": _array(_object({
+        "kind": _union(_literal("FAKE"), _literal("MISLEADING")),
+        "elementId": _nullable_string(),
+        "snippet": _string,
+        "explanation": _string,
+    })),
+    "projectId": _string,
+})
+
+# path → (table, validator for one record, bulk argument name or None, upsert?)
+MUTATIONS: dict[str, tuple[str, Validator, str | None, bool]] = {
+    "pages:upsert": ("pages", PAGE, None, True),
+    "pages:upsertMany": ("pages", PAGE, "pages", True),
+    "levels:upsert": ("levels", LEVEL, None, True),
+    "levels:upsertMany": ("levels", LEVEL, "levels", True),
+    "pageVariants:insert": ("pageVariants", VARIANT, None, False),
+    "pageVariants:insertMany": ("pageVariants", VARIANT, "variants", False),
+    "pageVariants:upsert": ("pageVariants", VARIANT, None, True),
+    "pageVariants:upsertMany": ("pageVariants", VARIANT, "variants", True),
+}
+
+# Fields identifying a row for upserts.
+_KEYS: dict[str, tuple[str, ...]] = {
+    "pages": ("pageId",),
+    "levels": ("levelId", "projectId"),
+    "pageVariants": ("variantId",),
+}
+
+
+def validate_mutation(path: str, args: Any) -> list[dict]:
+    """Validate *args* for mutation *path*; return the records it carries."""
+    if path not in MUTATIONS:
+        raise ArgumentValidationError(f"Could not find public function for '{path}'")
+    _, validator, bulk_arg, _ = MUTATIONS[path]
+    if bulk_arg is None:
+        validator(args, "args")
+        records = [args]
+    else:
+        _object({bulk_arg: _array(validator)})(args, "args")
+        records = args[bulk_arg]
+    for i, record in enumerate(records):
+        size = len(json.dumps(record, separators=(",", ":")).encode("utf-8"))
+        if size > MAX_DOCUMENT_BYTES:
+            raise ArgumentValidationError(
+                f"Document {i} is too large ({size} bytes > {MAX_DOCUMENT_BYTES})"
+            )
+    return records
+
+
+# ---------------------------------------------------------------------------
+# Server state
+# ---------------------------------------------------------------------------
+
+@dataclass
+class MockStats:
+    """What the mock server has received."""
+    requests: int = 0
+    records: int = 0
+    bytes_in: int = 0
+    by_path: Counter = field(default_factory=Counter)
+    rejected: int = 0
+    injected_errors: int = 0
+    rate_limited: int = 0
+    rejections: list[str] = field(default_factory=list)
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "records": self.records,
+            "bytesIn": self.bytes_in,
+            "byPath": dict(self.by_path),
+            "rejected": self.rejected,
+            "injectedErrors": self.injected_errors,
+            "rateLimited": self.rate_limited,
+        }
+
+
+class _TokenBucket:
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume a token; return 0 on success or seconds until one is free."""
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class MockConvex:
+    """In-memory Convex mutation endpoint on a background thread."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.stats = MockStats()
+        self.tables: dict[str, dict[tuple, dict]] = {t: {} for t in _KEYS}
+        self._inserted = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._bucket = _TokenBucket(rate_limit) if rate_limit else None
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockConvex":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-convex", daemon=True,
+        )
+        self._thread.start()
+        logger.info("Mock Convex listening on %s", self.url)
+        return self
+
+    def serve_forever(self) -> None:
+        logger.info("Mock Convex listening on %s", self.url)
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockConvex":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def row_count(self, table: str) -> int:
+        """Rows stored in *table* (inserted duplicates included)."""
+        with self._lock:
+            return len(self.tables[table])
+
+    # -- request handling ---------------------------------------------------
+
+    def _apply(self, table: str, records: list[dict], upsert: bool) -> None:
+        rows = self.tables[table]
+        for record in records:
+            if upsert:
+                key = tuple(record[k] for k in _KEYS[table])
+            else:
+                self._inserted += 1
+                key = ("_insert", self._inserted)
+            rows[key] = record
+
+    def _handle(self, path: str, body: bytes) -> tuple[int, dict, dict[str, str]]:
+        """Return ``(status, response JSON, extra headers)`` for one request."""
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.bytes_in += len(body)
+            if self._bucket is not None:
+                wait = self._bucket.take()
+                if wait:
+                    self.stats.rate_limited += 1
+                    return 429, _error("Rate limited"), {"Retry-After": f"{wait:.2f}"}
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats.injected_errors += 1
+                return 500, _error("Injected server error"), {}
+            delay = max(0.0, self.latency_ms + self._random.uniform(-1, 1) * self.jitter_ms)
+
+        if path != "/api/mutation":
+            return 404, _error(f"No route for {path}"), {}
+        time.sleep(delay / 1000)
+        try:
+            request = json.loads(body)
+            fn = request["path"]
+            records = validate_mutation(fn, request.get("args"))
+        except (ValueError, KeyError, TypeError) as exc:
+            with self._lock:
+                self.stats.rejected += 1
+                self.stats.rejections.append(str(exc))
+            return 400, _error(str(exc)), {}
+
+        table, _, _, upsert = MUTATIONS[fn]
+        with self._lock:
+            self.stats.by_path[fn] += 1
+            self.stats.records += len(records)
+            self._apply(table, records, upsert)
+        return 200, {"status": "success", "value": None, "logLines": []}, {}
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+            # Headers and body go out in separate writes; without this,
+            # Nagle + delayed ACK adds ~40 ms to every keep-alive response.
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:  # noqa: N802 (http.server API)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, payload, headers = mock._handle(self.path, body)
+                out = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, fmt: str, *args: object) -> None:
+                logger.debug("mock-convex: " + fmt, *args)
+
+        return Handler
+
+
+def _error(message: str) -> dict:
+    return {"status": "error", "errorMessage": message}
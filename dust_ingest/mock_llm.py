@@ -0,0 +1,312 @@
+"""Local stand-in for an OpenAI-compatible chat-completions endpoint.
+
+Answers ``POST …/chat/completions`` the way the alteration prompt expects:
+it reads the element list from the user message and returns strict JSON
+with ``alteredContent`` (the same elements, ``li`` turned into ``p``, a fake
+sentence appended to a few of them) and matching ``fakeMarks``.  Responses
+carry a ``usage`` block with approximate token counts (chars / 4), so LLM
+usage accounting works unchanged.
+
+Failure and load shaping:
+
+* ``latency_ms`` / ``latency_sigma`` — log-normal service time with the
+  given median; ``sigma=0`` is a fixed latency.  ``ms_per_element`` adds
+  time proportional to the response size, like token generation does;
+* ``malformed_rate`` — fraction of responses whose content is truncated,
+  unparsable JSON;
+* ``no_fake_marks_rate`` — fraction of responses with an empty
+  ``fakeMarks`` list;
+* ``rate_limit`` — requests/second (token bucket) before answering 429;
+* ``burst_every_s`` / ``burst_s`` — every ``burst_every_s`` seconds, answer
+  all requests with 429 for ``burst_s`` seconds (with ``Retry-After``).
+
+Usage::
+
+    with MockLLM(latency_ms=800, malformed_rate=0.05) as server:
+        config.llm_base_url = server.url
+        generate_variants(pages, config, "bench")
+        print(server.stats.snapshot())
+
+or ``python -m dust_ingest mock-llm --port 8400``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dust_ingest.mock_convex import _TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_ELEMENTS_RE = re.compile(r"Elements \(\d+ total\):\n")
+_MAX_SPANS_RE = re.compile(r"maxFakeSpans:\s*(\d+)")
+_FAKE_SENTENCE = "Officials later revised this figure upward by 40 percent."
+_TEXT_TYPES = {"h3", "h4", "h5", "h6", "p", "li", "blockquote", "figcaption", "pre", "td", "th"}
+
+
+# ---------------------------------------------------------------------------
+# Responses
+# ---------------------------------------------------------------------------
+
+def _prompt_elements(messages: list[dict]) -> list[dict]:
+    """Return the element list embedded in the last user message."""
+    content = next(
+        (m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "",
+    )
+    match = _ELEMENTS_RE.search(content)
+    if match is None:
+        raise ValueError("user message has no element list")
+    elements, _ = json.JSONDecoder().raw_decode(content, match.end())
+    if not isinstance(elements, list):
+        raise ValueError("element list is not a JSON array")
+    return elements
+
+
+def alteration(messages: list[dict], rng: random.Random, with_marks: bool = True) -> dict:
+    """Build a schema-valid alteration for the prompt in *messages*."""
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    max_spans = int(m.group(1)) if (m := _MAX_SPANS_RE.search(system)) else 1
+
+    altered: list[dict] = []
+    for el in _prompt_elements(messages):
+        el = dict(el)
+        if el.get("type") == "li":
+            el["type"] = "p"
+        altered.append(el)
+    candidates = [
+        el for el in altered
+        if el.get("type") in _TEXT_TYPES and (el.get("text") or "").strip()
+    ]
+    # Leave at least one true section, as validation requires.
+    spans = min(max_spans, max(0, len(candidates) - 1))
+    marks = []
+    for el in rng.sample(candidates, spans):
+        el["text"] = f"{el['text'].rstrip()} {_FAKE_SENTENCE}"
+        marks.append({
+            "kind": rng.choice(("FAKE", "MISLEADING")),
+            "elementId": el.get("elementId"),
+            "snippet": _FAKE_SENTENCE,
+            "explanation": "The revision never happened; the figure is invented.",
+        })
+    return {"alteredContent": altered, "fakeMarks": marks if with_marks else []}
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _completion(model: str, content: str, prompt_chars: int) -> dict:
+    prompt_tokens = max(1, prompt_chars // 4)
+    completion_tokens = _tokens(content)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Server state
+# ---------------------------------------------------------------------------
+
+@dataclass
+class MockLLMStats:
+    """What the mock LLM has received and how it answered."""
+    requests: int = 0
+    ok: int = 0
+    malformed: int = 0
+    no_fake_marks: int = 0
+    rate_limited: int = 0
+    bad_requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    service_ms: list[float] = field(default_factory=list)
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "ok": self.ok,
+            "malformed": self.malformed,
+            "noFakeMarks": self.no_fake_marks,
+            "rateLimited": self.rate_limited,
+            "badRequests": self.bad_requests,
+            "peakInFlight": self.peak_in_flight,
+        }
+
+
+class MockLLM:
+    """OpenAI-compatible chat-completions endpoint on a background thread."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.4,
+        ms_per_element: float = 0.0,
+        malformed_rate: float = 0.0,
+        no_fake_marks_rate: float = 0.0,
+        rate_limit: float | None = None,
+        burst_every_s: float | None = None,
+        burst_s: float = 5.0,
+        seed: int | None = None,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.ms_per_element = ms_per_element
+        self.malformed_rate = malformed_rate
+        self.no_fake_marks_rate = no_fake_marks_rate
+        self.burst_every_s = burst_every_s
+        self.burst_s = burst_s
+        self.stats = MockLLMStats()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._bucket = _TokenBucket(rate_limit) if rate_limit else None
+        self._started = time.monotonic()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as ``LLM_BASE_URL``."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLM":
+        self._started = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-llm", daemon=True,
+        )
+        self._thread.start()
+        logger.info("Mock LLM listening on %s", self.url)
+        return self
+
+    def serve_forever(self) -> None:
+        self._started = time.monotonic()
+        logger.info("Mock LLM listening on %s", self.url)
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockLLM":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    # -- request handling ---------------------------------------------------
+
+    def _burst_remaining(self) -> float:
+        """Seconds left in the current 429 burst (0 outside bursts)."""
+        if not self.burst_every_s:
+            return 0.0
+        phase = (time.monotonic() - self._started) % self.burst_every_s
+        # The burst sits at the end of each period so a run starts cleanly.
+        start = self.burst_every_s - self.burst_s
+        return self.burst_every_s - phase if phase >= start else 0.0
+
+    def _handle(self, path: str, body: bytes) -> tuple[int, dict, dict[str, str]]:
+        """Return ``(status, response JSON, extra headers)`` for one request."""
+        if not path.rstrip("/").endswith("/chat/completions"):
+            return 404, _error(f"No route for {path}", "not_found"), {}
+        with self._lock:
+            self.stats.requests += 1
+            burst = self._burst_remaining()
+            wait = burst or (self._bucket.take() if self._bucket is not None else 0.0)
+            if wait:
+                self.stats.rate_limited += 1
+                return 429, _error("Rate limit reached", "rate_limit_exceeded"), {
+                    "Retry-After": f"{wait:.2f}",
+                }
+            roll = self._random.random()
+            seed = self._random.getrandbits(32)
+            latency = self.latency_ms * math.exp(self._random.gauss(0, self.latency_sigma))
+
+        try:
+            request = json.loads(body)
+            messages = request["messages"]
+            model = request.get("model") or "mock"
+            malformed = roll < self.malformed_rate
+            with_marks = roll >= self.malformed_rate + self.no_fake_marks_rate
+            data = alteration(messages, random.Random(seed), with_marks=with_marks)
+        except (ValueError, KeyError, TypeError) as exc:
+            with self._lock:
+                self.stats.bad_requests += 1
+            return 400, _error(str(exc), "invalid_request_error"), {}
+
+        latency += self.ms_per_element * len(data["alteredContent"])
+        with self._lock:
+            self.stats.in_flight += 1
+            self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.stats.in_flight)
+        try:
+            time.sleep(latency / 1000)
+        finally:
+            with self._lock:
+                self.stats.in_flight -= 1
+
+        content = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self.stats.service_ms.append(latency)
+            if malformed:
+                self.stats.malformed += 1
+                content = content[: len(content) // 2]
+            elif not with_marks:
+                self.stats.no_fake_marks += 1
+            else:
+                self.stats.ok += 1
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        return 200, _completion(model, content, prompt_chars), {}
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:  # noqa: N802 (http.server API)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, payload, headers = mock._handle(self.path, body)
+                out = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, fmt: str, *args: object) -> None:
+                logger.debug("mock-llm: " + fmt, *args)
+
+        return Handler
+
+
+def _error(message: str, code: str) -> dict:
+    return {"error": {"message": message, "type": code, "code": code}}
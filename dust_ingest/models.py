@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
-from typing import Any, Literal
+from typing import Any, Literal, NamedTuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 # ---------------------------------------------------------------------------
@@ -57,6 +57,53 @@ class PageAsset(BaseModel):
     elementId: str | None = None
 
 
+class ElementRecord(NamedTuple):
+    """Tuple-backed, read-only :class:`PageElement` for in-memory working sets.
+
+    About 120 bytes per element instead of the ~1 KB a pydantic instance
+    carries (``__dict__`` plus a fields-set).  Converted back with
+    :meth:`to_model` wherever a record is validated or serialized.
+    """
+    elementId: str
+    tag: str
+    text: str | None = None
+    src: str | None = None
+    srcset: str | None = None
+    alt: str | None = None
+    href: str | None = None
+    bbox: dict[str, float] | None = None
+
+    @classmethod
+    def from_model(cls, el: PageElement) -> ElementRecord:
+        return cls(el.elementId, el.tag, el.text, el.src, el.srcset, el.alt, el.href, el.bbox)
+
+    def to_model(self) -> PageElement:
+        return PageElement(**self._asdict())
+
+    def dump(self) -> dict:
+        """Same as ``to_model().model_dump(exclude_none=True)``, without pydantic."""
+        return {k: v for k, v in zip(self._fields, self) if v is not None}
+
+
+class AssetRecord(NamedTuple):
+    """Tuple-backed, read-only :class:`PageAsset` (see :class:`ElementRecord`)."""
+    src: str
+    alt: str | None = None
+    srcset: str | None = None
+    elementId: str | None = None
+
+    @classmethod
+    def from_model(cls, asset: PageAsset) -> AssetRecord:
+        return cls(asset.src, asset.alt, asset.srcset, asset.elementId)
+
+    def to_model(self) -> PageAsset:
+        return PageAsset(**self._asdict())
+
+    def dump(self) -> dict:
+        """Same as ``to_model().model_dump(exclude_none=True)``, without pydantic."""
+        return {k: v for k, v in zip(self._fields, self) if v is not None}
+
+
 class PageSnapshot(BaseModel):
     """Full scraped snapshot for a single URL."""
     pageId: str
@@ -83,10 +130,28 @@ class FakeMark(BaseModel):
     explanation: str
 
 
+class Section(NamedTuple):
+    """One element of altered content, before it is rendered to HTML.
+
+    The LLM returns altered pages as element lists; they are normalized,
+    counted and checked in this form and rendered once at the end.
+    """
+    elementId: str
+    tag: str
+    text: str = ""
+    src: str = ""
+    alt: str = ""
+
+
 class AlteredPage(BaseModel):
     """Result of LLM alteration for one page."""
     alteredContent: str
     fakeMarks: list[FakeMark] = Field(default_factory=list)
+    # Sections alteredContent was rendered from, when it came from an
+    # element list, so later steps need not parse the HTML again.
+    _sections: list[Section] | None = PrivateAttr(default=None)
+    # (alteredContent, text element count); see variant_validation.
+    _text_elements: tuple[str, int] | None = PrivateAttr(default=None)
 
 
 # ---------------------------------------------------------------------------
@@ -122,6 +187,18 @@ class PageVariant(BaseModel):
     alteredContent: str
     fakeMarks: list[FakeMark] = Field(default_factory=list)
     projectId: str = "default"
+    # LLM that generated the variant.  Kept in the cache for audits, never
+    # uploaded (the Convex validator has no such field).
+    model: str | None = None
+    # (alteredContent, text element count); see variant_validation.
+    _text_elements: tuple[str, int] | None = PrivateAttr(default=None)
+    # (alteredContent, [(elementId, text), ...]); see variant_validation.
+    _element_texts: tuple[str, list[tuple[str, str]]] | None = PrivateAttr(default=None)
+    # (alteredContent, fakeMarks as resolved, unresolved count); see
+    # variant_validation.
+    _marks_checked: tuple[str, tuple[tuple[str, str | None], ...], int] | None = PrivateAttr(
+        default=None,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -137,7 +214,16 @@ class PipelineConfig(BaseModel):
     llm_api_key: str
     llm_base_url: str = "https://api.deepinfra.com/v1/openai"
     llm_model: str = "meta-llama/Llama-3.3-70B-Instruct-Turbo"
+    # USD per 1M tokens; 0 = cost not tracked.  Cached defaults to input.
+    llm_price_input: float = Field(default=0.0, ge=0)
+    llm_price_output: float = Field(default=0.0, ge=0)
+    llm_price_cached: float | None = Field(default=None, ge=0)
     convex_url: str  # e.g. "https://hushed-fennec-813.convex.cloud"
     concurrency: int = 3
     retries: int = 2
+    upload_batch_records: int = Field(default=100, ge=1)
+    upload_batch_bytes: int = Field(default=4_000_000, ge=1)
+    upload_concurrency: int = Field(default=8, ge=1)
+    upload_max_retries: int = Field(default=4, ge=0)
+    upload_page_html: bool = True  # False: pages are uploaded without raw html
 
@@ -0,0 +1,255 @@
+"""Streaming build pipeline.
+
+Runs scrape → alter → upload as overlapping stages connected by bounded
+queues instead of phase barriers::
+
+    scraper thread ──page_q──▶ dispatcher ──LLM pool──▶ upload_q ──▶ uploader
+
+Pages are pushed to the upload queue as soon as they are scraped, and each
+validated variant follows once its LLM call finishes, so pages always reach
+Convex before the variants that reference them.  Full queues block the
+producing stage (backpressure).  Only level building waits for every
+variant, because level capacity depends on the final set of successes.
+
+The uploader collects records from its queue into batches, bounded by size
+and by how long the first record has waited, and sends each batch through
+:func:`~dust_ingest.convex_upload.upload_all`, which keeps the bulk
+mutations and uploads a variant only after the page it references.
+
+Unlike the batch path, variants are placed into levels in *completion*
+order rather than URL order — a variant needs its ``levelId`` before it
+can be uploaded.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from dust_ingest import progress
+from dust_ingest.apify_scrape import iter_scrape_batches
+from dust_ingest.convex_upload import upload_all, upload_levels
+from dust_ingest.leveling import rebuild_levels_from_variants
+from dust_ingest.llm_alter import (
+    _generate_one_variant,
+    _mutation_params,
+    _plan_difficulty,
+    assign_level,
+    is_valid_page,
+    make_llm_client,
+)
+from dust_ingest.models import Level, PageSnapshot, PageVariant, PipelineConfig, UrlEntry
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # end-of-stream sentinel
+# Longest a record waits in the uploader for the rest of its batch.
+_UPLOAD_LINGER_SECS = 2.0
+
+
+@dataclass
+class StreamResult:
+    """Everything produced by a streaming build."""
+    pages: list[PageSnapshot] = field(default_factory=list)
+    variants: list[PageVariant] = field(default_factory=list)
+    level_variants: list[PageVariant] = field(default_factory=list)
+    levels: list[Level] = field(default_factory=list)
+    pages_uploaded: int = 0
+    variants_uploaded: int = 0
+    levels_uploaded: int = 0
+
+
+def run_streaming_build(
+    urls: list[UrlEntry],
+    config: PipelineConfig,
+    project_id: str,
+    *,
+    num_levels: int = 10,
+    max_workers: int = 40,
+    scrape_batch_size: int = 10,
+    queue_size: int = 64,
+    on_page: Callable[[PageSnapshot], None] | None = None,
+    on_variant: Callable[[PageVariant], None] | None = None,
+    force_upload: bool = False,
+) -> StreamResult:
+    """Run the full pipeline with all stages overlapping.
+
+    Parameters
+    ----------
+    scrape_batch_size:
+        URLs per Apify actor run.  Smaller batches start the LLM sooner at
+        the cost of more actor start-ups.
+    queue_size:
+        Capacity of the page and upload queues.
+    on_page / on_variant:
+        Optional hooks (e.g. local cache writes) called once per scraped
+        page and once per level-placed variant.
+    force_upload:
+        Re-send records the upload ledger says are already in Convex.
+    """
+    result = StreamResult()
+    page_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    upload_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    # Bounds LLM calls in flight so the dispatcher stops pulling pages
+    # (and the scraper eventually blocks) when the pool is saturated.
+    in_flight = threading.BoundedSemaphore(max_workers)
+    level_lock = threading.Lock()
+    level_counts: dict[int, int] = {}
+    stop = threading.Event()
+    progress.watch_queue("pages", page_q)
+    progress.watch_queue("uploads", upload_q)
+    # Reserve the whole run up front (one variant per page, plus a page
+    # record each and the levels), so the ETAs cover more than the pages
+    # scraped so far.  Estimates shrink as pages fail to scrape or alter.
+    progress.expect("alter", len(urls))
+    progress.expect("upload", 2 * len(urls) + num_levels)
+
+    def scrape_stage() -> None:
+        requested = 0
+        try:
+            for batch in iter_scrape_batches(
+                urls, config,
+                project_id=project_id, batch_size=scrape_batch_size,
+            ):
+                batch_urls = min(max(1, scrape_batch_size), len(urls) - requested)
+                requested += batch_urls
+                progress.add_total("alter", len(batch))
+                missing = batch_urls - len(batch)
+                if missing > 0:
+                    progress.expect("alter", -missing)
+                    progress.expect("upload", -2 * missing)
+                for page in batch:
+                    if stop.is_set():
+                        return
+                    page_q.put(page)
+        except Exception:
+            logger.exception("Scrape stage failed")
+        finally:
+            progress.settle("alter")
+            page_q.put(_DONE)
+
+    def upload_batch(batch: list[PageSnapshot | PageVariant]) -> None:
+        pages = [item for item in batch if isinstance(item, PageSnapshot)]
+        variants = [item for item in batch if isinstance(item, PageVariant)]
+        try:
+            report = upload_all(pages, [], variants, config, force=force_upload)
+        except Exception:
+            logger.exception(
+                "Upload stage failed for %d pages, %d variants", len(pages), len(variants),
+            )
+            return
+        result.pages_uploaded += report.pages.done
+        result.variants_uploaded += report.variants.done
+
+    def upload_stage() -> None:
+        # Enough records to keep every upload worker busy with a full batch.
+        max_records = config.upload_batch_records * config.upload_concurrency
+        finished = False
+        while not finished:
+            item = upload_q.get()
+            if item is _DONE:
+                return
+            batch = [item]
+            deadline = time.monotonic() + _UPLOAD_LINGER_SECS
+            while len(batch) < max_records:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = upload_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    finished = True
+                    break
+                batch.append(item)
+            upload_batch(batch)
+
+    def variant_done(future: Future) -> None:
+        try:
+            variant = future.result()
+            progress.advance("alter", 0 if variant is None else 1, failed=variant is None)
+            if variant is None:
+                progress.expect("upload", -1)
+                return
+            with level_lock:
+                placed = assign_level(variant, level_counts, project_id, num_levels)
+                result.variants.append(variant)
+                if placed:
+                    result.level_variants.append(variant)
+            if on_variant is not None:
+                on_variant(variant)
+            logger.info(
+                "Variant done: page=%s difficulty=%d (%d so far)",
+                variant.pageId, variant.difficulty, len(result.variants),
+            )
+            upload_q.put(variant)
+        except Exception:
+            logger.exception("Variant post-processing failed")
+        finally:
+            in_flight.release()
+
+    scraper = threading.Thread(target=scrape_stage, name="dust-scrape", daemon=True)
+    uploader = threading.Thread(target=upload_stage, name="dust-upload", daemon=True)
+    scraper.start()
+    uploader.start()
+
+    client = make_llm_client(config, max_workers)
+    plan_counts: dict[int, int] = {}
+    skipped = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while True:
+                page = page_q.get()
+                if page is _DONE:
+                    break
+                result.pages.append(page)
+                if on_page is not None:
+                    on_page(page)
+                upload_q.put(page)
+
+                if not is_valid_page(page):
+                    skipped += 1
+                    progress.add_total("alter", -1)
+                    progress.expect("upload", -1)
+                    continue
+                difficulty = _plan_difficulty(plan_counts, num_levels)
+                in_flight.acquire()
+                future = pool.submit(
+                    _generate_one_variant,
+                    page,
+                    _mutation_params(difficulty, num_levels),
+                    difficulty,
+                    project_id,
+                    config,
+                    client,
+                )
+                future.add_done_callback(variant_done)
+    finally:
+        stop.set()
+        upload_q.put(_DONE)
+        uploader.join()
+        # Unblock a scraper waiting on a full page queue; it stops before
+        # its next page, at worst after finishing the current actor run.
+        while scraper.is_alive():
+            try:
+                page_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        scraper.join()
+
+    if skipped:
+        logger.info("Skipped %d invalid pages (404s, error pages, etc.)", skipped)
+
+    # Level building is the only barrier: capacity depends on the final set.
+    result.levels = rebuild_levels_from_variants(
+        result.level_variants, project_id, num_levels,
+    )
+    result.levels_uploaded = upload_levels(result.levels, config, force=force_upload)
+    progress.settle("upload")
+    return result
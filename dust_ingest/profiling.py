@@ -0,0 +1,340 @@
+"""CPU profiling of the pipeline's compute stages over cached data.
+
+``python -m dust_ingest profile <stage>`` replays one stage over pages and
+variants already in the local cache.  Apify, the LLM and Convex are never
+contacted, so a profile can be taken offline and repeated exactly.
+
+Stages:
+
+* ``sanitize`` — ``sanitize_html`` → ``truncate_to_word_limit`` →
+  ``extract_elements_and_assets``, as at scrape time.  Raw crawler HTML is
+  not cached, so this re-runs on the stored (already sanitized) HTML;
+* ``parse`` — ``_parse_response`` on a JSON response of the kind the LLM
+  returns (built from each page's prompt by the mock LLM's
+  :func:`~dust_ingest.mock_llm.alteration`), including section
+  normalization and rendering;
+* ``validate`` — ``validate_page_variant`` over the cached variants;
+* ``levels`` — ``rebuild_levels_from_variants`` over the cached variants.
+
+``validate`` and ``levels`` fall back to variants produced by ``parse``
+when none are cached for the selected pages.
+
+Two profilers are available:
+
+* ``cprofile`` (default) — deterministic, exact call counts; writes a
+  ``.pstats`` file for snakeviz, gprof2dot or flameprof;
+* ``sample`` — a stdlib sampler that records the main thread's stack every
+  ``interval`` seconds.  Overhead is far lower and flat, so time is not
+  skewed towards call-heavy code.  Writes collapsed stacks
+  (``a;b;c 42`` per line) for ``flamegraph.pl`` or speedscope.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from dust_ingest.html_sanitize import sanitize_html, truncate_to_word_limit
+from dust_ingest.leveling import rebuild_levels_from_variants
+from dust_ingest.llm_alter import _build_user_prompt, _parse_response
+from dust_ingest.mock_llm import alteration
+from dust_ingest.models import PageSnapshot, PageVariant
+from dust_ingest.normalize import extract_elements_and_assets
+from dust_ingest.variant_validation import validate_page_variant
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("sanitize", "parse", "validate", "levels")
+PROFILERS = ("cprofile", "sample")
+DEFAULT_INTERVAL = 0.001
+
+
+@dataclass
+class HotFunction:
+    """One row of the hot-function summary."""
+    name: str
+    calls: int | None
+    self_seconds: float
+    total_seconds: float
+    self_share: float
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+# ---------------------------------------------------------------------------
+
+def _llm_responses(pages: list[PageSnapshot]) -> list[str]:
+    """A deterministic LLM-style JSON response for every page."""
+    responses = []
+    for i, page in enumerate(pages):
+        messages = [{"role": "user", "content": _build_user_prompt(page)}]
+        responses.append(json.dumps(alteration(messages, random.Random(i)), ensure_ascii=False))
+    return responses
+
+
+def _parsed_variants(
+    pages: list[PageSnapshot], num_levels: int,
+) -> list[PageVariant]:
+    """Variants built from the ``parse`` stage's output, spread over levels."""
+    variants = []
+    for i, (page, raw) in enumerate(zip(pages, _llm_responses(pages))):
+        altered = _parse_response(raw, original_elements=page.elements)
+        difficulty = i % num_levels + 1
+        variants.append(PageVariant(
+            variantId=f"{page.pageId}-profile",
+            pageId=page.pageId,
+            levelId=f"{page.projectId}-level-{difficulty}",
+            difficulty=difficulty,
+            alteredContent=altered.alteredContent,
+            fakeMarks=altered.fakeMarks,
+            projectId=page.projectId,
+        ))
+    return variants
+
+
+def workload(
+    stage: str,
+    pages: list[PageSnapshot],
+    variants: list[PageVariant],
+    *,
+    num_levels: int = 10,
+) -> tuple[Callable[[], None], int]:
+    """Return ``(thunk, items per call)`` replaying *stage* once.
+
+    Inputs are prepared here so the thunk runs only the stage's own work.
+    """
+    if stage == "sanitize":
+        inputs = [(p.html, p.url) for p in pages if p.html]
+
+        def run() -> None:
+            for html, url in inputs:
+                sanitized = sanitize_html(html, base_url=url)
+                extract_elements_and_assets(truncate_to_word_limit(sanitized), base_url=url)
+
+        return run, len(inputs)
+
+    if stage == "parse":
+        inputs = list(zip(_llm_responses(pages), (p.elements for p in pages)))
+
+        def run() -> None:
+            for raw, elements in inputs:
+                _parse_response(raw, original_elements=elements)
+
+        return run, len(inputs)
+
+    if not variants:
+        logger.info("No cached variants for these pages; using parse output instead")
+        variants = _parsed_variants(pages, num_levels)
+    project_id = variants[0].projectId if variants else "default"
+
+    if stage == "validate":
+        def run() -> None:
+            for variant in variants:
+                validate_page_variant(variant)
+
+        return run, len(variants)
+
+    if stage == "levels":
+        def run() -> None:
+            rebuild_levels_from_variants(variants, project_id, num_levels)
+
+        return run, len(variants)
+
+    raise ValueError(f"unknown stage {stage!r} (choose from {', '.join(STAGES)})")
+
+
+# ---------------------------------------------------------------------------
+# Profilers
+# ---------------------------------------------------------------------------
+
+def _label(code) -> str:  # type: ignore[no-untyped-def]
+    """``module.qualname`` for a code object (package name for ``__init__``)."""
+    path = Path(code.co_filename)
+    module = path.parent.name if path.stem == "__init__" else path.stem
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _func_name(func: tuple[str, int, str]) -> str:
+    """``dir/file.py:line(name)`` for a pstats function key."""
+    filename, line, name = func
+    if filename == "~":  # built-in
+        return name
+    path = Path(filename)
+    return f"{path.parent.name}/{path.name}:{line}({name})"
+
+
+class _Sampler:
+    """Record the stack of one thread every *interval* seconds."""
+
+    def __init__(self, interval: float, thread_id: int) -> None:
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        labels: dict[object, str] = {}
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _label(code)
+                stack.append(label)
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self) -> "_Sampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _repeat(fn: Callable[[], None], repeat: int) -> None:
+    for _ in range(repeat):
+        fn()
+
+
+def run_cprofile(
+    fn: Callable[[], None], *, repeat: int, top: int, sort: str = "tottime",
+) -> tuple[pstats.Stats, list[HotFunction]]:
+    """Run *fn* *repeat* times under cProfile."""
+    profiler = cProfile.Profile()
+    profiler.runcall(_repeat, fn, repeat)
+    stats = pstats.Stats(profiler)
+    total = stats.total_tt or 1.0
+    key = 3 if sort == "cumulative" else 2
+    ranked = sorted(stats.stats.items(), key=lambda kv: kv[1][key], reverse=True)
+    rows = [
+        HotFunction(
+            name=_func_name(func),
+            calls=nc,
+            self_seconds=tt,
+            total_seconds=ct,
+            self_share=tt / total,
+        )
+        for func, (_, nc, tt, ct, _) in ranked
+        if func[2] not in ("_repeat", "<method 'disable' of '_lsprof.Profiler' objects>")
+    ][:top]
+    return stats, rows
+
+
+def run_sampler(
+    fn: Callable[[], None], *, repeat: int, top: int, interval: float = DEFAULT_INTERVAL,
+) -> tuple[Counter[str], list[HotFunction]]:
+    """Run *fn* *repeat* times while sampling the calling thread's stack."""
+    started = time.perf_counter()
+    with _Sampler(interval, threading.get_ident()) as sampler:
+        _repeat(fn, repeat)
+    elapsed = time.perf_counter() - started
+    # Drop the frames above the workload (CLI, this module) from every stack.
+    stacks: Counter[str] = Counter()
+    marker = f"{__name__.rpartition('.')[2]}._repeat;"
+    for stack, count in sampler.stacks.items():
+        _, found, rest = stack.partition(marker)
+        if found and rest:
+            stacks[rest] += count
+    samples = sum(stacks.values()) or 1
+    # Sleeps overshoot short intervals, so scale shares by wall time instead.
+    per_sample = elapsed / samples
+    own: Counter[str] = Counter()
+    inclusive: Counter[str] = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for name in set(frames):
+            inclusive[name] += count
+    rows = [
+        HotFunction(
+            name=name,
+            calls=None,
+            self_seconds=count * per_sample,
+            total_seconds=inclusive[name] * per_sample,
+            self_share=count / samples,
+        )
+        for name, count in own.most_common(top)
+    ]
+    return stacks, rows
+
+
+def profile_stage(
+    stage: str,
+    pages: list[PageSnapshot],
+    variants: list[PageVariant],
+    *,
+    out_dir: str | Path,
+    profiler: str = "cprofile",
+    repeat: int = 1,
+    top: int = 25,
+    sort: str = "tottime",
+    interval: float = DEFAULT_INTERVAL,
+    num_levels: int = 10,
+) -> tuple[Path, list[HotFunction]]:
+    """Profile *stage* and write its ``.pstats`` / ``.collapsed`` file.
+
+    Returns the output path and the top *top* functions by self time.
+    """
+    fn, items = workload(stage, pages, variants, num_levels=num_levels)
+    if not items:
+        raise ValueError(f"no cached input for stage {stage!r}")
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    # Quiet per-page INFO/WARNING lines; they would dominate the profile.
+    quiet = [logging.getLogger(n) for n in ("dust_ingest.llm_alter", "dust_ingest.leveling",
+                                            "dust_ingest.html_sanitize", "dust_ingest.normalize")]
+    previous_levels = [lg.level for lg in quiet]
+    for lg in quiet:
+        lg.setLevel(logging.ERROR)
+    started = time.perf_counter()
+    try:
+        if profiler == "cprofile":
+            stats, rows = run_cprofile(fn, repeat=repeat, top=top, sort=sort)
+            path = out / f"{stage}.pstats"
+            stats.dump_stats(path)
+        elif profiler == "sample":
+            stacks, rows = run_sampler(fn, repeat=repeat, top=top, interval=interval)
+            path = out / f"{stage}.collapsed"
+            path.write_text(
+                "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items())),
+                encoding="utf-8",
+            )
+        else:
+            raise ValueError(f"unknown profiler {profiler!r} (choose from {', '.join(PROFILERS)})")
+    finally:
+        for lg, level in zip(quiet, previous_levels):
+            lg.setLevel(level)
+    logger.info(
+        "Profiled %s: %d items × %d in %.2fs (%s)",
+        stage, items, repeat, time.perf_counter() - started, profiler,
+    )
+    return path, rows
+
+
+def format_table(rows: list[HotFunction]) -> str:
+    """Render the hot-function summary as a fixed-width text table."""
+    header = f"{'self %':>7} {'self s':>8} {'total s':>8} {'calls':>9}  function"
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        calls = "-" if r.calls is None else str(r.calls)
+        lines.append(
+            f"{r.self_share * 100:>6.1f}% {r.self_seconds:>8.3f} {r.total_seconds:>8.3f} "
+            f"{calls:>9}  {r.name}"
+        )
+    return "\n".join(lines)
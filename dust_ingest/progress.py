@@ -0,0 +1,389 @@
+"""Live progress for long runs: per-stage counts, rates and projected finish.
+
+Stages (``scrape``, ``alter``, ``upload``) declare work with
+:func:`add_total` and report it with :func:`advance`.  A driver that knows
+the size of the run before the work reaches a stage reserves it with
+:func:`expect`; the stage's own ``add_total`` calls then claim from the
+reservation instead of growing the total, and :func:`settle` withdraws
+whatever was never claimed.  Bounded queues are
+registered with :func:`watch_queue` so their depth can be sampled.  These
+calls are cheap and always on.  In-flight work (LLM calls, upload batches)
+and error / retry counts come from :mod:`dust_ingest.tracing`, which must
+be enabled for them to be non-zero.
+
+``--progress`` prints a one-line status to stderr every few seconds and
+``--progress-port PORT`` serves it over HTTP on localhost:
+
+* ``/metrics`` — Prometheus text exposition format
+* ``/status`` (and ``/``) — the same data as JSON
+
+Rates are measured over the last :data:`RATE_WINDOW` seconds, so the
+projected finish time follows the current throughput rather than the
+run-wide average.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from dust_ingest import tracing
+
+logger = logging.getLogger(__name__)
+
+RATE_WINDOW = 60.0
+
+STAGES = ("scrape", "alter", "upload")
+
+# Span names whose open count is reported as "in flight".
+_IN_FLIGHT_SPANS = {
+    "llm": "alter.llm_call",
+    "upload_page": "upload.page",
+    "upload_level": "upload.level",
+    "upload_variant": "upload.variant",
+}
+
+# Counter prefixes reported as errors vs retries.
+_RETRY_COUNTERS = ("llm.retry", "upload.retry", "upload.bisect")
+_ERROR_COUNTERS = (
+    "scrape.actor_failed", "llm.parse_error", "llm.api_error", "llm.failed",
+    "alter.exception", "variant.invalid", "upload.dead_lettered",
+)
+
+
+class _Stage:
+    __slots__ = ("total", "reserved", "done", "failed", "samples")
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.reserved = 0  # part of total declared by expect(), not yet claimed
+        self.done = 0
+        self.failed = 0
+        self.samples: deque[tuple[float, int]] = deque()
+
+    def rate(self, now: float) -> float:
+        """Items per second over the last :data:`RATE_WINDOW` seconds."""
+        while len(self.samples) > 1 and now - self.samples[0][0] > RATE_WINDOW:
+            self.samples.popleft()
+        if not self.samples:
+            return 0.0
+        t0, done0 = self.samples[0]
+        span = now - t0
+        return (self.done - done0) / span if span > 0 else 0.0
+
+
+class Progress:
+    """Thread-safe per-stage counters plus registered queues."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.stages: dict[str, _Stage] = {}
+        self.queues: dict[str, Any] = {}
+
+    def _stage(self, name: str) -> _Stage:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage()
+        return stage
+
+    def add_total(self, name: str, n: int) -> None:
+        with self.lock:
+            stage = self._stage(name)
+            claimed = min(n, stage.reserved) if n > 0 else 0
+            stage.reserved -= claimed
+            stage.total += n - claimed
+            if not stage.samples:
+                stage.samples.append((time.monotonic(), stage.done))
+
+    def expect(self, name: str, n: int) -> None:
+        with self.lock:
+            stage = self._stage(name)
+            n = max(n, -stage.reserved)
+            stage.reserved += n
+            stage.total += n
+            if not stage.samples:
+                stage.samples.append((time.monotonic(), stage.done))
+
+    def settle(self, name: str) -> None:
+        with self.lock:
+            stage = self._stage(name)
+            stage.total -= stage.reserved
+            stage.reserved = 0
+
+    def advance(self, name: str, n: int = 1, failed: int = 0) -> None:
+        now = time.monotonic()
+        with self.lock:
+            stage = self._stage(name)
+            stage.done += n + failed
+            stage.failed += failed
+            stage.samples.append((now, stage.done))
+
+    def watch_queue(self, name: str, q: Any) -> None:
+        with self.lock:
+            self.queues[name] = q
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self.lock:
+            stages: dict[str, dict[str, Any]] = {}
+            for name in sorted(self.stages, key=_stage_order):
+                stage = self.stages[name]
+                rate = stage.rate(now)
+                remaining = max(0, stage.total - stage.done)
+                stages[name] = {
+                    "total": stage.total,
+                    "done": stage.done,
+                    "failed": stage.failed,
+                    "remaining": remaining,
+                    "ratePerSec": round(rate, 3),
+                    "etaSeconds": round(remaining / rate, 1) if rate > 0 else None,
+                    "errorRate": round(stage.failed / stage.done, 4) if stage.done else 0.0,
+                }
+            queues = {name: q.qsize() for name, q in self.queues.items()}
+
+        active = tracing.active()
+        counters = tracing.counters()
+        etas = [s["etaSeconds"] for s in stages.values() if s["remaining"]]
+        # Stages overlap when streaming, so the run finishes with the slowest
+        # one; None until every unfinished stage has a measurable rate.
+        eta = max(etas) if etas and None not in etas else None
+        if not etas and stages:
+            eta = 0.0
+        return {
+            "uptimeSeconds": round(now - self.started, 1),
+            "stages": stages,
+            "queues": queues,
+            "inFlight": {key: active.get(span, 0) for key, span in _IN_FLIGHT_SPANS.items()},
+            "retries": {name: counters.get(name, 0) for name in _RETRY_COUNTERS},
+            "errors": {name: counters.get(name, 0) for name in _ERROR_COUNTERS},
+            "counters": counters,
+            "etaSeconds": eta,
+            "projectedFinish": (
+                time.strftime("%H:%M:%S", time.localtime(time.time() + eta))
+                if eta is not None else None
+            ),
+        }
+
+
+def _stage_order(name: str) -> tuple[int, str]:
+    return (STAGES.index(name) if name in STAGES else len(STAGES), name)
+
+
+_progress = Progress()
+
+
+def reset() -> Progress:
+    """Start fresh counters for a run."""
+    global _progress
+    _progress = Progress()
+    return _progress
+
+
+def add_total(stage: str, n: int) -> None:
+    """Declare *n* more items of work for *stage* (negative to withdraw)."""
+    _progress.add_total(stage, n)
+
+
+def expect(stage: str, n: int) -> None:
+    """Reserve *n* items of *stage* work ahead of the ``add_total`` calls
+    that will claim them (negative to withdraw unclaimed reservations)."""
+    _progress.expect(stage, n)
+
+
+def settle(stage: str) -> None:
+    """Withdraw *stage* work reserved by :func:`expect` but never claimed."""
+    _progress.settle(stage)
+
+
+def advance(stage: str, n: int = 1, failed: int = 0) -> None:
+    """Mark *n* items of *stage* finished, plus *failed* items that failed."""
+    _progress.advance(stage, n, failed)
+
+
+def watch_queue(name: str, q: Any) -> None:
+    """Report the depth of queue *q* (anything with ``qsize()``) as *name*."""
+    _progress.watch_queue(name, q)
+
+
+def snapshot() -> dict[str, Any]:
+    return _progress.snapshot()
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def prometheus(data: dict[str, Any] | None = None) -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    data = data if data is not None else snapshot()
+    lines: list[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, Any]]) -> None:
+        lines.append(f"# HELP dust_{name} {help_text}")
+        lines.append(f"# TYPE dust_{name} {kind}")
+        for labels, value in samples:
+            if value is not None:  # unknown (e.g. no ETA yet): omit the sample
+                lines.append(f"dust_{name}{labels} {value}")
+
+    stages = data["stages"]
+    for name, field, kind, help_text in (
+        ("stage_items", "total", "gauge", "Items of work declared for the stage."),
+        ("stage_done_total", "done", "counter", "Items finished by the stage, including failures."),
+        ("stage_failed_total", "failed", "counter", "Items that failed in the stage."),
+        ("stage_rate", "ratePerSec", "gauge", "Recent stage throughput in items per second."),
+        ("stage_eta_seconds", "etaSeconds", "gauge", "Projected seconds until the stage finishes."),
+    ):
+        metric(name, kind, help_text, [
+            (f'{{stage="{stage}"}}', values[field]) for stage, values in stages.items()
+        ])
+    metric("queue_depth", "gauge", "Items waiting in a bounded queue.", [
+        (f'{{queue="{name}"}}', depth) for name, depth in data["queues"].items()
+    ])
+    metric("in_flight", "gauge", "Requests currently in flight.", [
+        (f'{{kind="{kind}"}}', n) for kind, n in data["inFlight"].items()
+    ])
+    metric("events_total", "counter", "Pipeline event counters.", [
+        (f'{{name="{name}"}}', n) for name, n in sorted(data["counters"].items())
+    ])
+    metric("uptime_seconds", "gauge", "Seconds since the run started.", [
+        ("", data["uptimeSeconds"]),
+    ])
+    metric("eta_seconds", "gauge", "Projected seconds until the run finishes.", [
+        ("", data["etaSeconds"]),
+    ])
+    return "\n".join(lines) + "\n"
+
+
+def status_line(data: dict[str, Any] | None = None) -> str:
+    """One-line human-readable summary of a snapshot."""
+    data = data if data is not None else snapshot()
+    parts = []
+    for name, s in data["stages"].items():
+        part = f"{name} {s['done']}/{s['total']}"
+        if s["failed"]:
+            part += f" ({s['failed']} failed)"
+        if s["remaining"]:
+            part += f" {s['ratePerSec']:.1f}/s"
+        parts.append(part)
+    if any(data["queues"].values()):
+        parts.append("q " + " ".join(f"{k}={v}" for k, v in data["queues"].items()))
+    if data["inFlight"]["llm"]:
+        parts.append(f"llm in flight {data['inFlight']['llm']}")
+    retries = sum(data["retries"].values())
+    errors = sum(data["errors"].values())
+    if retries or errors:
+        parts.append(f"retries {retries} errors {errors}")
+    if data["etaSeconds"]:
+        parts.append(f"eta {_duration(data['etaSeconds'])} ({data['projectedFinish']})")
+    return f"[{_duration(data['uptimeSeconds'])}] " + " | ".join(parts)
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+# ---------------------------------------------------------------------------
+# Reporters
+# ---------------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body = prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path in ("/", "/status"):
+            body = json.dumps(snapshot(), indent=2).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("progress %s - %s", self.address_string(), format % args)
+
+
+class Reporter:
+    """Background HTTP endpoint and/or terminal status line for a run."""
+
+    def __init__(
+        self,
+        *,
+        port: int | None = None,
+        host: str = "127.0.0.1",
+        terminal: bool = False,
+        interval: float = 2.0,
+    ) -> None:
+        self.interval = interval
+        self.terminal = terminal
+        self._stop = threading.Event()
+        self._server: ThreadingHTTPServer | None = None
+        self._threads: list[threading.Thread] = []
+        if port is not None:
+            self._server = ThreadingHTTPServer((host, port), _Handler)
+            self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str | None:
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "Reporter":
+        if self._server is not None:
+            thread = threading.Thread(
+                target=self._server.serve_forever, name="progress-http", daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+            logger.info("Progress at %s/status and %s/metrics", self.url, self.url)
+        if self.terminal:
+            thread = threading.Thread(target=self._print_loop, name="progress-tty", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=self.interval + 1)
+        if self.terminal:
+            self._print(final=True)
+
+    def _print_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._print()
+
+    def _print(self, final: bool = False) -> None:
+        line = status_line()
+        if sys.stderr.isatty():
+            end = "\n" if final else ""
+            sys.stderr.write("\r\033[K" + line + end)
+        else:
+            sys.stderr.write(line + "\n")
+        sys.stderr.flush()
+
+    def __enter__(self) -> "Reporter":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
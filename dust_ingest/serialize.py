@@ -0,0 +1,69 @@
+"""JSON encoding for cache records and upload payloads.
+
+Encoding uses ``orjson`` when it is installed (optional, like ``zstandard``
+for blobs) and pydantic-core's Rust encoder otherwise — never the
+standard-library ``json`` module, which is 5–10× slower on element lists.
+Both produce the same bytes: UTF-8 without ``\\u`` escapes, compact
+separators, or two-space indentation.
+
+Models are dumped in batches through cached ``TypeAdapter(list[Model])``
+instances: one call into pydantic-core per batch, and no re-validation of
+instances that were validated when they were built.
+
+The upload ledger's content hashes stay on the standard library so they
+do not change with the installed packages (see
+:func:`dust_ingest.upload_ledger.record_hash`).
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, Iterable
+
+import pydantic_core
+from pydantic import BaseModel, TypeAdapter
+
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+
+def dumps(obj: Any, *, indent: bool = False) -> bytes:
+    """Encode *obj* as UTF-8 JSON (two-space indented if *indent*)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return pydantic_core.to_json(obj, indent=2 if indent else None)
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode JSON text or UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return pydantic_core.from_json(data)
+
+
+@functools.lru_cache(maxsize=None)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])  # type: ignore[valid-type]
+
+
+def dump_models(
+    models: Iterable[BaseModel],
+    *,
+    exclude: set[str] | None = None,
+    exclude_none: bool = False,
+) -> list[dict]:
+    """JSON-ready dicts for a batch of same-typed models, in one call.
+
+    Equivalent to ``[m.model_dump(mode="json", ...) for m in models]``.
+    """
+    models = list(models)
+    if not models:
+        return []
+    return _list_adapter(type(models[0])).dump_python(
+        models,
+        mode="json",
+        exclude={"__all__": exclude} if exclude else None,
+        exclude_none=exclude_none,
+    )
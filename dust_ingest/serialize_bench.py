@@ -0,0 +1,159 @@
+"""Benchmark of the bulk serialization path against per-record encoding.
+
+For a large synthetic record set (:func:`~dust_ingest.upload_bench.synthetic_records`)
+it times three jobs, each in two ways:
+
+* ``per-record`` — one ``model_dump()`` per model and the standard-library
+  ``json.dumps``, which is how every record used to be encoded;
+* ``batch`` — :func:`~dust_ingest.serialize.dump_models` over the whole
+  list and :func:`~dust_ingest.serialize.dumps` (orjson if installed,
+  pydantic-core otherwise), as the cache and uploader now do.
+
+The jobs are variant upload payloads (dump + wire encoding), page
+snapshot records for the cache (dump + indented encoding, without the
+blob write) and page upload payloads.  Both ways must produce equal
+output; the benchmark checks that before reporting.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from dust_ingest import serialize
+from dust_ingest.convex_upload import _page_payload
+from dust_ingest.models import PageSnapshot, PageVariant
+from dust_ingest.upload_bench import synthetic_records
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SerializeRow:
+    """Per-record vs batch timing for one job."""
+    job: str
+    records: int
+    per_record_s: float
+    batch_s: float
+
+    @property
+    def speedup(self) -> float:
+        return self.per_record_s / self.batch_s if self.batch_s > 0 else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Per-record reference implementations
+# ---------------------------------------------------------------------------
+
+def _json(obj: Any, indent: bool = False) -> bytes:
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _variants_per_record(variants: list[PageVariant]) -> list[bytes]:
+    out = []
+    for v in variants:
+        payload = v.model_dump(exclude={"model"})
+        payload["fakeMarks"] = [m.model_dump(exclude_none=True) for m in v.fakeMarks]
+        out.append(_json(payload))
+    return out
+
+
+def _variants_batch(variants: list[PageVariant]) -> list[bytes]:
+    dumped = serialize.dump_models(variants, exclude={"model"}, exclude_none=True)
+    return [serialize.dumps(p) for p in dumped]
+
+
+def _page_records_per_record(pages: list[PageSnapshot]) -> list[bytes]:
+    return [_json(p.model_dump(exclude={"html"}), indent=True) for p in pages]
+
+
+def _page_records_batch(pages: list[PageSnapshot]) -> list[bytes]:
+    return [
+        serialize.dumps(r, indent=True)
+        for r in serialize.dump_models(pages, exclude={"html"})
+    ]
+
+
+def _page_payloads_per_record(pages: list[PageSnapshot]) -> list[bytes]:
+    out = []
+    for page in pages:
+        elements = {e.elementId: e for e in page.elements}
+        assets = []
+        for asset in page.assets:
+            record = asset.model_dump(exclude_none=True)
+            element = elements.get(asset.elementId) if asset.elementId else None
+            if element is not None and element.src == asset.src:
+                if element.alt == asset.alt:
+                    record.pop("alt", None)
+                if element.srcset == asset.srcset:
+                    record.pop("srcset", None)
+            assets.append(record)
+        out.append(_json({
+            "pageId": page.pageId,
+            "url": page.url,
+            "title": page.title or "",
+            "capturedAt": page.capturedAt,
+            "elements": [e.model_dump(exclude_none=True) for e in page.elements],
+            "assets": assets,
+            "styles": page.styles,
+            "tags": page.tags,
+            "projectId": page.projectId,
+        }))
+    return out
+
+
+def _page_payloads_batch(pages: list[PageSnapshot]) -> list[bytes]:
+    return [serialize.dumps(_page_payload(p, include_html=False)) for p in pages]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _best(fn: Callable[[], list[bytes]], repeat: int) -> tuple[float, list[bytes]]:
+    best, out = float("inf"), []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def run_bench(num_records: int, *, repeat: int = 3) -> list[SerializeRow]:
+    """Time every job over *num_records* pages and variants."""
+    pages, _, variants = synthetic_records(num_records, html_bytes=0)
+    jobs = [
+        ("variant payloads", variants, _variants_per_record, _variants_batch),
+        ("page cache records", pages, _page_records_per_record, _page_records_batch),
+        ("page payloads", pages, _page_payloads_per_record, _page_payloads_batch),
+    ]
+    rows = []
+    for name, records, per_record, batch in jobs:
+        slow_s, expected = _best(lambda: per_record(records), repeat)
+        fast_s, actual = _best(lambda: batch(records), repeat)
+        if [json.loads(b) for b in expected] != [json.loads(b) for b in actual]:
+            raise AssertionError(f"{name}: batch output differs from per-record output")
+        rows.append(SerializeRow(name, len(records), slow_s, fast_s))
+        logger.info("%s: %.2fx", name, rows[-1].speedup)
+    return rows
+
+
+def format_table(rows: list[SerializeRow]) -> str:
+    """Render *rows* as a fixed-width text table."""
+    encoder = "orjson" if serialize.orjson is not None else "pydantic-core"
+    header = (
+        f"{'job':<20} {'records':>8} {'per-record s':>12} {'batch s':>9} "
+        f"{'speedup':>8}   (batch encoder: {encoder})"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r.job:<20} {r.records:>8} {r.per_record_s:>12.3f} {r.batch_s:>9.3f} "
+            f"{r.speedup:>7.1f}x"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,118 @@
+"""Multi-pattern matching of fakeMark snippets against element text.
+
+Every fakeMark names an element and quotes a snippet from it.  To check
+all of a variant's marks at once, an Aho-Corasick automaton is built over
+the normalized snippets and run over the normalized text of every element
+in a single pass.  The cost is linear in the text plus the number of
+matches, however many marks there are, and each snippet's hits are known
+for every element, not just the one it names.
+
+Stepping the automaton is a Python loop, so the scan first jumps, with one
+regular-expression search in C, to the next place where some snippet's
+first few characters occur.  It runs the automaton from there only until
+it falls back to the root state, so the Python loop covers only the text
+around possible matches.
+
+Normalization makes the comparison tolerant of what models change when
+quoting: case, runs of whitespace, and curly versus straight quotes.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+from typing import Iterable
+
+_PREFIX = 4  # characters of each pattern the jump search looks for
+_QUOTES = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "′": "'",
+    "“": '"', "”": '"', "„": '"', "″": '"',
+})
+
+
+def normalize(text: str) -> str:
+    """Casefolded *text* with straight quotes and single spaces."""
+    if not text.isascii():
+        text = text.translate(_QUOTES)
+    return " ".join(text.casefold().split())
+
+
+class Automaton:
+    """Aho-Corasick automaton over a fixed list of patterns."""
+
+    __slots__ = ("_goto", "_fail", "_out", "_starts")
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        patterns = list(patterns)
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(index)
+
+        # Breadth-first: a state's failure link points at the longest
+        # proper suffix of its path that is also a trie path.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt].extend(out[fail[nxt]])
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        # Every match starts where some pattern's prefix occurs.
+        prefixes = sorted({p[:_PREFIX] for p in patterns if p}, key=len, reverse=True)
+        self._starts = re.compile("|".join(map(re.escape, prefixes))) if prefixes else None
+
+    def hits(self, texts: Iterable[str]) -> dict[int, list[int]]:
+        """``{pattern index: [indices of the texts containing it]}``.
+
+        The texts are scanned as one string joined with newlines, which
+        :func:`normalize` never leaves in a text and which patterns must
+        therefore not contain, so no match spans two texts.
+        """
+        goto, fail, out, starts = self._goto, self._fail, self._out, self._starts
+        found: dict[int, list[int]] = {}
+        if starts is None:
+            return found
+        texts = list(texts)
+        joined = "\n".join(texts)
+        ends = list(accumulate(len(t) + 1 for t in texts))
+        pos, end = 0, len(joined)
+        while (m := starts.search(joined, pos)) is not None:
+            # In the root state no match is in progress, so skipping to
+            # the next possible start loses nothing.
+            state, pos = 0, m.start()
+            while pos < end:
+                ch = joined[pos]
+                pos += 1
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+                if not state:
+                    break
+                if out[state]:
+                    text_index = bisect_right(ends, pos - 1)
+                    for pattern in out[state]:
+                        where = found.setdefault(pattern, [])
+                        if not where or where[-1] != text_index:
+                            where.append(text_index)
+        return found
@@ -0,0 +1,258 @@
+"""SQLite cache backend.
+
+Stores every record in a single ``cache.db`` in WAL mode.  Each table keeps
+the compact JSON body of the pydantic model alongside indexed columns for
+the fields the pipeline filters on (``projectId``, ``pageId``, ``levelId``,
+``difficulty``, page tags), so queries such as "all variants for level 7"
+touch only the matching rows instead of walking the whole cache.
+
+Page HTML goes to the shared blob store; the ``pages.body`` JSON holds only
+the ``htmlBlob`` reference.  Writes are batched: each ``save_*`` call is one
+transaction.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from dust_ingest import serialize
+from dust_ingest.cache import CacheStore, page_from_record, pages_to_records
+from dust_ingest.models import Level, PageSnapshot, PageVariant
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    pageId     TEXT PRIMARY KEY,
+    projectId  TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    capturedAt TEXT NOT NULL,
+    body       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_projectId ON pages(projectId);
+
+CREATE TABLE IF NOT EXISTS page_tags (
+    pageId TEXT NOT NULL REFERENCES pages(pageId) ON DELETE CASCADE,
+    tag    TEXT NOT NULL,
+    PRIMARY KEY (pageId, tag)
+);
+CREATE INDEX IF NOT EXISTS page_tags_tag ON page_tags(tag);
+
+CREATE TABLE IF NOT EXISTS variants (
+    variantId  TEXT PRIMARY KEY,
+    pageId     TEXT NOT NULL,
+    projectId  TEXT NOT NULL,
+    levelId    TEXT NOT NULL,
+    difficulty INTEGER NOT NULL,
+    body       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS variants_pageId ON variants(pageId);
+CREATE INDEX IF NOT EXISTS variants_projectId ON variants(projectId);
+CREATE INDEX IF NOT EXISTS variants_levelId ON variants(levelId);
+CREATE INDEX IF NOT EXISTS variants_difficulty ON variants(difficulty);
+
+CREATE TABLE IF NOT EXISTS levels (
+    levelId    TEXT NOT NULL,
+    projectId  TEXT NOT NULL,
+    difficulty INTEGER NOT NULL,
+    body       TEXT NOT NULL,
+    PRIMARY KEY (levelId, projectId)
+);
+CREATE INDEX IF NOT EXISTS levels_projectId_difficulty ON levels(projectId, difficulty);
+
+CREATE TABLE IF NOT EXISTS manifest (
+    pageId      TEXT PRIMARY KEY,
+    url         TEXT NOT NULL,
+    contentHash TEXT NOT NULL,
+    scrapedAt   TEXT NOT NULL
+);
+"""
+
+
+def _where(**filters: object) -> tuple[str, list[object]]:
+    """Build a ``WHERE`` clause from the non-None *filters*."""
+    clauses = [f"{col} = ?" for col, val in filters.items() if val is not None]
+    params = [val for val in filters.values() if val is not None]
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class SqliteStore(CacheStore):
+    """Single-file, indexed cache store."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        # One connection shared across pipeline threads, serialized by a lock.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """Run a block as one transaction."""
+        with self._lock, self._conn:
+            yield self._conn
+
+    def _rows(self, sql: str, params: Iterable[object] = ()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, list(params)).fetchall()
+
+    # -- writers ------------------------------------------------------------
+
+    def save_pages(self, pages: Iterable[PageSnapshot]) -> None:
+        pages = list(pages)
+        with self._tx() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                [
+                    (p.pageId, p.projectId, p.url, p.capturedAt,
+                     serialize.dumps(record).decode("utf-8"))
+                    for p, record in zip(pages, pages_to_records(pages))
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM page_tags WHERE pageId = ?",
+                [(p.pageId,) for p in pages],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO page_tags VALUES (?, ?)",
+                [(p.pageId, tag) for p in pages for tag in p.tags],
+            )
+
+    def save_levels(self, levels: Iterable[Level]) -> None:
+        levels = list(levels)
+        with self._tx() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO levels VALUES (?, ?, ?, ?)",
+                [
+                    (lv.levelId, lv.projectId, lv.difficulty,
+                     serialize.dumps(record).decode("utf-8"))
+                    for lv, record in zip(levels, serialize.dump_models(levels))
+                ],
+            )
+
+    def _insert_variants(self, conn: sqlite3.Connection, variants: Iterable[PageVariant]) -> None:
+        variants = list(variants)
+        conn.executemany(
+            "INSERT OR REPLACE INTO variants VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (v.variantId, v.pageId, v.projectId, v.levelId, v.difficulty,
+                 serialize.dumps(record).decode("utf-8"))
+                for v, record in zip(variants, serialize.dump_models(variants))
+            ],
+        )
+
+    def save_variants(self, variants: Iterable[PageVariant]) -> None:
+        with self._tx() as conn:
+            self._insert_variants(conn, variants)
+
+    def delete_variants(self, variant_ids: Iterable[str]) -> None:
+        with self._tx() as conn:
+            conn.executemany(
+                "DELETE FROM variants WHERE variantId = ?",
+                [(vid,) for vid in variant_ids],
+            )
+
+    def replace_page_variants(self, page_id: str, variants: list[PageVariant]) -> None:
+        with self._tx() as conn:
+            conn.execute("DELETE FROM variants WHERE pageId = ?", (page_id,))
+            self._insert_variants(conn, variants)
+
+    # -- readers ------------------------------------------------------------
+
+    def load_page(self, page_id: str) -> PageSnapshot | None:
+        rows = self._rows("SELECT body FROM pages WHERE pageId = ?", [page_id])
+        return page_from_record(serialize.loads(rows[0][0])) if rows else None
+
+    def load_variant(self, variant_id: str) -> PageVariant | None:
+        rows = self._rows("SELECT body FROM variants WHERE variantId = ?", [variant_id])
+        return PageVariant.model_validate_json(rows[0][0]) if rows else None
+
+    def load_level(self, difficulty: int, project_id: str | None = None) -> Level | None:
+        where, params = _where(difficulty=difficulty, projectId=project_id)
+        rows = self._rows(f"SELECT body FROM levels{where} LIMIT 1", params)
+        return Level.model_validate_json(rows[0][0]) if rows else None
+
+    def load_page_variants(self, page_id: str) -> list[PageVariant]:
+        rows = self._rows(
+            "SELECT body FROM variants WHERE pageId = ? ORDER BY rowid", [page_id],
+        )
+        return [PageVariant.model_validate_json(body) for (body,) in rows]
+
+    def iter_pages(
+        self, *, project_id: str | None = None, tag: str | None = None,
+    ) -> Iterator[PageSnapshot]:
+        where, params = _where(**{"p.projectId": project_id, "t.tag": tag})
+        join = " JOIN page_tags t ON t.pageId = p.pageId" if tag is not None else ""
+        for (body,) in self._rows(
+            f"SELECT p.body FROM pages p{join}{where} ORDER BY p.pageId", params,
+        ):
+            yield page_from_record(serialize.loads(body))
+
+    def iter_variants(
+        self,
+        *,
+        project_id: str | None = None,
+        page_id: str | None = None,
+        level_id: str | None = None,
+        difficulty: int | None = None,
+    ) -> Iterator[PageVariant]:
+        where, params = _where(
+            projectId=project_id, pageId=page_id,
+            levelId=level_id, difficulty=difficulty,
+        )
+        for (body,) in self._rows(
+            f"SELECT body FROM variants{where} ORDER BY variantId", params,
+        ):
+            yield PageVariant.model_validate_json(body)
+
+    def iter_levels(self, *, project_id: str | None = None) -> Iterator[Level]:
+        where, params = _where(projectId=project_id)
+        for (body,) in self._rows(
+            f"SELECT body FROM levels{where} ORDER BY projectId, difficulty", params,
+        ):
+            yield Level.model_validate_json(body)
+
+    def blob_refs(self) -> set[str]:
+        return {
+            ref for (ref,) in self._rows(
+                "SELECT json_extract(body, '$.htmlBlob') FROM pages"
+            ) if ref
+        }
+
+    # -- manifest -----------------------------------------------------------
+
+    def load_manifest(self) -> dict[str, dict]:
+        return {
+            page_id: {"url": url, "contentHash": digest, "scrapedAt": scraped_at}
+            for page_id, url, digest, scraped_at in self._rows(
+                "SELECT pageId, url, contentHash, scrapedAt FROM manifest"
+            )
+        }
+
+    def update_manifest(self, entries: dict[str, dict]) -> None:
+        with self._tx() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO manifest VALUES (?, ?, ?, ?)",
+                [
+                    (pid, e["url"], e["contentHash"], e["scrapedAt"])
+                    for pid, e in entries.items()
+                ],
+            )
+
+    def stats(self) -> dict[str, int]:
+        """Row counts per table."""
+        return {
+            table: self._rows(f"SELECT COUNT(*) FROM {table}")[0][0]
+            for table in ("pages", "variants", "levels", "manifest")
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
@@ -0,0 +1,378 @@
+"""Synthetic crawler output for scale-testing the pipeline.
+
+:func:`synth_items` produces Apify-style dataset items (``url``, ``title``,
+``metadata``, rendered HTML under one of the field names
+:func:`~dust_ingest.apify_scrape._extract_html` accepts).  Their shape is
+controlled by :class:`SynthSpec`:
+
+* size and element count — paragraphs per page and sentences per paragraph
+  (each varies ±50% around the mean);
+* nesting — wrapper ``<div>`` depth around the article body;
+* image density — chance of a ``<figure>`` after each paragraph;
+* list density — chance of a ``<ul>`` after each paragraph;
+* duplicates — fraction of items whose HTML repeats an earlier page under a
+  new URL (mirrors and syndicated copies), plus a fraction the crawler
+  returned twice with the same URL;
+* empty items — fraction with no usable HTML (the scraper skips them).
+
+Pages go through the real :func:`~dust_ingest.apify_scrape._items_to_snapshots`
+to become :class:`PageSnapshot` objects.
+
+:func:`run_scaling` times each stage for growing page counts.  It reports
+the seconds, microseconds per page and peak traced memory of each stage,
+plus the growth exponent between consecutive sizes (1.0 = linear).  The
+stages are snapshot conversion, variant generation against a zero-latency
+:class:`~dust_ingest.mock_llm.MockLLM`, level assignment and building, and
+cache writes and reads.  Peak memory is the growth in resident set size
+during the stage (Linux), or with ``trace_memory`` the exact peak Python
+heap, at the cost of much slower timings.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from dust_ingest import cache
+from dust_ingest.apify_scrape import _HTML_FIELDS, _items_to_snapshots
+from dust_ingest.html_bench import _chrome, _img, _para, _sentence
+from dust_ingest.leveling import rebuild_levels_from_variants
+from dust_ingest.llm_alter import assign_level, generate_variants
+from dust_ingest.mock_llm import MockLLM
+from dust_ingest.models import PageSnapshot, PipelineConfig, UrlEntry
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("convert", "alter", "levels", "cache")
+# Growth exponents above this between two sizes are flagged.
+SUPERLINEAR = 1.2
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):  # Windows
+    _PAGE_SIZE = 4096
+
+_DOMAINS = ("news.example.com", "blog.example.org", "docs.example.net", "wiki.example.edu")
+_TAGS = ("news", "blog", "docs", "wiki")
+
+
+@dataclass
+class SynthSpec:
+    """Shape of a synthetic corpus."""
+    pages: int = 1000
+    paragraphs: int = 20
+    sentences: int = 4
+    nesting: int = 6
+    image_rate: float = 0.15
+    list_rate: float = 0.1
+    duplicate_rate: float = 0.05
+    repeat_rate: float = 0.01
+    empty_rate: float = 0.01
+    nav_links: int = 40
+    seed: int = 0
+
+
+def _vary(rng: random.Random, mean: int) -> int:
+    return max(1, round(mean * rng.uniform(0.5, 1.5)))
+
+
+def _page_html(rng: random.Random, spec: SynthSpec, n: int) -> str:
+    head, foot = _chrome(rng, spec.nav_links)
+    body = ["<main>", "<div class='wrap'>" * spec.nesting]
+    body.append(f"<article><h1>{_sentence(rng, 4, 10)}</h1>")
+    for i in range(_vary(rng, spec.paragraphs)):
+        if i and i % 6 == 0:
+            body.append(f"<h2>{_sentence(rng, 2, 6)}</h2>")
+        body.append(_para(rng, _vary(rng, spec.sentences), links=rng.randint(0, 2)))
+        if rng.random() < spec.image_rate:
+            body.append(_img(rng, n * 1000 + i))
+        if rng.random() < spec.list_rate:
+            body.append("<ul>" + "".join(
+                f"<li>{_sentence(rng, 4, 12)}</li>" for _ in range(rng.randint(2, 6))
+            ) + "</ul>")
+    body.append("</article>")
+    body.append("</div>" * spec.nesting)
+    body.append("</main>")
+    return head + "".join(body) + foot
+
+
+def synth_items(spec: SynthSpec) -> Iterator[dict[str, Any]]:
+    """Yield ``spec.pages`` crawler dataset items."""
+    rng = random.Random(spec.seed)
+    originals: list[tuple[dict[str, Any], str]] = []
+    for n in range(spec.pages):
+        roll = rng.random()
+        if originals and roll < spec.repeat_rate:
+            yield dict(rng.choice(originals)[0])
+            continue
+        domain = _DOMAINS[n % len(_DOMAINS)]
+        url = f"https://{domain}/articles/{n:07d}"
+        if roll < spec.repeat_rate + spec.empty_rate:
+            yield {"url": url, "title": "Empty", "html": ""}
+            continue
+        if originals and roll < spec.repeat_rate + spec.empty_rate + spec.duplicate_rate:
+            html = rng.choice(originals)[1]
+        else:
+            html = _page_html(rng, spec, n)
+        title = _sentence(rng, 3, 8).rstrip(".")
+        item = {
+            "url": url,
+            "title": title if rng.random() < 0.8 else None,
+            "metadata": {"title": title},
+            _HTML_FIELDS[n % 3]: html,
+        }
+        if len(originals) < 1000:
+            originals.append((item, html))
+        yield item
+
+
+def synth_urls(items: list[dict[str, Any]]) -> list[UrlEntry]:
+    """Input-file entries for *items* (unique URLs, in order)."""
+    seen: dict[str, UrlEntry] = {}
+    for item in items:
+        url = item["url"]
+        if url not in seen:
+            domain = url.split("/")[2]
+            seen[url] = UrlEntry(url=url, tags=[_TAGS[_DOMAINS.index(domain)]])
+    return list(seen.values())
+
+
+def synth_snapshots(spec: SynthSpec, project_id: str = "synth") -> list[PageSnapshot]:
+    """Generate items for *spec* and convert them like a real scrape."""
+    items = list(synth_items(spec))
+    return _items_to_snapshots(items, synth_urls(items), project_id)
+
+
+def write_corpus(spec: SynthSpec, out_dir: str | Path, project_id: str = "synth") -> list[dict]:
+    """Write ``items.jsonl`` and an input file ``urls.json`` to *out_dir*."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    items = list(synth_items(spec))
+    with (out / "items.jsonl").open("w", encoding="utf-8") as fh:
+        for item in items:
+            fh.write(json.dumps(item) + "\n")
+    (out / "urls.json").write_text(json.dumps({
+        "projectId": project_id,
+        "urls": [u.model_dump() for u in synth_urls(items)],
+    }, indent=1), encoding="utf-8")
+    return items
+
+
+# ---------------------------------------------------------------------------
+# Scaling benchmark
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ScaleRow:
+    """One stage at one corpus size."""
+    stage: str
+    pages: int
+    seconds: float
+    peak_mb: float | None
+    exponent: float | None = None
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def us_per_page(self) -> float:
+        return self.seconds / self.pages * 1e6 if self.pages else 0.0
+
+
+class _RssSampler:
+    """Peak resident set size above the starting point, sampled on a thread.
+
+    Cheap enough to leave on while timing; Linux only (``/proc``).
+    """
+
+    def __init__(self, interval: float = 0.02) -> None:
+        self.interval = interval
+        self.base = self.peak = self._rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    @staticmethod
+    def _rss() -> int:
+        try:
+            with open("/proc/self/statm", encoding="ascii") as fh:
+                return int(fh.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    def __enter__(self) -> "_RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+    @property
+    def peak_mb(self) -> float | None:
+        return (self.peak - self.base) / 1e6 if self.base else None
+
+
+def _measure(fn: Callable[[], Any], trace_memory: bool) -> tuple[Any, float, float | None]:
+    """Run *fn*; return ``(result, seconds, peak MB)``.
+
+    Peak memory is the RSS growth by default, or the peak traced Python heap
+    with *trace_memory* (exact, but ``tracemalloc`` slows parsing ~5-10×).
+    """
+    if not trace_memory:
+        gc.collect()
+        with _RssSampler() as rss:
+            started = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - started
+        return result, seconds, rss.peak_mb
+
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, (peak - base) / 1e6
+
+
+def _scale_once(
+    spec: SynthSpec,
+    stages: tuple[str, ...],
+    workers: int,
+    num_levels: int,
+    trace_memory: bool,
+) -> list[ScaleRow]:
+    items = list(synth_items(spec))
+    urls = synth_urls(items)
+    rows: list[ScaleRow] = []
+
+    def measure(fn: Callable[[], Any]) -> tuple[Any, float, float | None]:
+        return _measure(fn, trace_memory)
+
+    pages, seconds, peak = measure(lambda: _items_to_snapshots(items, urls, "synth"))
+    if "convert" in stages:
+        rows.append(ScaleRow("convert", spec.pages, seconds, peak, extra={"snapshots": len(pages)}))
+
+    variants: list = []
+    if "alter" in stages or "levels" in stages or "cache" in stages:
+        with MockLLM(latency_ms=0, latency_sigma=0, seed=spec.seed) as server:
+            config = PipelineConfig(
+                apify_token="", llm_api_key="mock", convex_url="",
+                llm_base_url=server.url, llm_model="mock",
+            )
+            (variants, _), seconds, peak = measure(lambda: generate_variants(
+                pages, config, "synth", num_levels=num_levels, max_workers=workers,
+            ))
+        if "alter" in stages:
+            rows.append(ScaleRow("alter", spec.pages, seconds, peak, extra={"variants": len(variants)}))
+
+    if "levels" in stages:
+        def levels() -> list:
+            counts: dict[int, int] = {}
+            placed = [v for v in variants if assign_level(v, counts, "synth", num_levels)]
+            return rebuild_levels_from_variants(placed, "synth", num_levels)
+
+        built, seconds, peak = measure(levels)
+        rows.append(ScaleRow("levels", spec.pages, seconds, peak, extra={"levels": len(built)}))
+
+    if "cache" in stages:
+        original_cache_dir = cache.CACHE_DIR
+        with tempfile.TemporaryDirectory(prefix="dust-synth-") as tmp:
+            cache.CACHE_DIR = Path(tmp)
+            try:
+                def round_trip() -> int:
+                    cache.save_pages(pages)
+                    cache.record_pages(pages)
+                    cache.save_variants(variants)
+                    cache.record_variants(pages, variants)
+                    return sum(1 for _ in cache.iter_pages(project_id="synth"))
+
+                loaded, seconds, peak = measure(round_trip)
+            finally:
+                cache.CACHE_DIR = original_cache_dir
+                # Release the throw-away store (and any open database) first.
+                for key in [k for k in cache._stores if k[1] == Path(tmp)]:
+                    cache._stores.pop(key)
+        rows.append(ScaleRow("cache", spec.pages, seconds, peak, extra={"reloaded": loaded}))
+    return rows
+
+
+def run_scaling(
+    sizes: list[int],
+    spec: SynthSpec | None = None,
+    *,
+    stages: tuple[str, ...] = STAGES,
+    workers: int = 40,
+    num_levels: int = 10,
+    trace_memory: bool = False,
+) -> list[ScaleRow]:
+    """Measure every stage for each corpus size in *sizes*."""
+    spec = spec or SynthSpec()
+    quiet = [
+        logging.getLogger(name)
+        for name in (
+            "dust_ingest.html_sanitize", "dust_ingest.normalize", "dust_ingest.apify_scrape",
+            "dust_ingest.llm_alter", "dust_ingest.leveling", "dust_ingest.cache", "openai",
+        )
+    ]
+    previous_levels = [lg.level for lg in quiet]
+    for lg in quiet:
+        lg.setLevel(logging.ERROR)
+    rows: list[ScaleRow] = []
+    try:
+        for size in sorted(sizes):
+            spec_n = replace(spec, pages=size)
+            size_rows = _scale_once(spec_n, stages, workers, num_levels, trace_memory)
+            for row in size_rows:
+                previous = next(
+                    (r for r in reversed(rows) if r.stage == row.stage), None,
+                )
+                if previous and previous.seconds > 0 and row.seconds > 0:
+                    row.exponent = math.log(row.seconds / previous.seconds) / math.log(
+                        row.pages / previous.pages
+                    )
+                logger.info(
+                    "%s @ %d pages: %.2fs (%.0f µs/page)",
+                    row.stage, row.pages, row.seconds, row.us_per_page,
+                )
+            rows.extend(size_rows)
+    finally:
+        for lg, level in zip(quiet, previous_levels):
+            lg.setLevel(level)
+    return rows
+
+
+def format_table(rows: list[ScaleRow]) -> str:
+    """Render *rows* grouped by stage, flagging superlinear growth."""
+    header = (
+        f"{'stage':<8} {'pages':>7} {'secs':>8} {'µs/page':>9} {'peak MB':>8} "
+        f"{'growth':>7}  notes"
+    )
+    lines = [header, "-" * len(header)]
+    for stage in STAGES:
+        for r in (r for r in rows if r.stage == stage):
+            growth = f"n^{r.exponent:.2f}" if r.exponent is not None else "-"
+            flag = "  SUPERLINEAR" if r.exponent is not None and r.exponent > SUPERLINEAR else ""
+            notes = " ".join(f"{k}={v}" for k, v in r.extra.items())
+            lines.append(
+                f"{r.stage:<8} {r.pages:>7} {r.seconds:>8.2f} {r.us_per_page:>9.0f} "
+                f"{'-' if r.peak_mb is None else f'{r.peak_mb:.1f}':>8} {growth:>7}  {notes}{flag}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,209 @@
+"""Lightweight timing spans and counters for pipeline runs.
+
+Instrumented code wraps work in ``with tracing.span("alter.llm_call",
+page=page.pageId):`` and bumps counters with ``tracing.count("llm.retry")``.
+Both are no-ops until :func:`enable` is called (``--metrics-out``): ``span``
+then returns a shared do-nothing context manager, so the disabled cost is a
+global lookup and a function call.
+
+When enabled, every span's duration is recorded by name (dotted names such
+as ``scrape.extract`` group related spans), by nesting path within its
+thread (``stage.alter/alter.variant/alter.llm_call``) and, when a ``page`` is
+given, by page.  :func:`report` aggregates count / total / p50 / p95 / p99 /
+max per span, the counters, and the slowest pages.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class _Recorder:
+    """Collects span durations and counters for one run."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self.paths: dict[str, list[float]] = defaultdict(list)
+        self.pages: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.counters: dict[str, int] = defaultdict(int)
+        self.active: dict[str, int] = defaultdict(int)
+
+    def stack(self) -> list[str]:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "page", "start", "path")
+
+    def __init__(self, recorder: _Recorder, name: str, page: str | None) -> None:
+        self.recorder = recorder
+        self.name = name
+        self.page = page
+
+    def __enter__(self) -> "_Span":
+        stack = self.recorder.stack()
+        stack.append(self.name)
+        self.path = "/".join(stack)
+        with self.recorder.lock:
+            self.recorder.active[self.name] += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        elapsed = time.perf_counter() - self.start
+        self.recorder.stack().pop()
+        with self.recorder.lock:
+            self.recorder.active[self.name] -= 1
+            self.recorder.durations[self.name].append(elapsed)
+            self.recorder.paths[self.path].append(elapsed)
+            if self.page is not None:
+                self.recorder.pages[self.page][self.name] += elapsed
+
+
+_recorder: _Recorder | None = None
+
+
+def enable() -> None:
+    """Start recording spans and counters (resets any previous run)."""
+    global _recorder
+    _recorder = _Recorder()
+
+
+def disable() -> None:
+    """Stop recording and discard collected data."""
+    global _recorder
+    _recorder = None
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+def span(name: str, page: str | None = None) -> _Span | _NoopSpan:
+    """Time the enclosed block as *name* (optionally attributed to *page*)."""
+    recorder = _recorder
+    if recorder is None:
+        return _NOOP
+    return _Span(recorder, name, page)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add *n* to counter *name*."""
+    recorder = _recorder
+    if recorder is None:
+        return
+    with recorder.lock:
+        recorder.counters[name] += n
+
+
+def counters() -> dict[str, int]:
+    """Current counter values (empty when disabled)."""
+    recorder = _recorder
+    if recorder is None:
+        return {}
+    with recorder.lock:
+        return dict(recorder.counters)
+
+
+def active() -> dict[str, int]:
+    """Number of currently open spans per name, e.g. LLM calls in flight."""
+    recorder = _recorder
+    if recorder is None:
+        return {}
+    with recorder.lock:
+        return {name: n for name, n in recorder.active.items() if n}
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _summarize(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "totalMs": round(total * 1000, 3),
+        "meanMs": round(total / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50Ms": round(_percentile(ordered, 50) * 1000, 3),
+        "p95Ms": round(_percentile(ordered, 95) * 1000, 3),
+        "p99Ms": round(_percentile(ordered, 99) * 1000, 3),
+        "maxMs": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def report(slowest_pages: int = 20) -> dict[str, Any]:
+    """Aggregate everything recorded since :func:`enable`."""
+    recorder = _recorder
+    if recorder is None:
+        return {}
+    with recorder.lock:
+        durations = {k: list(v) for k, v in recorder.durations.items()}
+        paths = {k: list(v) for k, v in recorder.paths.items()}
+        pages = {k: dict(v) for k, v in recorder.pages.items()}
+        counters = dict(recorder.counters)
+
+    page_totals = sorted(
+        pages.items(), key=lambda item: sum(item[1].values()), reverse=True,
+    )[:slowest_pages]
+    return {
+        "startedAt": recorder.started_at,
+        "wallSeconds": round(time.perf_counter() - recorder.started, 3),
+        "spans": {name: _summarize(v) for name, v in sorted(durations.items())},
+        "tree": {
+            path: {"count": len(v), "totalMs": round(sum(v) * 1000, 3)}
+            for path, v in sorted(paths.items())
+        },
+        "counters": dict(sorted(counters.items())),
+        "slowestPages": [
+            {
+                "pageId": page_id,
+                "totalMs": round(sum(spans.values()) * 1000, 3),
+                "spansMs": {k: round(v * 1000, 3) for k, v in sorted(spans.items())},
+            }
+            for page_id, spans in page_totals
+        ],
+    }
+
+
+def write_report(path: str | Path, extra: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Write :func:`report` (plus any *extra* sections) to *path* as JSON."""
+    data = {**report(), **(extra or {})}
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    return data
@@ -0,0 +1,201 @@
+"""Upload throughput benchmark against the local Convex stand-in.
+
+Drives the real uploader (:func:`~dust_ingest.convex_upload.upload_all`)
+against a fresh :class:`~dust_ingest.mock_convex.MockConvex` for every
+combination of batch size and concurrency, so those knobs can be tuned
+offline and payloads that Convex would reject show up before a real run.
+
+Each run uses a throw-away cache directory, so neither the upload ledger
+nor the dead-letter queue of the real cache is touched.
+"""
+
+from __future__ import annotations
+
+import logging
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from dust_ingest import cache
+from dust_ingest.convex_upload import _percentile, upload_all
+from dust_ingest.leveling import _mutation_params
+from dust_ingest.mock_convex import MockConvex
+from dust_ingest.models import (
+    FakeMark,
+    Level,
+    PageAsset,
+    PageElement,
+    PageSnapshot,
+    PageVariant,
+    PipelineConfig,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BenchRow:
+    """One batch-size × concurrency measurement."""
+    batch_records: int
+    concurrency: int
+    records: int
+    uploaded: int
+    seconds: float
+    calls: int
+    call_p50_ms: float
+    call_p95_ms: float
+    server: dict = field(default_factory=dict)
+    rejections: list[str] = field(default_factory=list)
+
+    @property
+    def rate(self) -> float:
+        return self.uploaded / self.seconds if self.seconds > 0 else 0.0
+
+
+def synthetic_records(
+    num_pages: int,
+    *,
+    paragraphs: int = 12,
+    html_bytes: int = 20_000,
+    project_id: str = "bench",
+    num_levels: int = 10,
+) -> tuple[list[PageSnapshot], list[Level], list[PageVariant]]:
+    """Build *num_pages* pages with one valid variant each, plus levels."""
+    pages: list[PageSnapshot] = []
+    variants: list[PageVariant] = []
+    for i in range(num_pages):
+        page_id = f"{i:016x}"
+        elements = [PageElement(elementId=f"{page_id}-h", tag="h1", text=f"Page {i}")]
+        elements += [
+            PageElement(
+                elementId=f"{page_id}-p{k}", tag="p",
+                text=f"Paragraph {k} of page {i} states a plain, checkable fact.",
+            )
+            for k in range(paragraphs)
+        ]
+        elements.append(PageElement(
+            elementId=f"{page_id}-img", tag="img",
+            src=f"https://example.com/{i}.png", alt=f"Figure {i}",
+        ))
+        pages.append(PageSnapshot(
+            pageId=page_id,
+            url=f"https://example.com/articles/{i}",
+            title=f"Article {i}",
+            capturedAt="2026-01-01T00:00:00+00:00",
+            html="<html><body>" + "x" * html_bytes + "</body></html>",
+            elements=elements,
+            assets=[PageAsset(
+                src=f"https://example.com/{i}.png", alt=f"Figure {i}",
+                elementId=f"{page_id}-img",
+            )],
+            tags=["bench"],
+            projectId=project_id,
+        ))
+        difficulty = i % num_levels + 1
+        variants.append(PageVariant(
+            variantId=f"v{page_id}",
+            pageId=page_id,
+            levelId=f"{project_id}_level_{difficulty:02d}",
+            difficulty=difficulty,
+            alteredContent="".join(
+                f'<p data-element-id="{e.elementId}">{e.text}</p>'
+                for e in elements if e.tag == "p"
+            ),
+            fakeMarks=[FakeMark(
+                kind="FAKE", elementId=f"{page_id}-p0",
+                snippet="Paragraph 0", explanation="Synthetic fake.",
+            )],
+            projectId=project_id,
+        ))
+
+    levels = [
+        Level(
+            levelId=f"{project_id}_level_{d:02d}",
+            projectId=project_id,
+            difficulty=d,
+            pageIds=[v.pageId for v in variants if v.difficulty == d],
+            mutationParams=_mutation_params(d, num_levels),
+        )
+        for d in range(1, num_levels + 1)
+    ]
+    return pages, levels, variants
+
+
+def run_upload_bench(
+    pages: list[PageSnapshot],
+    levels: list[Level],
+    variants: list[PageVariant],
+    *,
+    batch_sizes: list[int],
+    concurrencies: list[int],
+    latency_ms: float = 20.0,
+    jitter_ms: float = 5.0,
+    error_rate: float = 0.0,
+    rate_limit: float | None = None,
+    page_html: bool = True,
+    max_retries: int = 4,
+) -> list[BenchRow]:
+    """Upload the records once per ``(batch size, concurrency)`` pair."""
+    rows: list[BenchRow] = []
+    original_cache_dir = cache.CACHE_DIR
+    try:
+        for batch_records in batch_sizes:
+            for concurrency in concurrencies:
+                with tempfile.TemporaryDirectory(prefix="dust-bench-") as tmp, MockConvex(
+                    latency_ms=latency_ms, jitter_ms=jitter_ms,
+                    error_rate=error_rate, rate_limit=rate_limit, seed=0,
+                ) as server:
+                    cache.CACHE_DIR = Path(tmp)
+                    config = PipelineConfig(
+                        apify_token="", llm_api_key="", convex_url=server.url,
+                        upload_batch_records=batch_records,
+                        upload_concurrency=concurrency,
+                        upload_max_retries=max_retries,
+                        upload_page_html=page_html,
+                    )
+                    report = upload_all(pages, levels, variants, config, force=True)
+                    kinds = (report.pages, report.levels, report.variants)
+                    latencies = [lat for s in kinds for lat in s.call_latencies]
+                    rows.append(BenchRow(
+                        batch_records=batch_records,
+                        concurrency=concurrency,
+                        records=sum(s.records for s in kinds),
+                        uploaded=sum(s.ok for s in kinds),
+                        seconds=max(s.elapsed for s in kinds),
+                        calls=sum(s.calls for s in kinds),
+                        call_p50_ms=_percentile(latencies, 50) * 1000,
+                        call_p95_ms=_percentile(latencies, 95) * 1000,
+                        server=server.stats.snapshot(),
+                        rejections=server.stats.rejections[:5],
+                    ))
+                    logger.info(
+                        "batch=%d concurrency=%d: %.1f rec/s",
+                        batch_records, concurrency, rows[-1].rate,
+                    )
+    finally:
+        cache.CACHE_DIR = original_cache_dir
+    return rows
+
+
+def format_table(rows: list[BenchRow]) -> str:
+    """Render *rows* as a fixed-width text table."""
+    header = (
+        f"{'batch':>6} {'conc':>5} {'records':>8} {'ok':>8} {'secs':>7} "
+        f"{'rec/s':>8} {'calls':>6} {'p50ms':>7} {'p95ms':>7} "
+        f"{'MB sent':>8} {'429':>5} {'5xx':>5} {'reject':>6}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r.batch_records:>6} {r.concurrency:>5} {r.records:>8} {r.uploaded:>8} "
+            f"{r.seconds:>7.2f} {r.rate:>8.1f} {r.calls:>6} {r.call_p50_ms:>7.1f} "
+            f"{r.call_p95_ms:>7.1f} {r.server.get('bytesIn', 0) / 1e6:>8.2f} "
+            f"{r.server.get('rateLimited', 0):>5} {r.server.get('injectedErrors', 0):>5} "
+            f"{r.server.get('rejected', 0):>6}"
+        )
+    rejections = {msg for r in rows for msg in r.rejections}
+    if rejections:
+        lines.append("")
+        lines.append("Rejected payloads (first few):")
+        lines.extend(f"  {msg}" for msg in sorted(rejections)[:10])
+    return "\n".join(lines)
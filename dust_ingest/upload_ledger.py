@@ -0,0 +1,128 @@
+"""Local ledger of records each Convex deployment has already accepted.
+
+Every confirmed upload appends ``{"d": deployment, "k": kind, "id": record
+id, "h": content hash}`` to ``cache/upload_ledger.jsonl``; the last line for
+a key wins.  Before uploading, records whose payload hash matches the ledger
+entry for the target deployment are skipped, so re-running a build only
+sends what actually changed.  The file is append-only (cheap for streaming
+uploads, safe if a run is interrupted) and is compacted on load once stale
+lines outnumber live entries.
+
+Delete the file or pass ``--force`` after wiping a deployment.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from dust_ingest import cache
+
+logger = logging.getLogger(__name__)
+
+LEDGER_FILE = "upload_ledger.jsonl"
+
+_Key = tuple[str, str, str]
+
+
+def record_hash(payload: dict) -> str:
+    """Stable content hash of an upload payload."""
+    encoded = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def deployment_key(convex_url: str) -> str:
+    """Normalize a deployment URL for use as a ledger key."""
+    return convex_url.rstrip("/")
+
+
+class UploadLedger:
+    """Append-only record of confirmed ``(deployment, kind, id) → hash``."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[_Key, str] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.is_file():
+            return
+        lines = 0
+        with self.path.open(encoding="utf-8") as fh:
+            for line in fh:
+                lines += 1
+                try:
+                    row = json.loads(line)
+                    self._entries[(row["d"], row["k"], row["id"])] = row["h"]
+                except (ValueError, KeyError, TypeError):
+                    # A torn final line from an interrupted run.
+                    continue
+        if lines > 2 * len(self._entries) + 1000:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the file with one line per live entry."""
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                for (deployment, kind, record_id), digest in self._entries.items():
+                    fh.write(_line(deployment, kind, record_id, digest))
+            os.replace(tmp, self.path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        logger.debug("Compacted upload ledger to %d entries", len(self._entries))
+
+    def is_current(self, deployment: str, kind: str, record_id: str, digest: str) -> bool:
+        """Return True if *deployment* last confirmed this exact record."""
+        with self._lock:
+            return self._entries.get((deployment, kind, record_id)) == digest
+
+    def confirm(
+        self, deployment: str, kind: str, records: Iterable[tuple[str, str]],
+    ) -> None:
+        """Record ``(record_id, digest)`` pairs as accepted by *deployment*."""
+        lines = []
+        with self._lock:
+            for record_id, digest in records:
+                key = (deployment, kind, record_id)
+                if self._entries.get(key) == digest:
+                    continue
+                self._entries[key] = digest
+                lines.append(_line(deployment, kind, record_id, digest))
+            if lines:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as fh:
+                    fh.writelines(lines)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _line(deployment: str, kind: str, record_id: str, digest: str) -> str:
+    return json.dumps(
+        {"d": deployment, "k": kind, "id": record_id, "h": digest},
+        separators=(",", ":"), ensure_ascii=False,
+    ) + "\n"
+
+
+_ledgers: dict[Path, UploadLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger() -> UploadLedger:
+    """Return the ledger for the current cache directory."""
+    path = cache.CACHE_DIR / LEDGER_FILE
+    with _ledgers_lock:
+        if path not in _ledgers:
+            _ledgers[path] = UploadLedger(path)
+        return _ledgers[path]
@@ -0,0 +1,261 @@
+"""Bulk re-validation of cached variants (``python -m dust_ingest validate``).
+
+Streams every cached variant through
+:func:`~dust_ingest.variant_validation.validate_page_variant`, the same
+check generation and upload apply, so a rule change (``MIN_TEXT_ELEMENTS``,
+a new check) can be applied to an existing cache without regenerating it.
+
+Variants are read in the main process and validated in chunks by a pool of
+worker processes, with a bounded number of chunks in flight so memory stays
+flat however large the cache is.  With one worker everything runs inline.
+
+The report counts failures by reason, difficulty and generating model.
+Validation also repairs fakeMarks that name the wrong element; workers send
+the corrected elementIds back so :func:`save_repairs` can write them to the
+cache.
+:func:`quarantine` takes the failed variants out of the upload set: each
+is appended to ``cache/quarantine.jsonl`` with its reason and dropped from
+its page's current variants, so ``upload`` and ``levels`` no longer see it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from dust_ingest import cache
+from dust_ingest.models import PageVariant
+from dust_ingest.variant_validation import validate_page_variant
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_FILE = "quarantine.jsonl"
+CHUNK_SIZE = 256
+_UNKNOWN_MODEL = "(unknown)"
+
+
+@dataclass
+class Failure:
+    """One variant that failed validation."""
+    variantId: str
+    pageId: str
+    difficulty: int
+    model: str
+    reason: str
+
+
+@dataclass
+class AuditReport:
+    """Outcome of validating a set of variants."""
+    variants: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+    workers: int = 1
+    byReason: Counter[str] = field(default_factory=Counter)
+    byDifficulty: dict[int, list[int]] = field(default_factory=lambda: defaultdict(lambda: [0, 0]))
+    byModel: dict[str, list[int]] = field(default_factory=lambda: defaultdict(lambda: [0, 0]))
+    failures: list[Failure] = field(default_factory=list)
+    repaired: list[PageVariant] = field(default_factory=list)
+
+    def add(
+        self,
+        variant: PageVariant,
+        ok: bool,
+        reason: str,
+        element_ids: list[str | None] | None = None,
+    ) -> None:
+        model = variant.model or _UNKNOWN_MODEL
+        self.variants += 1
+        if element_ids is not None:
+            for mark, element_id in zip(variant.fakeMarks, element_ids):
+                mark.elementId = element_id
+            # Failures are quarantined, not repaired.
+            if ok:
+                self.repaired.append(variant)
+        self.byDifficulty[variant.difficulty][0] += 1
+        self.byModel[model][0] += 1
+        if ok:
+            return
+        self.invalid += 1
+        self.byReason[reason_key(reason)] += 1
+        self.byDifficulty[variant.difficulty][1] += 1
+        self.byModel[model][1] += 1
+        self.failures.append(
+            Failure(variant.variantId, variant.pageId, variant.difficulty, model, reason)
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        def groups(counts: dict[Any, list[int]]) -> dict[str, dict[str, int]]:
+            return {
+                str(key): {"variants": total, "invalid": bad}
+                for key, (total, bad) in sorted(counts.items())
+            }
+
+        return {
+            "checkedAt": datetime.now(timezone.utc).isoformat(),
+            "variants": self.variants,
+            "valid": self.variants - self.invalid,
+            "invalid": self.invalid,
+            "repaired": [v.variantId for v in self.repaired],
+            "seconds": round(self.seconds, 3),
+            "workers": self.workers,
+            "byReason": dict(self.byReason.most_common()),
+            "byDifficulty": groups(self.byDifficulty),
+            "byModel": groups(self.byModel),
+            "failures": [vars(f) for f in self.failures],
+        }
+
+
+def reason_key(reason: str) -> str:
+    """Group reasons that differ only in their numbers ("only N text elements ...")."""
+    return re.sub(r"\d+", "N", reason)
+
+
+# ---------------------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------------------
+
+_Result = tuple[bool, str, list[str | None] | None]
+
+
+def _validate_chunk(variants: list[PageVariant]) -> list[_Result]:
+    """Validate *variants*, with each one's fakeMark elementIds if any were repaired.
+
+    Repairs made in a worker process are lost with its copy of the
+    variant, so they travel back with the result.
+    """
+    results: list[_Result] = []
+    for v in variants:
+        before = [m.elementId for m in v.fakeMarks]
+        ok, reason = validate_page_variant(v)
+        after = [m.elementId for m in v.fakeMarks]
+        results.append((ok, reason, after if after != before else None))
+    return results
+
+
+def _chunks(variants: Iterable[PageVariant], size: int) -> Iterator[list[PageVariant]]:
+    chunk: list[PageVariant] = []
+    for v in variants:
+        chunk.append(v)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def audit_variants(
+    variants: Iterable[PageVariant],
+    *,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> AuditReport:
+    """Validate *variants* (any iterable; consumed lazily) in *workers* processes."""
+    workers = max(1, workers or os.cpu_count() or 1)
+    report = AuditReport(workers=workers)
+    started = time.perf_counter()
+    chunks = _chunks(variants, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            for v, result in zip(chunk, _validate_chunk(chunk)):
+                report.add(v, *result)
+        report.seconds = time.perf_counter() - started
+        return report
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: dict[Future, list[PageVariant]] = {}
+        for chunk in chunks:
+            pending[pool.submit(_validate_chunk, chunk)] = chunk
+            if len(pending) < workers * 2:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for v, result in zip(pending.pop(future), future.result()):
+                    report.add(v, *result)
+        for future in list(pending):
+            for v, result in zip(pending.pop(future), future.result()):
+                report.add(v, *result)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Quarantine
+# ---------------------------------------------------------------------------
+
+def quarantine(failures: list[Failure], path: Path | None = None) -> int:
+    """Move the variants of *failures* out of the upload set.
+
+    Each variant is appended to *path* (default ``cache/quarantine.jsonl``)
+    with its reason before it is removed from the cache.  Returns how many
+    were moved.
+    """
+    if not failures:
+        return 0
+    path = path or cache.CACHE_DIR / QUARANTINE_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    by_page: dict[str, list[Failure]] = defaultdict(list)
+    for f in failures:
+        by_page[f.pageId].append(f)
+
+    moved = 0
+    now = datetime.now(timezone.utc).isoformat()
+    with path.open("a", encoding="utf-8") as fh:
+        for page_id, page_failures in by_page.items():
+            for f in page_failures:
+                variant = cache.load_variant(f.variantId)
+                if variant is None:
+                    continue
+                fh.write(json.dumps({
+                    "variant": variant.model_dump(mode="json"),
+                    "reason": f.reason,
+                    "quarantinedAt": now,
+                }, ensure_ascii=False) + "\n")
+                moved += 1
+            # Written before anything is deleted, so an interrupted run
+            # loses nothing.
+            fh.flush()
+            failed_ids = {f.variantId for f in page_failures}
+            current = cache.load_page_variants(page_id)
+            kept = [v for v in current if v.variantId not in failed_ids]
+            if len(kept) != len(current):
+                cache.replace_page_variants(page_id, kept)
+            # Also drop variants their page no longer lists, which would
+            # otherwise be re-checked on every audit.
+            cache.delete_variants(failed_ids)
+    logger.info("Quarantined %d variants to %s", moved, path)
+    return moved
+
+
+def save_repairs(report: AuditReport) -> int:
+    """Write the valid variants whose fakeMarks were repaired back to the cache."""
+    if report.repaired:
+        cache.save_variants(report.repaired)
+        logger.info("Saved %d variants with repaired fakeMarks", len(report.repaired))
+    return len(report.repaired)
+
+
+def format_table(report: AuditReport) -> str:
+    """Render *report*'s breakdowns as fixed-width text tables."""
+    lines = [
+        f"{report.variants} variants, {report.invalid} invalid, "
+        f"{len(report.repaired)} repaired "
+        f"({report.seconds:.2f}s, {report.workers} workers)",
+    ]
+    if report.byReason:
+        lines += ["", f"{'invalid':>8}  reason", "-" * 40]
+        lines += [f"{n:>8}  {reason}" for reason, n in report.byReason.most_common()]
+    for title, counts in (("difficulty", report.byDifficulty), ("model", report.byModel)):
+        lines += ["", f"{title:<40} {'variants':>9} {'invalid':>8} {'rate':>6}", "-" * 66]
+        for key, (total, bad) in sorted(counts.items()):
+            lines.append(f"{str(key):<40} {total:>9} {bad:>8} {bad / total:>6.1%}")
+    return "\n".join(lines)
@@ -2,9 +2,15 @@
 
 from __future__ import annotations
 
+import html
+import re
+from typing import Iterable
+
 from bs4 import BeautifulSoup, Tag
 
-from dust_ingest.models import PageVariant
+from dust_ingest import tracing
+from dust_ingest.models import AlteredPage, FakeMark, PageVariant, Section
+from dust_ingest.snippet_match import Automaton, normalize
 
 TEXT_HTML_TAGS = (
     "h3", "h4", "h5", "h6",
@@ -12,12 +18,58 @@ TEXT_HTML_TAGS = (
 )
 MIN_TEXT_ELEMENTS = 3
 
+# One element of variant HTML as llm_alter renders it (and as BeautifulSoup
+# re-serializes it): flat siblings, text and attributes escaped with only
+# the entities html.escape writes, no nested markup.  BeautifulSoup sorts
+# attributes, so an image's three attributes may come in any order.
+_ESCAPES = r"&(?:amp|lt|gt|quot|#x27);"
+_TEXT = rf"[^<&]*(?:{_ESCAPES}[^<&]*)*"
+_ATTR = rf'[^<>&"]*(?:{_ESCAPES}[^<>&"]*)*'
+_IMG_ATTRS = ("data-element-id", "src", "alt")
+_IMG_ATTR_RE = re.compile(rf' (?P<name>data-element-id|src|alt)="(?P<value>{_ATTR})"')
+_FLAT_ELEMENT_RE = re.compile(
+    rf"\s*(?:<(?P<tag>h[1-6]|p|li|blockquote|figcaption|pre|code|td|th) "
+    rf'data-element-id="(?P<id>{_ATTR})">(?P<text>{_TEXT})</(?P=tag)>'
+    rf'|<img(?P<img>(?: (?:data-element-id|src|alt)="{_ATTR}"){{3}})\s?/?>)'
+)
+
+
+def sections_from_html(altered_content: str) -> list[Section] | None:
+    """Read flat variant HTML back into sections without an HTML parser.
+
+    Returns None unless the whole string is a sequence of flat elements,
+    so anything else (hand-edited or model-written HTML) can fall back to
+    BeautifulSoup.
+    """
+    sections: list[Section] = []
+    pos = 0
+    for m in _FLAT_ELEMENT_RE.finditer(altered_content):
+        if m.start() != pos:
+            return None
+        pos = m.end()
+        if m["tag"] is not None:
+            sections.append(Section(html.unescape(m["id"]), m["tag"], html.unescape(m["text"])))
+        else:
+            attrs = {a["name"]: html.unescape(a["value"]) for a in _IMG_ATTR_RE.finditer(m["img"])}
+            if len(attrs) != len(_IMG_ATTRS):
+                return None  # an attribute repeated in place of another
+            sections.append(Section(
+                attrs["data-element-id"], "img", src=attrs["src"], alt=attrs["alt"],
+            ))
+    if altered_content[pos:].strip():
+        return None
+    return sections
+
 
 def count_text_elements(altered_content: str) -> int:
     """Count non-empty text elements in variant HTML."""
     if not altered_content or not altered_content.strip():
         return 0
 
+    sections = sections_from_html(altered_content)
+    if sections is not None:
+        return count_text_sections(sections)
+
     soup = BeautifulSoup(altered_content, "html.parser")
     count = 0
     for node in soup.find_all(TEXT_HTML_TAGS):
@@ -28,23 +80,170 @@ def count_text_elements(altered_content: str) -> int:
     return count
 
 
+def count_text_sections(sections: Iterable[Section]) -> int:
+    """:func:`count_text_elements` for content still held as sections."""
+    return sum(1 for s in sections if s.tag in TEXT_HTML_TAGS and s.text.strip())
+
+
+def remember_text_elements(item: AlteredPage | PageVariant, count: int) -> None:
+    """Record that *item*'s current alteredContent has *count* text elements."""
+    item._text_elements = (item.alteredContent, count)
+
+
+def text_element_count(
+    item: AlteredPage | PageVariant, sections: list[Section] | None = None,
+) -> int:
+    """:func:`count_text_elements` of *item*, parsing only if not yet known.
+
+    The count is cached on the item against its alteredContent, so it
+    travels from generation to upload and is recomputed if the content
+    is replaced.  *sections*, if the caller already read them from the
+    content, spare a second parse.
+    """
+    cached = item._text_elements
+    if cached is not None and cached[0] == item.alteredContent:
+        return cached[1]
+    if sections is not None:
+        count = count_text_sections(sections)
+    else:
+        count = count_text_elements(item.alteredContent)
+    remember_text_elements(item, count)
+    return count
+
+
+def element_texts(
+    altered_content: str, sections: list[Section] | None = None,
+) -> list[tuple[str, str]]:
+    """``(elementId, text)`` for each element of variant HTML, in order.
+
+    Images contribute their alt text, which the model may also alter.
+    *sections* are the content as read by :func:`sections_from_html`, or
+    None to parse it.
+    """
+    if sections is None:
+        sections = sections_from_html(altered_content)
+    if sections is not None:
+        return [(s.elementId, s.alt if s.tag == "img" else s.text) for s in sections]
+
+    soup = BeautifulSoup(altered_content, "html.parser")
+    elements: list[tuple[str, str]] = []
+    for node in soup.find_all(attrs={"data-element-id": True}):
+        if not isinstance(node, Tag):
+            continue
+        text = str(node.get("alt") or "") if node.name == "img" else node.get_text()
+        elements.append((str(node["data-element-id"]), text))
+    return elements
+
+
+def remember_element_texts(variant: PageVariant, texts: list[tuple[str, str]]) -> None:
+    """Record *variant*'s element texts for its current alteredContent."""
+    variant._element_texts = (variant.alteredContent, texts)
+
+
+def variant_element_texts(
+    variant: PageVariant, sections: list[Section] | None = None,
+) -> list[tuple[str, str]]:
+    """:func:`element_texts` of *variant*, parsing only if not yet known.
+
+    Cached against alteredContent like :func:`text_element_count`.
+    """
+    cached = variant._element_texts
+    if cached is not None and cached[0] == variant.alteredContent:
+        return cached[1]
+    texts = element_texts(variant.alteredContent, sections)
+    remember_element_texts(variant, texts)
+    return texts
+
+
+def _marks_key(marks: list[FakeMark]) -> tuple[tuple[str, str | None], ...]:
+    return tuple((m.snippet, m.elementId) for m in marks)
+
+
+def _check_fake_marks(
+    variant: PageVariant, sections: list[Section] | None = None,
+) -> tuple[int, int]:
+    """:func:`resolve_fake_marks` for *variant*, skipped if already done.
+
+    The verdict is kept with the content and the marks as resolved, so a
+    variant checked again (e.g. at upload) is neither re-matched nor
+    reported as repaired twice.
+    """
+    marks_key = _marks_key(variant.fakeMarks)
+    cached = variant._marks_checked
+    if cached is not None and cached[:2] == (variant.alteredContent, marks_key):
+        return 0, cached[2]
+    repaired, unresolved = resolve_fake_marks(
+        variant.fakeMarks, variant_element_texts(variant, sections),
+    )
+    variant._marks_checked = (
+        variant.alteredContent, _marks_key(variant.fakeMarks), unresolved,
+    )
+    return repaired, unresolved
+
+
+def _content_known(variant: PageVariant) -> bool:
+    """True if the count and element texts for the current content are cached."""
+    content = variant.alteredContent
+    return (
+        variant._text_elements is not None and variant._text_elements[0] == content
+        and variant._element_texts is not None and variant._element_texts[0] == content
+    )
+
+
+def resolve_fake_marks(
+    marks: list[FakeMark], elements: list[tuple[str, str]],
+) -> tuple[int, int]:
+    """Check that every mark's snippet occurs in the element it names.
+
+    All snippets are matched against all element text in one pass (see
+    :mod:`dust_ingest.snippet_match`).  A mark whose snippet only occurs
+    in other elements, or that names no element, is pointed at the first
+    element containing it.  Returns ``(repaired, unresolved)``.
+    """
+    automaton = Automaton(normalize(m.snippet) for m in marks)
+    hits = automaton.hits(normalize(text) for _, text in elements)
+    repaired = unresolved = 0
+    for index, mark in enumerate(marks):
+        found = hits.get(index)
+        if not found:
+            unresolved += 1
+        elif mark.elementId is None or all(elements[i][0] != mark.elementId for i in found):
+            mark.elementId = elements[found[0]][0]
+            repaired += 1
+    return repaired, unresolved
+
+
 def validate_page_variant(variant: PageVariant) -> tuple[bool, str]:
     """Validate that a variant is upload-safe and playable.
 
     Uses fakeMarks array to determine fake content rather than inline tags.
+    Marks pointing at the wrong element are repaired in place; marks whose
+    snippet is nowhere in the content make the variant invalid.
     """
     if not variant.alteredContent or not variant.alteredContent.strip():
         return False, "empty alteredContent"
     if not variant.fakeMarks:
         return False, "no fakeMarks"
 
-    text_elements = count_text_elements(variant.alteredContent)
+    # Read the content at most once, and not at all when already checked.
+    sections = None if _content_known(variant) else sections_from_html(variant.alteredContent)
+    text_elements = text_element_count(variant, sections)
     if text_elements < MIN_TEXT_ELEMENTS:
         return (
             False,
             f"only {text_elements} text elements (need >= {MIN_TEXT_ELEMENTS})",
         )
 
+    repaired, unresolved = _check_fake_marks(variant, sections)
+    if repaired:
+        tracing.count("fakemark.repaired", repaired)
+    if unresolved:
+        return (
+            False,
+            f"{unresolved} of {len(variant.fakeMarks)} fakeMark snippets "
+            "not found in alteredContent",
+        )
+
     # Count fake elements from fakeMarks array
     fake_element_ids = {m.elementId for m in variant.fakeMarks if m.elementId}
     fake_count = len(fake_element_ids) if fake_element_ids else len(variant.fakeMarks)
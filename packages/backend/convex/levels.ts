@@ -1,5 +1,47 @@
 import { mutation, query } from "./_generated/server";
+import type { MutationCtx } from "./_generated/server";
 import { v } from "convex/values";
+import type { Infer } from "convex/values";
+
+const levelFields = {
+  levelId: v.string(),
+  projectId: v.string(),
+  difficulty: v.number(),
+  pageIds: v.array(v.string()),
+  mutationParams: v.object({
+    fakeRate: v.float64(),
+    subtlety: v.float64(),
+    maxFakeSpans: v.number(),
+  }),
+};
+
+const levelValidator = v.object(levelFields);
+
+async function upsertLevel(ctx: MutationCtx, args: Infer<typeof levelValidator>) {
+  const existing = await ctx.db
+    .query("levels")
+    .withIndex("by_levelId_projectId", (q) =>
+      q.eq("levelId", args.levelId).eq("projectId", args.projectId)
+    )
+    .unique();
+
+  if (existing) {
+    await ctx.db.patch(existing._id, {
+      difficulty: args.difficulty,
+      pageIds: args.pageIds,
+      mutationParams: args.mutationParams,
+    });
+    return existing._id;
+  }
+
+  return await ctx.db.insert("levels", {
+    levelId: args.levelId,
+    projectId: args.projectId,
+    difficulty: args.difficulty,
+    pageIds: args.pageIds,
+    mutationParams: args.mutationParams,
+  });
+}
 
 /**
  * Upsert a level definition.
@@ -8,41 +50,23 @@ import { v } from "convex/values";
  * levelId + projectId already exists it is updated; otherwise inserted.
  */
 export const upsert = mutation({
-  args: {
-    levelId: v.string(),
-    projectId: v.string(),
-    difficulty: v.number(),
-    pageIds: v.array(v.string()),
-    mutationParams: v.object({
-      fakeRate: v.float64(),
-      subtlety: v.float64(),
-      maxFakeSpans: v.number(),
-    }),
-  },
+  args: levelFields,
   handler: async (ctx, args) => {
-    const existing = await ctx.db
-      .query("levels")
-      .withIndex("by_levelId_projectId", (q) =>
-        q.eq("levelId", args.levelId).eq("projectId", args.projectId)
-      )
-      .unique();
+    return await upsertLevel(ctx, args);
+  },
+});
 
-    if (existing) {
-      await ctx.db.patch(existing._id, {
-        difficulty: args.difficulty,
-        pageIds: args.pageIds,
-        mutationParams: args.mutationParams,
-      });
-      return existing._id;
+/**
+ * Upsert a batch of level definitions in one transaction.
+ */
+export const upsertMany = mutation({
+  args: { levels: v.array(levelValidator) },
+  handler: async (ctx, args) => {
+    const ids = [];
+    for (const level of args.levels) {
+      ids.push(await upsertLevel(ctx, level));
     }
-
-    return await ctx.db.insert("levels", {
-      levelId: args.levelId,
-      projectId: args.projectId,
-      difficulty: args.difficulty,
-      pageIds: args.pageIds,
-      mutationParams: args.mutationParams,
-    });
+    return ids;
   },
 });
 
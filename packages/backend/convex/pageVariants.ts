@@ -1,5 +1,64 @@
 import { mutation, query } from "./_generated/server";
+import type { MutationCtx } from "./_generated/server";
 import { v } from "convex/values";
+import type { Infer } from "convex/values";
+
+const variantFields = {
+  variantId: v.string(),
+  pageId: v.string(),
+  levelId: v.string(),
+  difficulty: v.number(),
+  alteredContent: v.string(),
+  fakeMarks: v.array(
+    v.object({
+      kind: v.union(v.literal("FAKE"), v.literal("MISLEADING")),
+      elementId: v.optional(v.union(v.string(), v.null())),
+      snippet: v.string(),
+      explanation: v.string(),
+    })
+  ),
+  projectId: v.string(),
+};
+
+const variantValidator = v.object(variantFields);
+
+async function insertVariant(ctx: MutationCtx, args: Infer<typeof variantValidator>) {
+  return await ctx.db.insert("pageVariants", {
+    variantId: args.variantId,
+    pageId: args.pageId,
+    levelId: args.levelId,
+    difficulty: args.difficulty,
+    alteredContent: args.alteredContent,
+    fakeMarks: args.fakeMarks,
+    projectId: args.projectId,
+  });
+}
+
+async function upsertVariant(ctx: MutationCtx, args: Infer<typeof variantValidator>) {
+  // Deployments that used the old insert path can hold several rows per
+  // variantId; keep the first and drop the rest.
+  const [existing, ...duplicates] = await ctx.db
+    .query("pageVariants")
+    .withIndex("by_variantId", (q) => q.eq("variantId", args.variantId))
+    .collect();
+  for (const duplicate of duplicates) {
+    await ctx.db.delete(duplicate._id);
+  }
+
+  if (existing) {
+    await ctx.db.patch(existing._id, {
+      pageId: args.pageId,
+      levelId: args.levelId,
+      difficulty: args.difficulty,
+      alteredContent: args.alteredContent,
+      fakeMarks: args.fakeMarks,
+      projectId: args.projectId,
+    });
+    return existing._id;
+  }
+
+  return await insertVariant(ctx, args);
+}
 
 /**
  * Insert an altered page variant.
@@ -8,32 +67,50 @@ import { v } from "convex/values";
  * an altered version of a scraped page.
  */
 export const insert = mutation({
-  args: {
-    variantId: v.string(),
-    pageId: v.string(),
-    levelId: v.string(),
-    difficulty: v.number(),
-    alteredContent: v.string(),
-    fakeMarks: v.array(
-      v.object({
-        kind: v.union(v.literal("FAKE"), v.literal("MISLEADING")),
-        elementId: v.optional(v.union(v.string(), v.null())),
-        snippet: v.string(),
-        explanation: v.string(),
-      })
-    ),
-    projectId: v.string(),
+  args: variantFields,
+  handler: async (ctx, args) => {
+    return await insertVariant(ctx, args);
   },
+});
+
+/**
+ * Insert a batch of page variants in one transaction.
+ */
+export const insertMany = mutation({
+  args: { variants: v.array(variantValidator) },
   handler: async (ctx, args) => {
-    return await ctx.db.insert("pageVariants", {
-      variantId: args.variantId,
-      pageId: args.pageId,
-      levelId: args.levelId,
-      difficulty: args.difficulty,
-      alteredContent: args.alteredContent,
-      fakeMarks: args.fakeMarks,
-      projectId: args.projectId,
-    });
+    const ids = [];
+    for (const variant of args.variants) {
+      ids.push(await insertVariant(ctx, variant));
+    }
+    return ids;
+  },
+});
+
+/**
+ * Upsert a page variant keyed on variantId.
+ *
+ * Used by the ingestion pipeline so re-running a build updates existing
+ * rows instead of adding duplicates.
+ */
+export const upsert = mutation({
+  args: variantFields,
+  handler: async (ctx, args) => {
+    return await upsertVariant(ctx, args);
+  },
+});
+
+/**
+ * Upsert a batch of page variants in one transaction.
+ */
+export const upsertMany = mutation({
+  args: { variants: v.array(variantValidator) },
+  handler: async (ctx, args) => {
+    const ids = [];
+    for (const variant of args.variants) {
+      ids.push(await upsertVariant(ctx, variant));
+    }
+    return ids;
   },
 });
 
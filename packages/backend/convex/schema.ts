@@ -145,7 +145,7 @@ export default defineSchema({
     url: v.string(),
     title: v.string(),
     capturedAt: v.string(),
-    html: v.string(),
+    html: v.optional(v.string()),
     elements: v.array(
       v.object({
         elementId: v.string(),
@@ -202,6 +202,7 @@ export default defineSchema({
     ),
     projectId: v.string(),
   })
+    .index("by_variantId", ["variantId"])
     .index("by_pageId", ["pageId"])
     .index("by_levelId", ["levelId"])
     .index("by_projectId", ["projectId"]),